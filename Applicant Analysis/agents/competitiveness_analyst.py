@@ -1,6 +1,4 @@
 import os
-import io
-from PIL import Image
 from typing import Dict, Any, Optional
 import requests
 import json
@@ -10,6 +8,7 @@ from langchain_core.messages import HumanMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from config.prompts import load_prompts
+from agents.transcript_analyzer import TranscriptAnalyzer
 
 class CompetitivenessAnalyst:
     """
@@ -35,43 +34,19 @@ class CompetitivenessAnalyst:
         # Set API endpoint for OpenRouter
         self.api_url = "https://openrouter.ai/api/v1/chat/completions"
     
-    def extract_transcript_data(self, image: Image.Image) -> str:
+    def extract_transcript_data(self, source: Any) -> str:
         """
-        Extract transcript data from an uploaded image.
+        Extract transcript data from an uploaded transcript.
         
         Args:
-            image: The transcript image uploaded by the user
+            source: The transcript uploaded by the user: a PIL image, a PDF, or a list of
+                pages (see transcript_pages.load_pages for the accepted types)
             
         Returns:
             String representation of the extracted transcript data
         """
-        # Convert image to bytes for API processing
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format=image.format if image.format else 'JPEG')
-        img_byte_arr = img_byte_arr.getvalue()
-        
-        # In a real implementation, you would call the vision model API here
-        # For now, we'll return a mock response
-        
-        # Mock response - in production, replace with actual API call
-        mock_transcript = """
-        Student Name: Zhang Wei
-        Student ID: 2022XJU456
-        Program: Computer Science
-        Academic Year: 2023-2024
-        
-        Courses:
-        - CSE101 Introduction to Programming: A (90%)
-        - CSE102 Data Structures and Algorithms: A- (85%)
-        - MTH201 Linear Algebra: B+ (78%)
-        - CSE201 Database Systems: A (92%)
-        - CSE205 Computer Networks: B (75%)
-        - ENG101 Academic English: B+ (79%)
-        
-        Current GPA: 3.76/4.0
-        """
-        
-        return mock_transcript
+        # 单页和多页（PDF渲染、按页并发识别、合并课程表）都由TranscriptAnalyzer处理
+        return TranscriptAnalyzer().extract_transcript_data(source)
     
     def generate_report(self, university: str, major: str, predicted_degree: str, transcript_content: str, custom_requirements: str = "") -> str:
         """
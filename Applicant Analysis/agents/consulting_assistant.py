@@ -6,7 +6,11 @@ import json
 import streamlit as st
 from bs4 import BeautifulSoup
 from config.prompts import load_prompts
-from agents.serper_client import SerperClient
+from agents.serper_client import get_serper_client
+from agents.program_search import find_programs
+
+# 等待所有项目搜索完成的最长秒数
+SEARCH_TIMEOUT = 60
 
 class ConsultingAssistant:
     """
@@ -32,8 +36,11 @@ class ConsultingAssistant:
         # Set API endpoint for OpenRouter
         self.api_url = "https://openrouter.ai/api/v1/chat/completions"
         
-        # Initialize the Serper client for web search
-        self.serper_client = SerperClient()
+        # Shared Serper client for web search (keeps one MCP session open across requests)
+        self.serper_client = get_serper_client()
+        
+        # 最近一次项目搜索的查询数、缓存命中和错误，供界面显示
+        self.search_report = None
     
     def search_ucl_programs(self, keywords: List[str]) -> List[Dict[str, str]]:
         """
@@ -47,10 +54,11 @@ class ConsultingAssistant:
         """
         # Use the Serper client to search for programs
         try:
-            # Run the async search method synchronously
-            programs = self.serper_client.run_async(
-                self.serper_client.search_ucl_programs(keywords)
-            )
+            # 按关键词和学院并发发出多个查询，按项目URL去重并排序，结果按查询缓存
+            programs, self.search_report = find_programs(self.serper_client, keywords, timeout=SEARCH_TIMEOUT)
+            errors = self.search_report["errors"]
+            if errors:
+                st.warning(f"{len(errors)} of {self.search_report['queries']} program searches failed: {errors[0]}")
             return programs if programs else self.get_mock_programs()
         except Exception as e:
             st.error(f"Error using Serper for UCL program search: {e}")
@@ -0,0 +1,242 @@
+import io
+import math
+import time
+import base64
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Qwen2.5-VL 以 28x28 像素为一个视觉token，处理器默认的 max_pixels 为16384个token（约1280万像素），
+# 一页成绩单照片会按原分辨率计费。默认上限取 benchmark_transcript_images.py 离线可读性检查中
+# 单词识别率与原图一致的最小值：约2560个token（约200万像素）；降到1280个token时小字号的分数和等级开始混淆
+VISION_PATCH_SIZE = 28
+DEFAULT_MAX_PIXELS = 2560 * VISION_PATCH_SIZE * VISION_PATCH_SIZE
+
+# 各模型的像素上限，未列出的模型使用 DEFAULT_MAX_PIXELS。
+# GPT-4o（高精度模式）和 Claude 会在服务端把图片缩小到约这个像素数，上传更大的图片没有收益
+MODEL_MAX_PIXELS = {
+    "qwen/qwen2.5-vl-72b-instruct": DEFAULT_MAX_PIXELS,
+    "qwen/qwen2.5-vl-32b-instruct": DEFAULT_MAX_PIXELS,
+    "openai/gpt-4o": 768 * 2048,
+    "anthropic/claude-3.5-sonnet": 1568 * 768,
+}
+
+# 分析（裁剪、纠偏、色彩判断）用的缩略图长边
+ANALYSIS_SIZE = 1000
+
+# 纠偏搜索范围和精度（度）
+MAX_SKEW_ANGLE = 8.0
+MIN_SKEW_ANGLE = 0.3
+
+# 彩色度低于该值的图片转为灰度（Hasler-Süsstrunk colorfulness）
+GRAYSCALE_COLORFULNESS = 12.0
+
+# JPEG质量：文字在此质量下没有明显的振铃，识别效果与无损一致
+JPEG_QUALITY = 85
+
+# 最常见的16个取值覆盖的像素比例超过该值时视为平涂图片（截图、电子版导出），才尝试PNG；
+# 照片有噪点，PNG总是比JPEG大很多，且压缩耗时是JPEG的数十倍
+FLAT_IMAGE_RATIO = 0.9
+
+
+class ImagePreprocessor:
+    """
+    Prepares document photos for vision-language models.
+
+    Corrects EXIF orientation, crops to the text region, deskews, downscales to the
+    model's effective resolution and picks the smallest encoding (grayscale when the
+    page has no meaningful color, PNG or JPEG whichever is smaller).
+    """
+
+    def __init__(self, max_pixels: int = DEFAULT_MAX_PIXELS, jpeg_quality: int = JPEG_QUALITY,
+                 crop: bool = True, deskew: bool = True):
+        """
+        Initialize the preprocessor.
+
+        Args:
+            max_pixels: Pixel budget of the output image (the model's effective resolution)
+            jpeg_quality: JPEG quality used when JPEG is the smaller encoding
+            crop: Whether to crop to the detected text region
+            deskew: Whether to correct small rotations of the page
+        """
+        self.max_pixels = max_pixels
+        self.jpeg_quality = jpeg_quality
+        self.crop = crop
+        self.deskew = deskew
+
+    def prepare(self, image: Image.Image) -> Dict[str, Any]:
+        """
+        Preprocess and encode an image for a vision API call.
+
+        Args:
+            image: PIL Image object
+
+        Returns:
+            Dict with the base64 payload, MIME type and a report of the applied steps
+        """
+        start = time.perf_counter()
+        original_size = image.size
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        gray_small, scale = self._analysis_thumbnail(image)
+
+        crop_box = None
+        if self.crop:
+            box = self._text_region(gray_small)
+            if box is not None:
+                crop_box = tuple(int(round(v / scale)) for v in box)
+                image = image.crop(crop_box)
+                gray_small = gray_small.crop(box)
+
+        angle = self._skew_angle(gray_small) if self.deskew else 0.0
+
+        # 裁掉桌面等背景后再判断色彩，印章、校徽等少量彩色不影响文字识别
+        if image.mode != "L" and self._colorfulness(image) < GRAYSCALE_COLORFULNESS:
+            image = image.convert("L")
+
+        # 旋转会扩大画布，缩小时预留出扩大的部分，避免旋转后再缩放一次
+        radians = math.radians(abs(angle))
+        width, height = image.size
+        expanded = ((width * math.cos(radians) + height * math.sin(radians)) *
+                    (width * math.sin(radians) + height * math.cos(radians)))
+        image = self._downscale(image, int(self.max_pixels * width * height / expanded))
+        if angle:
+            fill = 255 if image.mode == "L" else (255, 255, 255)
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+
+        data, mime_type = self._encode_smallest(image)
+        return {
+            "base64": base64.b64encode(data).decode("utf-8"),
+            "mime_type": mime_type,
+            "bytes": len(data),
+            "original_size": original_size,
+            "size": image.size,
+            "crop_box": crop_box,
+            "skew_angle": angle,
+            "grayscale": image.mode == "L",
+            "vision_tokens": estimate_vision_tokens(image.size),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    def _analysis_thumbnail(self, image: Image.Image) -> Tuple[Image.Image, float]:
+        """Grayscale thumbnail for analysis, and its scale relative to the image."""
+        # 先按整数倍缩小（盒式滤波，速度快），再转灰度
+        factor = max(1, max(image.size) // ANALYSIS_SIZE)
+        small = image.reduce(factor) if factor > 1 else image
+        return small.convert("L"), small.width / image.width
+
+    @staticmethod
+    def _colorfulness(image: Image.Image) -> float:
+        """Hasler-Süsstrunk colorfulness of the central 80% of the image (skips leftover background at the edges)."""
+        if image.mode == "L":
+            return 0.0
+        width, height = image.size
+        box = (width // 10, height // 10, width - width // 10, height - height // 10)
+        small = image.reduce(max(1, max(image.size) // 256), box=box)
+        rgb = np.asarray(small, dtype=np.float32)
+        rg = rgb[..., 0] - rgb[..., 1]
+        yb = 0.5 * (rgb[..., 0] + rgb[..., 1]) - rgb[..., 2]
+        return float(np.hypot(rg.std(), yb.std()) + 0.3 * np.hypot(rg.mean(), yb.mean()))
+
+    @staticmethod
+    def _ink_map(gray: Image.Image) -> np.ndarray:
+        """Boolean map of strong horizontal/vertical edges (text strokes, table lines)."""
+        pixels = np.asarray(gray, dtype=np.int16)
+        edges = np.zeros(pixels.shape, dtype=bool)
+        edges[:, 1:] |= np.abs(np.diff(pixels, axis=1)) > 40
+        edges[1:, :] |= np.abs(np.diff(pixels, axis=0)) > 40
+        return edges
+
+    def _text_region(self, gray: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Bounding box of the text on the thumbnail, or None when cropping would not help.
+
+        Rows and columns are kept between the 0.5% and 99.5% quantiles of the edge mass,
+        so isolated specks and the desk around the page do not stretch the box.
+        """
+        edges = self._ink_map(gray)
+        total = edges.sum()
+        if total < 100:
+            return None
+        width, height = gray.size
+
+        def span(profile: np.ndarray, size: int) -> Tuple[int, int]:
+            cumulative = np.cumsum(profile) / total
+            low = int(np.searchsorted(cumulative, 0.005))
+            high = int(np.searchsorted(cumulative, 0.995)) + 1
+            margin = max(4, int(0.02 * size))
+            return max(0, low - margin), min(size, high + margin)
+
+        left, right = span(edges.sum(axis=0), width)
+        top, bottom = span(edges.sum(axis=1), height)
+        if (right - left) * (bottom - top) > 0.9 * width * height:
+            return None
+        return left, top, right, bottom
+
+    def _skew_angle(self, gray: Image.Image) -> float:
+        """
+        Page rotation in degrees via projection profiles.
+
+        Text lines produce sharp peaks in the row sums when they are horizontal, so the
+        angle maximizing the variance of the row profile is the correction to apply.
+        """
+        edges = Image.fromarray((self._ink_map(gray) * 255).astype(np.uint8))
+        if max(edges.size) > 600:
+            edges.thumbnail((600, 600))
+
+        def score(angle: float) -> float:
+            rotated = np.asarray(edges.rotate(angle, resample=Image.NEAREST), dtype=np.float32)
+            return float(rotated.sum(axis=1).var())
+
+        coarse = np.arange(-MAX_SKEW_ANGLE, MAX_SKEW_ANGLE + 1e-6, 1.0)
+        best = max(coarse, key=score)
+        fine = np.arange(best - 1.0, best + 1.0 + 1e-6, 0.25)
+        best = float(max(fine, key=score))
+        return round(best, 2) if abs(best) >= MIN_SKEW_ANGLE else 0.0
+
+    @staticmethod
+    def _downscale(image: Image.Image, max_pixels: int) -> Image.Image:
+        """Shrink to the pixel budget, rounding to whole vision patches; never upscales."""
+        width, height = image.size
+        if width * height <= max_pixels:
+            return image
+        scale = (max_pixels / (width * height)) ** 0.5
+        patch = VISION_PATCH_SIZE
+        new_width = max(patch, int(width * scale) // patch * patch)
+        new_height = max(patch, int(height * scale) // patch * patch)
+        # reducing_gap先按整数倍快速缩小，再用LANCZOS处理剩余的比例
+        return image.resize((new_width, new_height), Image.LANCZOS, reducing_gap=3.0)
+
+    @staticmethod
+    def _is_flat(image: Image.Image) -> bool:
+        """Whether a few colors cover almost all pixels (screenshots, digital exports)."""
+        sample = image.reduce(max(1, max(image.size) // 512))
+        if sample.mode != "L":
+            sample = sample.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        counts = sorted(sample.histogram(), reverse=True)
+        return sum(counts[:16]) >= FLAT_IMAGE_RATIO * sample.width * sample.height
+
+    def _encode_smallest(self, image: Image.Image) -> Tuple[bytes, str]:
+        """Encode as JPEG, and also as PNG for flat images; keep the smaller payload."""
+        jpeg = io.BytesIO()
+        image.save(jpeg, format="JPEG", quality=self.jpeg_quality, optimize=True)
+        if self._is_flat(image):
+            png = io.BytesIO()
+            image.save(png, format="PNG")
+            if png.tell() <= jpeg.tell():
+                return png.getvalue(), "image/png"
+        return jpeg.getvalue(), "image/jpeg"
+
+
+def max_pixels_for_model(model_name: str) -> int:
+    """Pixel cap for a vision model (DEFAULT_MAX_PIXELS for models without an entry in MODEL_MAX_PIXELS)."""
+    return MODEL_MAX_PIXELS.get(model_name, DEFAULT_MAX_PIXELS)
+
+
+def estimate_vision_tokens(size: Tuple[int, int]) -> int:
+    """Approximate number of vision tokens for an image of the given size (28x28 patches)."""
+    width, height = size
+    return -(-width // VISION_PATCH_SIZE) * -(-height // VISION_PATCH_SIZE)
@@ -0,0 +1,298 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 每个查询请求的结果数，以及最终保留的项目数
+RESULTS_PER_QUERY = 5
+MAX_PROGRAMS = 10
+
+# 一次推荐最多发出的查询数（关键词查询 + 学院查询）
+MAX_QUERIES = 8
+
+# 搜索结果缓存：UCL项目信息变化很慢，相近的报告产生相同的查询，6小时内直接复用
+SEARCH_CACHE_TTL = 6 * 3600
+SEARCH_CACHE_MAX_ENTRIES = 512
+
+# 倒数排名融合（RRF）的平滑常数；结果列表很短，取较小的值让排名差异更明显
+RRF_K = 10
+
+# 项目名包含某个关键词时的加分（相当于在一个查询中多排前几名）
+KEYWORD_BONUS = 0.05
+
+# 关键词对应的UCL学院，用于按学院发出查询
+DEPARTMENT_HINTS = {
+    "computer science": "Department of Computer Science",
+    "software": "Department of Computer Science",
+    "machine learning": "Department of Computer Science",
+    "artificial intelligence": "Department of Computer Science",
+    "data science": "Department of Statistical Science",
+    "statistic": "Department of Statistical Science",
+    "mathematic": "Department of Mathematics",
+    "electronic": "Department of Electronic and Electrical Engineering",
+    "electrical": "Department of Electronic and Electrical Engineering",
+    "information": "Department of Information Studies",
+    "business": "School of Management",
+    "management": "School of Management",
+    "finance": "School of Management",
+    "economic": "Department of Economics",
+}
+
+# UCL项目页面的路径特征
+PROGRAM_PATH_RE = re.compile(r"/(?:taught|research)-degrees/|/graduate/", re.IGNORECASE)
+# 学院名：首字母大写的词，中间可以有 and/of/for/& 等连接词
+DEPARTMENT_RE = re.compile(r"(?:Department|School|Faculty|Institute|Centre) (?:of|for) [A-Z][\w'-]*(?: (?:and|of|for|&|[A-Z][\w'-]*))*")
+# 日期：英式 "14 October 2024"/"14 Oct 2024"，美式 "October 14, 2024"，以及只有月份（和年份）的 "October 2024"
+_MONTH = (r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|"
+          r"Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\b")
+_DAY = r"\d{1,2}(?:st|nd|rd|th)?\b"
+_DATE_TEXT = rf"(?:{_DAY} {_MONTH}(?:,? \d{{4}})?|{_MONTH}(?: {_DAY})?(?:,? \d{{4}})?)"
+_DATE = rf"({_DATE_TEXT})"
+# "Applications open 14 October 2024"、"Open: 14 Oct 2024"、"opens on October 14, 2024"
+OPEN_RE = re.compile(r"(?i:\bopen(?:s|ed|ing)?(?: date)?):?\s+(?i:on\s+|from\s+|in\s+)?" + _DATE)
+# "close on 31 March 2025"、"Close: 31 Mar 2025"、"Application deadline: 31 March 2025"、"Closing date: ..."
+CLOSE_RE = re.compile(r"(?i:\b(?:close[sd]?|closing|deadline)(?: date)?):?\s+(?i:on\s+|in\s+|is\s+)?" + _DATE)
+# UCL页面的申请时间段："Applicants who require a visa: 14 Oct 2024 – 28 Feb 2025"（两端都带年份）
+DATE_RANGE_RE = re.compile(rf"({_DAY} {_MONTH} \d{{4}}|{_MONTH} {_DAY},? \d{{4}})\s*(?:[–—-]|\bto\b|\buntil\b)\s*"
+                           rf"({_DAY} {_MONTH} \d{{4}}|{_MONTH} {_DAY},? \d{{4}})")
+
+
+class TTLCache:
+    """Thread-safe in-memory cache whose entries expire after a fixed time."""
+
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid
+            max_entries: Maximum number of entries; the least recently used are evicted beyond it
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Any, value: Any):
+        """Store a value for ttl seconds."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 进程内共享的搜索结果缓存（按查询缓存，相近的报告可复用部分查询）
+SEARCH_CACHE = TTLCache()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def build_queries(keywords: List[str], max_queries: int = MAX_QUERIES) -> List[str]:
+    """
+    Build targeted search queries: one per keyword and one per related UCL department.
+
+    Args:
+        keywords: Program keywords extracted from the report
+        max_queries: Maximum number of queries
+
+    Returns:
+        Deduplicated queries, keyword queries first
+    """
+    queries = [f"UCL {keyword} taught postgraduate MSc" for keyword in keywords if keyword.strip()]
+    departments = []
+    for keyword in keywords:
+        for hint, department in DEPARTMENT_HINTS.items():
+            if hint in keyword.lower() and department not in departments:
+                departments.append(department)
+    queries += [f"UCL {department} postgraduate taught programmes" for department in departments]
+
+    unique, seen = [], set()
+    for query in queries:
+        if _normalize_query(query) not in seen:
+            seen.add(_normalize_query(query))
+            unique.append(query)
+    return unique[:max_queries]
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a program URL for deduplication (no scheme, www, query, fragment or trailing slash)."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{parts.path.rstrip('/')}".lower()
+
+
+def _organic_results(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Result items of a Serper response (tolerates 'organic' or 'results' lists)."""
+    for key in ("organic", "results"):
+        items = result.get(key)
+        if isinstance(items, list):
+            return [item for item in items if isinstance(item, dict)]
+    return []
+
+
+def parse_program(item: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    Turn a search result into a program dict, or None when it is not a UCL program page.
+
+    Args:
+        item: Search result with title, link and snippet
+
+    Returns:
+        Dict with department, program_name, application_open, application_close and program_url
+    """
+    url = item.get("link") or item.get("url") or ""
+    host = urlsplit(url).netloc.lower()
+    if not (host == "ucl.ac.uk" or host.endswith(".ucl.ac.uk")) or not PROGRAM_PATH_RE.search(url):
+        return None
+    title = item.get("title") or ""
+    snippet = item.get("snippet") or item.get("description") or ""
+    name = re.split(r"\s+[|\-–]\s+", title)[0].strip()
+    if not name:
+        return None
+    department = DEPARTMENT_RE.search(snippet) or DEPARTMENT_RE.search(title)
+    opens, closes = parse_application_dates(snippet)
+    return {
+        "department": re.sub(r"\s+(?:and|of|for|&)$", "", department.group(0)) if department else "UCL",
+        "program_name": name,
+        "application_open": opens or "See program page",
+        "application_close": closes or "See program page",
+        "program_url": url,
+    }
+
+
+def parse_application_dates(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Application open and close dates mentioned in a search snippet.
+
+    Accepts UK ("14 October 2024", "14 Oct 2024") and US ("October 14, 2024") dates after
+    "open"/"close"/"deadline" wording or "Open:"/"Close:" labels, and UCL's date ranges
+    ("14 Oct 2024 – 28 Feb 2025"); labelled dates take precedence over a range.
+
+    Args:
+        text: Snippet text
+
+    Returns:
+        (open date, close date) as written in the text, None when not found
+    """
+    opens, closes = OPEN_RE.search(text), CLOSE_RE.search(text)
+    date_range = DATE_RANGE_RE.search(text)
+    open_date = opens.group(1) if opens else (date_range.group(1) if date_range else None)
+    close_date = closes.group(1) if closes else (date_range.group(2) if date_range else None)
+    return open_date, close_date
+
+
+def rank_programs(results: List[Dict[str, Any]], keywords: List[str],
+                  max_programs: int = MAX_PROGRAMS) -> List[Dict[str, str]]:
+    """
+    Deduplicate programs by URL and rank them across queries.
+
+    Scores use reciprocal rank fusion: a program found by several queries, or near the
+    top of a query, ranks higher. Programs whose name contains a keyword get a bonus.
+
+    Args:
+        results: Search results, one per query
+        keywords: Program keywords extracted from the report
+        max_programs: Number of programs to return
+
+    Returns:
+        Programs ordered by score
+    """
+    programs: Dict[str, Dict[str, str]] = {}
+    scores: Dict[str, float] = {}
+    for result in results:
+        for position, item in enumerate(_organic_results(result), start=1):
+            program = parse_program(item)
+            if program is None:
+                continue
+            key = normalize_url(program["program_url"])
+            if key not in programs:
+                programs[key] = program
+                scores[key] = 0.0
+            else:
+                # 其他查询的摘要可能带有第一次没有的学院或日期
+                for field, value in program.items():
+                    if programs[key][field] in ("UCL", "See program page") and value not in ("UCL", "See program page"):
+                        programs[key][field] = value
+            scores[key] += 1.0 / (RRF_K + int(item.get("position") or position))
+
+    for key, program in programs.items():
+        name = program["program_name"].lower()
+        scores[key] += KEYWORD_BONUS * sum(1 for keyword in keywords if keyword.lower() in name)
+    order = sorted(programs, key=lambda key: -scores[key])
+    return [programs[key] for key in order[:max_programs]]
+
+
+def find_programs(client, keywords: List[str], num_results: int = RESULTS_PER_QUERY,
+                  max_programs: int = MAX_PROGRAMS, cache: Optional[TTLCache] = None,
+                  timeout: Optional[float] = None) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    Search for UCL programs with several concurrent queries.
+
+    Queries found in the cache are not sent again; the rest run concurrently through
+    the client's shared MCP session. Failed queries are not cached.
+
+    Args:
+        client: SerperClient
+        keywords: Program keywords extracted from the report
+        num_results: Results requested per query
+        max_programs: Number of programs to return
+        cache: Search result cache, defaults to the process-wide SEARCH_CACHE
+        timeout: Seconds to wait for all searches
+
+    Returns:
+        (ranked programs, report with the number of queries, cache hits and errors)
+    """
+    cache = SEARCH_CACHE if cache is None else cache
+    queries = build_queries(keywords)
+    results: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for query in queries:
+        cached = cache.get((_normalize_query(query), num_results))
+        if cached is not None:
+            results[query] = cached
+        else:
+            missing.append(query)
+
+    errors = []
+    if missing:
+        fetched = client.run_async(client.search_many(missing, num_results), timeout)
+        for query, result in zip(missing, fetched):
+            if "error" in result:
+                errors.append(f"{query}: {result['error']}")
+                continue
+            cache.put((_normalize_query(query), num_results), result)
+            results[query] = result
+
+    programs = rank_programs([results[q] for q in queries if q in results], keywords, max_programs)
+    report = {"queries": len(queries), "cached": len(queries) - len(missing), "errors": errors,
+              "programs": len(programs)}
+    return programs, report
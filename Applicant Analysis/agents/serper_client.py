@@ -2,129 +2,286 @@ import os
 import json
 import base64
 import asyncio
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 import streamlit as st
 
 import mcp
 from mcp.client.websocket import websocket_client
+from mcp.shared.exceptions import McpError
+
+# 同一会话上同时进行的工具调用数（MCP请求带有各自的id，可在一个连接上并发）
+MAX_CONCURRENT_CALLS = 8
+
+# 建立连接（websocket握手 + MCP initialize）和单次工具调用的超时秒数
+CONNECT_TIMEOUT = 15.0
+REQUEST_TIMEOUT = 30.0
+
+# 连接断开时MCP为未完成请求返回的JSON-RPC错误码（mcp.types.CONNECTION_CLOSED）
+CONNECTION_CLOSED = -32000
+
 
 class SerperClient:
     """
     Client for interacting with the Serper MCP server for web search capabilities.
     This allows the consulting assistant to search for up-to-date information about UCL programs.
+
+    One MCP session is kept open on a background event loop thread. Searches issued from
+    any thread or event loop are multiplexed over that session, and the session is
+    re-established automatically when the connection drops.
     """
-    
-    def __init__(self):
-        """Initialize the Serper MCP client with configuration from Streamlit secrets."""
-        # Get API keys from Streamlit secrets
-        self.serper_api_key = st.secrets.get("SERPER_API_KEY", "")
-        self.smithery_api_key = st.secrets.get("SMITHERY_API_KEY", "")
-        
-        # Server config
-        self.config = {
-            "serperApiKey": self.serper_api_key
-        }
-        
-        # Base64 encode the config
-        self.config_b64 = base64.b64encode(json.dumps(self.config).encode()).decode()
-        
-        # Create server URL
-        self.url = f"wss://server.smithery.ai/@marcopesani/mcp-server-serper/ws?config={self.config_b64}&api_key={self.smithery_api_key}"
-        
+
+    def __init__(self, url: Optional[str] = None, max_concurrency: int = MAX_CONCURRENT_CALLS,
+                 connect_timeout: float = CONNECT_TIMEOUT, request_timeout: float = REQUEST_TIMEOUT):
+        """
+        Initialize the Serper MCP client with configuration from Streamlit secrets.
+
+        Args:
+            url: MCP websocket URL; defaults to the Smithery-hosted Serper server configured
+                from Streamlit secrets (pass a local URL to use mock_mcp_server.py)
+            max_concurrency: Maximum number of tool calls in flight on the session
+            connect_timeout: Seconds allowed for connecting and initializing the session
+            request_timeout: Seconds allowed for a single tool call
+        """
+        if url is None:
+            # Get API keys from Streamlit secrets
+            self.serper_api_key = st.secrets.get("SERPER_API_KEY", "")
+            self.smithery_api_key = st.secrets.get("SMITHERY_API_KEY", "")
+
+            # Server config
+            self.config = {
+                "serperApiKey": self.serper_api_key
+            }
+
+            # Base64 encode the config
+            self.config_b64 = base64.b64encode(json.dumps(self.config).encode()).decode()
+
+            # Create server URL
+            url = f"wss://server.smithery.ai/@marcopesani/mcp-server-serper/ws?config={self.config_b64}&api_key={self.smithery_api_key}"
+        self.url = url
+
         # Keep a record of tools
         self.available_tools = []
-    
-    async def initialize(self):
-        """Initialize the connection to the MCP server and get available tools."""
+
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.last_error: Optional[str] = None
+        self.stats = {"connects": 0, "calls": 0, "reconnects": 0}
+
+        # 后台事件循环线程，所有MCP通信都在这个循环上进行
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        # 以下对象只在后台循环中访问
+        self._session: Optional[mcp.ClientSession] = None
+        self._session_stop: Optional[asyncio.Event] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread on first use."""
+        with self._thread_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="serper-mcp-loop", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _on_loop(self, coroutine):
+        """Await a coroutine on the background loop from any event loop."""
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+    async def _hold_session(self, ready: asyncio.Future):
+        """
+        Own the websocket and MCP session for their whole lifetime.
+
+        The transport contexts are entered and exited by this one task (anyio requires it);
+        other tasks only use the session published in self._session.
+        """
+        stop = asyncio.Event()
         try:
-            # Connect to the server using websocket client
             async with websocket_client(self.url) as streams:
                 async with mcp.ClientSession(*streams) as session:
-                    # Initialize the connection
                     await session.initialize()
-                    
-                    # List available tools
                     tools_result = await session.list_tools()
                     self.available_tools = [t.name for t in tools_result.tools]
-                    return True
+                    self._session, self._session_stop = session, stop
+                    self.stats["connects"] += 1
+                    if not ready.done():
+                        ready.set_result(session)
+                    # 保持连接，直到关闭或连接断开（传输层的异常会取消这里的等待）
+                    await stop.wait()
         except Exception as e:
-            st.error(f"Error initializing Serper MCP client: {e}")
+            self.last_error = str(e)
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            if self._session_stop is stop:
+                self._session, self._session_stop = None, None
+
+    async def _get_session(self) -> Tuple[mcp.ClientSession, asyncio.Task]:
+        """Return the open session and the task holding it, connecting first if there is none."""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._session is not None:
+                return self._session, self._session_task
+            ready = asyncio.get_running_loop().create_future()
+            self._session_task = asyncio.create_task(self._hold_session(ready))
+            try:
+                return await asyncio.wait_for(ready, self.connect_timeout), self._session_task
+            except BaseException:
+                self._session_task.cancel()
+                raise
+
+    def _drop_session(self, session: mcp.ClientSession):
+        """Close a session that failed, so the next call reconnects."""
+        if self._session is session and self._session_stop is not None:
+            self._session_stop.set()
+            self._session, self._session_stop = None, None
+
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call a tool on the shared session (runs on the background loop).
+
+        A call that fails because the connection dropped is retried once on a new session.
+        A call that times out while the session is still up is cancelled on its own and
+        raises, so other calls in flight on the session are not affected; errors reported
+        by the server are raised as they are.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            for attempt in range(2):
+                session, holder = await self._get_session()
+                call = asyncio.ensure_future(session.call_tool(name, arguments=arguments))
+                try:
+                    # 连接断开时持有会话的任务会退出，此时不必等到超时
+                    await asyncio.wait({call, holder}, timeout=self.request_timeout,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                    if call.done():
+                        result = call.result()
+                    elif holder.done():
+                        raise ConnectionError("MCP session closed")
+                    else:
+                        # 只是这次调用超时：取消这次调用，会话仍给其他调用使用
+                        raise TimeoutError("MCP tool call timed out")
+                except McpError as e:
+                    if getattr(e.error, "code", None) != CONNECTION_CLOSED or attempt:
+                        raise
+                except Exception:
+                    # 只有持有会话的任务已经退出（连接断开）时才重连重试
+                    if attempt or not holder.done():
+                        raise
+                else:
+                    self.stats["calls"] += 1
+                    return self._parse_result(result)
+                finally:
+                    call.cancel()
+                # 连接断开：丢弃会话，重连后重试一次
+                self._drop_session(session)
+                self.stats["reconnects"] += 1
+
+    @staticmethod
+    def _parse_result(result) -> Dict[str, Any]:
+        """Decode the text content of a tool result (JSON when possible)."""
+        text = "\n".join(getattr(item, "text", "") for item in getattr(result, "content", None) or [])
+        if getattr(result, "isError", False):
+            raise RuntimeError(text or "MCP tool call failed")
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            return {"text": text}
+        return parsed if isinstance(parsed, dict) else {"results": parsed}
+
+    async def initialize(self):
+        """Initialize the connection to the MCP server and get available tools."""
+        try:
+            await self._on_loop(self._get_session())
+            return True
+        except Exception as e:
+            self.last_error = str(e)
             return False
-    
-    async def search_web(self, query: str) -> Dict[str, Any]:
+
+    async def search_web(self, query: str, num_results: int = 5) -> Dict[str, Any]:
         """
         Perform a web search using the Serper MCP server.
-        
+
         Args:
             query: The search query
-            
+            num_results: Number of results to request
+
         Returns:
-            Dictionary containing search results
+            Dictionary containing search results, or {"error": ...} if the search failed
         """
         try:
-            # Connect to the server using websocket client
-            async with websocket_client(self.url) as streams:
-                async with mcp.ClientSession(*streams) as session:
-                    # Initialize the connection
-                    await session.initialize()
-                    
-                    # Call the web search tool
-                    result = await session.call_tool("web-search", arguments={
-                        "query": query,
-                        "numResults": 5
-                    })
-                    
-                    return result.result if hasattr(result, 'result') else {}
+            return await self._on_loop(self._call_tool("web-search", {
+                "query": query,
+                "numResults": num_results
+            }))
         except Exception as e:
-            st.error(f"Error performing web search: {e}")
+            # 可能在后台线程中运行，错误由调用方显示
+            self.last_error = str(e)
             return {"error": str(e)}
-    
-    async def search_ucl_programs(self, keywords: List[str]) -> List[Dict[str, str]]:
+
+    async def search_many(self, queries: List[str], num_results: int = 5) -> List[Dict[str, Any]]:
         """
-        Search for UCL programs using the web search tool.
-        
+        Run several web searches concurrently over the shared session.
+
         Args:
-            keywords: List of keywords to search for
-            
+            queries: The search queries
+            num_results: Number of results to request per query
+
         Returns:
-            List of program information dictionaries
+            One result per query, in order; failed searches are {"error": ...}
         """
-        programs = []
-        
-        try:
-            # Construct search query
-            search_query = f"UCL University College London postgraduate programs {' '.join(keywords)}"
-            
-            # Perform search
-            search_results = await self.search_web(search_query)
-            
-            # Process results (in a real implementation, you would parse the search results)
-            # For now, we'll return mock data similar to the original implementation
-            
-            # Mock program data - in production, parse the actual search results
-            programs = [
-                {
-                    "department": "Department of Computer Science",
-                    "program_name": "MSc Computer Science",
-                    "application_open": "October 2023",
-                    "application_close": "July 31, 2024",
-                    "program_url": "https://www.ucl.ac.uk/prospective-students/graduate/taught-degrees/computer-science-msc"
-                },
-                {
-                    "department": "Department of Computer Science",
-                    "program_name": "MSc Data Science and Machine Learning",
-                    "application_open": "October 2023",
-                    "application_close": "March 29, 2024",
-                    "program_url": "https://www.ucl.ac.uk/prospective-students/graduate/taught-degrees/data-science-machine-learning-msc"
-                },
-                # Add more mock programs based on keywords
-            ]
-            
-            return programs
-        except Exception as e:
-            st.error(f"Error searching UCL programs: {e}")
-            return []
-    
-    def run_async(self, coroutine):
-        """Helper method to run async methods synchronously."""
-        return asyncio.run(coroutine) 
\ No newline at end of file
+        return await asyncio.gather(*(self.search_web(query, num_results) for query in queries))
+
+    def run_async(self, coroutine, timeout: Optional[float] = None):
+        """
+        Helper method to run async methods synchronously.
+
+        The coroutine runs on the client's background loop, so the persistent session is
+        reused instead of creating a new event loop and connection per call.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result(timeout)
+
+    def close(self):
+        """Close the MCP session and stop the background loop."""
+        with self._thread_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def shutdown():
+            if self._session_stop is not None:
+                self._session_stop.set()
+            if self._session_task is not None:
+                await asyncio.wait({self._session_task}, timeout=5)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        self._session = self._session_stop = self._session_task = None
+        self._connect_lock = self._semaphore = None
+
+
+@st.cache_resource
+def get_serper_client() -> SerperClient:
+    """
+    Shared SerperClient for the Streamlit server.
+
+    Cached as a resource so the MCP session survives reruns and is reused by all user sessions.
+    """
+    return SerperClient()
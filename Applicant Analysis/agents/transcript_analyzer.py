@@ -1,11 +1,47 @@
 import os
-import io
-import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import requests
 import json
 import streamlit as st
+from agents.image_preprocessor import ImagePreprocessor, max_pixels_for_model
+from agents.transcript_pages import load_pages, parse_page_json, merge_pages, format_transcript
+from agents.transcript_cache import TranscriptCache, page_hash, make_cache_key
+
+# 多页成绩单同时进行的视觉请求数
+MAX_PAGE_WORKERS = 4
+
+# 单个视觉请求的超时秒数
+REQUEST_TIMEOUT = 180
+
+SINGLE_PAGE_PROMPT = """Please analyze this academic transcript image. 
+Extract all the following information:
+- Student name and ID
+- University and program
+- Course names, codes, and grades
+- GPA or overall average
+- Academic year or semester
+
+Format this information in a clear, structured way that's easy to read.
+Only include information that is actually present in the image.
+"""
+
+# 多页时每页返回JSON，便于合并各页的课程表并去重
+PAGE_PROMPT = """This image is one page of a multi-page academic transcript.
+Extract the information on this page and return only a JSON object with this structure:
+{
+  "student_name": "...",
+  "student_id": "...",
+  "university": "...",
+  "program": "...",
+  "academic_year": "...",
+  "courses": [{"code": "...", "name": "...", "grade": "...", "score": "...", "term": "..."}],
+  "gpa": "overall / cumulative GPA or average, e.g. 3.76/4.0"
+}
+Use null for anything not shown on this page. List every course row on the page exactly as printed.
+Do not include any text outside the JSON object.
+"""
 
 class TranscriptAnalyzer:
     """
@@ -13,12 +49,42 @@ class TranscriptAnalyzer:
     Uses Qwen 2.5 VL vision-language model to read and interpret transcript data.
     """
     
-    def __init__(self):
-        """Initialize the Transcript Analyzer agent with Qwen 2.5 VL model via OpenRouter."""
+    def __init__(self, cache: Optional[TranscriptCache] = None, enable_cache: bool = True):
+        """
+        Initialize the Transcript Analyzer agent with Qwen 2.5 VL model via OpenRouter.
+        
+        Args:
+            cache: Cache of per-page model responses, defaults to .cache/transcript_cache.db
+            enable_cache: Whether to reuse responses for pages that were already extracted
+        """
         # Get API key from Streamlit secrets
         self.api_key = st.secrets.get("OPENROUTER_API_KEY", "")
         self.model_name = "qwen/qwen2.5-vl-72b-instruct"
         self.api_url = "https://openrouter.ai/api/v1/chat/completions"
+        # 上传前裁剪、纠偏并缩小到该模型的像素上限
+        self.preprocessor = ImagePreprocessor(max_pixels=max_pixels_for_model(self.model_name))
+        # 多页并发请求共用连接池
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_PAGE_WORKERS))
+        # 同一份成绩单针对不同目标生成多次报告时，按页面内容哈希复用识别结果
+        if cache is None and enable_cache:
+            cache = TranscriptCache()
+        self.cache = cache if enable_cache else None
+        # 最近一次提取的缓存命中和失败情况，供界面显示：
+        # failed 为无法识别的页数，mock 为是否返回了模拟数据
+        self.cache_status = {"pages": 0, "cached": 0, "failed": 0, "mock": False}
+        
+    def prepare_image(self, image: Image.Image) -> Dict[str, Any]:
+        """
+        Preprocess an image for API transmission.
+        
+        Args:
+            image: PIL Image object
+            
+        Returns:
+            Dict with the base64 payload, its MIME type and preprocessing details
+        """
+        return self.preprocessor.prepare(image)
         
     def encode_image(self, image: Image.Image) -> str:
         """
@@ -28,79 +94,157 @@ class TranscriptAnalyzer:
             image: PIL Image object
             
         Returns:
-            Base64 encoded image string
+            Base64 encoded image string (see prepare_image for the MIME type)
         """
-        buffer = io.BytesIO()
-        image.save(buffer, format="JPEG")
-        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+        return self.prepare_image(image)["base64"]
         
-    def extract_transcript_data(self, image: Image.Image) -> str:
+    def extract_transcript_data(self, source: Any, force_refresh: bool = False) -> str:
         """
-        Extract transcript data from an uploaded image using Qwen 2.5 VL via OpenRouter.
+        Extract transcript data using Qwen 2.5 VL via OpenRouter.
         
         Args:
-            image: The transcript image uploaded by the user
+            source: The transcript uploaded by the user: a PIL image, a PDF, or a list of
+                pages (see transcript_pages.load_pages for the accepted types)
+            force_refresh: Ignore cached responses and call the vision model again
             
         Returns:
             String representation of the extracted transcript data
         """
+        self.cache_status = {"pages": 0, "cached": 0, "failed": 0, "mock": False}
         try:
-            # Encode image to base64
-            base64_image = self.encode_image(image)
+            pages = load_pages(source)
+            if not pages:
+                st.error("The uploaded transcript contains no pages.")
+                return self._fallback_transcript()
             
-            # Create prompt for the Qwen model
-            prompt = """Please analyze this academic transcript image. 
-            Extract all the following information:
-            - Student name and ID
-            - University and program
-            - Course names, codes, and grades
-            - GPA or overall average
-            - Academic year or semester
+            with st.spinner(f"AI analyzing transcript ({len(pages)} page{'s' if len(pages) > 1 else ''}) with Qwen 2.5 VL..."):
+                self.cache_status["pages"] = len(pages)
+                if len(pages) == 1:
+                    text, cached = self._extract_page(pages[0], SINGLE_PAGE_PROMPT, force_refresh)
+                    self.cache_status["cached"] = int(cached)
+                    return text
+                return self._extract_pages(pages, force_refresh)
+                
+        except Exception as e:
+            st.error(f"Error extracting transcript data: {str(e)}")
+            return self._fallback_transcript()
+    
+    def _fallback_transcript(self) -> str:
+        """Record that extraction failed and return the mock transcript."""
+        self.cache_status["failed"] = self.cache_status["pages"]
+        self.cache_status["mock"] = True
+        return self.get_mock_transcript()
+    
+    def _extract_page(self, page: Image.Image, prompt: str, force_refresh: bool = False) -> Tuple[str, bool]:
+        """
+        Extract one page, reusing the cached response for an identical page and prompt.
+        
+        Does not call Streamlit, so it can run in worker threads.
+        
+        Args:
+            page: Page image
+            prompt: Instruction text sent with the image
+            force_refresh: Skip the cache lookup (the new response is still stored)
             
-            Format this information in a clear, structured way that's easy to read.
-            Only include information that is actually present in the image.
-            """
+        Returns:
+            (model response text, whether it came from the cache)
+        """
+        key = None
+        if self.cache is not None:
+            # 像素上限不同，模型看到的图片不同，识别结果也可能不同
+            key = make_cache_key(f"{self.model_name}@{self.preprocessor.max_pixels}", prompt, page_hash(page))
+            if not force_refresh:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached, True
+        text = self._request(self.prepare_image(page), prompt)
+        # 只缓存成功的响应，出错时返回的模拟数据不会进入缓存
+        if key is not None:
+            self.cache.put(key, text)
+        return text, False
+    
+    def _extract_pages(self, pages: List[Image.Image], force_refresh: bool = False) -> str:
+        """
+        Send one vision request per page concurrently and merge the course tables.
+        
+        Args:
+            pages: Page images in document order
+            force_refresh: Ignore cached responses
             
-            # Prepare the API request payload for OpenRouter
-            payload = {
-                "model": self.model_name,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                        ]
-                    }
-                ],
-                "max_tokens": 2000
-            }
+        Returns:
+            Merged transcript text
+        """
+        results: List[Optional[str]] = [None] * len(pages)
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(MAX_PAGE_WORKERS, len(pages))) as executor:
+            # 工作线程中不调用st，错误统一回到主线程显示
+            futures = {executor.submit(self._extract_page, page, PAGE_PROMPT, force_refresh): i
+                       for i, page in enumerate(pages)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index], cached = future.result()
+                    self.cache_status["cached"] += int(cached)
+                except Exception as e:
+                    errors.append(f"page {index + 1}: {e}")
+        self.cache_status["failed"] = len(errors)
+        
+        if errors:
+            st.warning("Some transcript pages could not be analyzed: " + "; ".join(sorted(errors)))
+        parsed, unparsed = [], []
+        for i, text in enumerate(results):
+            if text is None:
+                continue
+            page = parse_page_json(text)
+            if page is None:
+                unparsed.append((i + 1, text))
+            else:
+                parsed.append(page)
+        if not parsed and not unparsed:
+            return self._fallback_transcript()
+        return format_transcript(merge_pages(parsed), unparsed)
+    
+    def _request(self, prepared: Dict[str, Any], prompt: str) -> str:
+        """
+        Send one image to the vision model.
+        
+        Args:
+            prepared: Result of prepare_image
+            prompt: Instruction text sent with the image
             
-            # Set up headers with OpenRouter API key
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}",
-                "HTTP-Referer": "https://applicant-analysis.streamlit.app",  # Optional: Replace with your actual app URL
-                "X-Title": "Applicant Analysis Tool"  # Optional: Your application name
-            }
+        Returns:
+            The model's response text
             
-            # Make API request
-            with st.spinner("AI analyzing transcript with Qwen 2.5 VL..."):
-                response = requests.post(self.api_url, headers=headers, json=payload)
-                
-                # Check for successful response
-                if response.status_code == 200:
-                    result = response.json()
-                    transcript_text = result["choices"][0]["message"]["content"]
-                    return transcript_text
-                else:
-                    # If real API fails, provide informative error and use mock data
-                    st.error(f"OpenRouter API Error: {response.status_code} - {response.text}")
-                    return self.get_mock_transcript()
-                    
-        except Exception as e:
-            st.error(f"Error extracting transcript data: {str(e)}")
-            return self.get_mock_transcript()
+        Raises:
+            RuntimeError: If the API returns an error status
+        """
+        # Prepare the API request payload for OpenRouter
+        payload = {
+            "model": self.model_name,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {"type": "image_url", "image_url": {"url": f"data:{prepared['mime_type']};base64,{prepared['base64']}"}}
+                    ]
+                }
+            ],
+            "max_tokens": 2000
+        }
+        
+        # Set up headers with OpenRouter API key
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+            "HTTP-Referer": "https://applicant-analysis.streamlit.app",  # Optional: Replace with your actual app URL
+            "X-Title": "Applicant Analysis Tool"  # Optional: Your application name
+        }
+        
+        response = self.session.post(self.api_url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            raise RuntimeError(f"OpenRouter API Error: {response.status_code} - {response.text}")
+        return response.json()["choices"][0]["message"]["content"]
     
     def get_mock_transcript(self) -> str:
         """
@@ -0,0 +1,157 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+from PIL import Image, ImageOps
+
+# 默认缓存位置：应用目录下的 .cache
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "transcript_cache.db")
+
+# 缓存内容总大小上限（识别结果是文本，几千条记录也只有几MB）
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def page_hash(image: Image.Image) -> str:
+    """
+    Content hash of a page image.
+
+    Hashes the decoded pixels after EXIF orientation rather than the file bytes, so the
+    same page re-read from a PIL image, a re-rendered PDF or a copy with different
+    metadata maps to the same entry. Perceptual hashes are deliberately not used:
+    transcripts from the same university share a layout and would collide across
+    students.
+
+    Args:
+        image: PIL Image object
+
+    Returns:
+        Hex digest
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def make_cache_key(model_name: str, prompt: str, image_hash: str) -> str:
+    """
+    Build the cache key: (model, prompt hash, page hash).
+
+    Args:
+        model_name: Vision model name
+        prompt: Instruction sent with the image (a changed prompt invalidates the entry)
+        image_hash: Result of page_hash
+
+    Returns:
+        Cache key
+    """
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+    return f"{model_name}:{prompt_hash}:{image_hash}"
+
+
+class TranscriptCache:
+    """
+    Persistent cache of vision model responses per transcript page.
+
+    SQLite storage with LRU eviction by total size; safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file path, defaults to .cache/transcript_cache.db
+            max_bytes: Size limit of the cached text; least recently used entries are evicted beyond it
+        """
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcript_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcript_cache_last_access ON transcript_cache (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Read a cached response.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached text, or None on a miss
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value FROM transcript_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE transcript_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, value: str):
+        """
+        Store a response and evict the least recently used entries beyond the size limit.
+
+        Args:
+            key: Cache key
+            value: Model response text
+        """
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcript_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcript_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for old_key, old_size in conn.execute(
+                "SELECT key, size FROM transcript_cache WHERE key != ? ORDER BY last_access", (key,)
+            ).fetchall():
+                conn.execute("DELETE FROM transcript_cache WHERE key = ?", (old_key,))
+                total -= old_size
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM transcript_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache statistics.
+
+        Returns:
+            Hits and misses of this instance, plus the number of entries and total size on disk
+        """
+        with self._lock, self._connect() as conn:
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcript_cache"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "size_bytes": total}
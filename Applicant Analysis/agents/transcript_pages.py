@@ -0,0 +1,205 @@
+import io
+import os
+import re
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+from PIL import Image
+
+# PDF页面的渲染分辨率：A4约为1240x1754像素，预处理会再缩小到模型的有效分辨率，
+# 更高的DPI只会增加渲染时间
+RENDER_DPI = 150
+
+# 单次分析最多处理的页数，避免误传整本文件时产生大量视觉请求
+MAX_PAGES = 20
+
+# 多页成绩单每页要求模型返回的JSON结构
+PAGE_FIELDS = ("student_name", "student_id", "university", "program", "academic_year")
+COURSE_FIELDS = ("code", "name", "grade", "score", "term")
+
+_EMPTY_VALUES = {"", "n/a", "na", "none", "null", "unknown", "-"}
+
+
+def load_pages(source: Any, dpi: int = RENDER_DPI, max_pages: int = MAX_PAGES) -> List[Image.Image]:
+    """
+    Turn a transcript upload into a list of page images.
+
+    Args:
+        source: A PIL image, PDF or image bytes, a file path, a file-like object
+            (e.g. a Streamlit UploadedFile), or a list of any of these
+        dpi: Resolution used to render PDF pages
+        max_pages: Maximum number of pages to return
+
+    Returns:
+        Page images in document order
+    """
+    if isinstance(source, (list, tuple)):
+        pages = []
+        for item in source:
+            pages.extend(load_pages(item, dpi, max_pages - len(pages)))
+            if len(pages) >= max_pages:
+                break
+        return pages[:max_pages]
+    if isinstance(source, Image.Image):
+        return [source]
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            data = f.read()
+    elif isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    elif hasattr(source, "getvalue"):
+        data = source.getvalue()
+    elif hasattr(source, "read"):
+        data = source.read()
+    else:
+        raise TypeError(f"Unsupported transcript source: {type(source).__name__}")
+
+    if data[:5] == b"%PDF-":
+        return render_pdf(data, dpi, max_pages)
+    image = Image.open(io.BytesIO(data))
+    # 多帧TIFF等格式按页展开
+    frames = []
+    for index in range(min(getattr(image, "n_frames", 1), max_pages)):
+        image.seek(index)
+        frames.append(image.copy())
+    return frames
+
+
+def render_pdf(data: bytes, dpi: int = RENDER_DPI, max_pages: int = MAX_PAGES) -> List[Image.Image]:
+    """
+    Render the pages of a PDF with PyMuPDF.
+
+    Args:
+        data: PDF file content
+        dpi: Render resolution
+        max_pages: Maximum number of pages to render
+
+    Returns:
+        One RGB image per page
+    """
+    import fitz  # 延迟导入，只有上传PDF时才需要PyMuPDF
+
+    pages = []
+    with fitz.open(stream=data, filetype="pdf") as document:
+        for page in document.pages(0, min(document.page_count, max_pages)):
+            pixmap = page.get_pixmap(dpi=dpi, alpha=False)
+            pages.append(Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples))
+    return pages
+
+
+def parse_page_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the JSON object returned for one page, tolerating Markdown code fences and extra text.
+
+    Returns:
+        The parsed object, or None when the response contains no valid JSON object
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        result = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip().lower() in _EMPTY_VALUES)
+
+
+def _norm(value: Any) -> str:
+    return "" if _is_empty(value) else re.sub(r"[\s\-_]+", "", str(value).lower())
+
+
+def _course_key(course: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    Identity of a course row: code (or name when there is no code), term and grade.
+
+    Rows repeated on overlapping screenshots or on a page header collapse into one,
+    while a retaken course (different term or grade) is kept as a separate row.
+    """
+    return (_norm(course.get("code")) or _norm(course.get("name")),
+            _norm(course.get("term")), _norm(course.get("grade")))
+
+
+def merge_pages(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-page extraction results into one transcript.
+
+    Student fields take the first value found; the GPA takes the last one, since the
+    cumulative GPA is normally printed at the end. Course rows are deduplicated and
+    missing fields of a repeated row are filled from its later occurrences.
+
+    Args:
+        pages: Parsed page results in document order
+
+    Returns:
+        Merged transcript dict with the PAGE_FIELDS, "courses" and "gpa"
+    """
+    merged: Dict[str, Any] = {field: None for field in PAGE_FIELDS}
+    merged["courses"] = []
+    merged["gpa"] = None
+    seen: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    for page in pages:
+        for field in PAGE_FIELDS:
+            if _is_empty(merged[field]) and not _is_empty(page.get(field)):
+                merged[field] = page[field]
+        if not _is_empty(page.get("gpa")):
+            merged["gpa"] = page["gpa"]
+
+        courses = page.get("courses")
+        for course in courses if isinstance(courses, list) else []:
+            if not isinstance(course, dict):
+                continue
+            key = _course_key(course)
+            if not key[0]:
+                continue
+            if key in seen:
+                existing = seen[key]
+                for field in COURSE_FIELDS:
+                    if _is_empty(existing.get(field)) and not _is_empty(course.get(field)):
+                        existing[field] = course[field]
+                continue
+            row = {field: course.get(field) for field in COURSE_FIELDS}
+            seen[key] = row
+            merged["courses"].append(row)
+    return merged
+
+
+def format_transcript(merged: Dict[str, Any], unparsed: Optional[List[Tuple[int, str]]] = None) -> str:
+    """
+    Render a merged transcript as readable text (same layout as the single-page output).
+
+    Args:
+        merged: Result of merge_pages
+        unparsed: (page number, raw model text) for pages whose response was not valid JSON
+
+    Returns:
+        Transcript text
+    """
+    labels = {"student_name": "Student Name", "student_id": "Student ID", "university": "University",
+              "program": "Program", "academic_year": "Academic Year"}
+    lines = [f"{labels[field]}: {merged[field]}" for field in PAGE_FIELDS if not _is_empty(merged.get(field))]
+
+    if merged.get("courses"):
+        lines += ["", "Courses:"]
+        for course in merged["courses"]:
+            title = " ".join(str(course[f]) for f in ("code", "name") if not _is_empty(course.get(f)))
+            line = f"- {title}"
+            if not _is_empty(course.get("grade")):
+                line += f": {course['grade']}"
+            if not _is_empty(course.get("score")):
+                line += f" ({course['score']})"
+            if not _is_empty(course.get("term")):
+                line += f" [{course['term']}]"
+            lines.append(line)
+
+    if not _is_empty(merged.get("gpa")):
+        lines += ["", f"Current GPA: {merged['gpa']}"]
+
+    for page_number, text in unparsed or []:
+        lines += ["", f"Page {page_number} (unstructured):", text.strip()]
+    return "\n".join(lines)
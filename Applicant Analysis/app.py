@@ -1,6 +1,5 @@
 import streamlit as st
 import os
-from PIL import Image
 import io
 from datetime import datetime
 import uuid
@@ -11,9 +10,10 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 # Import custom modules
 from agents.transcript_analyzer import TranscriptAnalyzer
+from agents.transcript_cache import TranscriptCache
 from agents.competitiveness_analyst import CompetitivenessAnalyst
 from agents.consulting_assistant import ConsultingAssistant
-from agents.serper_client import SerperClient
+from agents.serper_client import get_serper_client
 from config.prompts import load_prompts, save_prompts
 
 # 导入LangSmith追踪功能
@@ -62,8 +62,14 @@ if "consultant_model" not in st.session_state:
     st.session_state.consultant_model = "qwen/qwen-max"
 if "show_recommendations" not in st.session_state:
     st.session_state.show_recommendations = False
-if "transcript_image" not in st.session_state:
-    st.session_state.transcript_image = None
+if "transcript_files" not in st.session_state:
+    st.session_state.transcript_files = None
+if "program_search_report" not in st.session_state:
+    st.session_state.program_search_report = None
+if "transcript_cache_status" not in st.session_state:
+    st.session_state.transcript_cache_status = None
+if "refresh_transcript" not in st.session_state:
+    st.session_state.refresh_transcript = False
 if "university" not in st.session_state:
     st.session_state.university = ""
 if "major" not in st.session_state:
@@ -90,8 +96,11 @@ def check_api_keys():
 # Asynchronously initialize the Serper client
 async def init_serper():
     """Initialize the Serper client asynchronously."""
-    serper_client = SerperClient()
+    # 使用共享的客户端，初始化时建立的MCP会话会被之后的搜索复用
+    serper_client = get_serper_client()
     result = await serper_client.initialize()
+    if not result:
+        st.error(f"Error initializing Serper MCP client: {serper_client.last_error}")
     st.session_state.serper_initialized = result
     return result
 
@@ -215,14 +224,22 @@ def main():
             st.session_state.predicted_degree = predicted_degree
             
             # Transcript upload (可选)
-            transcript_file = st.file_uploader(
-                "Upload Your Transcript (Optional, Image format only)",
-                type=["jpg", "jpeg", "png"]
+            transcript_files = st.file_uploader(
+                "Upload Your Transcript (Optional, PDF or one image per page)",
+                type=["pdf", "jpg", "jpeg", "png"],
+                accept_multiple_files=True
             )
             
-            if transcript_file is not None:
-                # 保存图片到会话状态但不显示
-                st.session_state.transcript_image = Image.open(transcript_file)
+            if transcript_files:
+                # 保存文件内容到会话状态但不显示，分析时再渲染PDF页面
+                st.session_state.transcript_files = [f.getvalue() for f in transcript_files]
+            
+            # 同一成绩单的识别结果会被缓存，重新生成报告时不再调用视觉模型
+            refresh_transcript = st.checkbox(
+                "Re-extract transcript (ignore cached result)",
+                value=False,
+                help="Transcript extraction results are cached by page content. Check this to send the pages to the vision model again."
+            )
             
             # 添加个性化需求输入框
             custom_requirements = st.text_area(
@@ -250,12 +267,13 @@ def main():
                         university = st.session_state.university
                         major = st.session_state.major
                         predicted_degree = st.session_state.predicted_degree
+                        st.session_state.refresh_transcript = refresh_transcript
                         
                         # 生成一个会话ID，用于LangSmith追踪
                         session_id = str(uuid.uuid4())
                         
                         # 设置进度状态 - 检查是否需要处理成绩单
-                        if st.session_state.transcript_image is not None:
+                        if st.session_state.transcript_files is not None:
                             st.session_state.analysis_status = "transcript"
                         else:
                             # 如果没有成绩单，直接进入竞争力分析
@@ -271,8 +289,12 @@ def main():
                 with st.spinner("Analyzing transcript with Qwen 2.5 VL via OpenRouter..."):
                     # Process the transcript with AI
                     transcript_analyzer = TranscriptAnalyzer()
-                    transcript_content = transcript_analyzer.extract_transcript_data(st.session_state.transcript_image)
+                    transcript_content = transcript_analyzer.extract_transcript_data(
+                        st.session_state.transcript_files,
+                        force_refresh=st.session_state.refresh_transcript
+                    )
                     st.session_state.transcript_content = transcript_content
+                    st.session_state.transcript_cache_status = transcript_analyzer.cache_status
                 
                 # 更新状态并重新运行
                 st.session_state.analysis_status = "competitiveness"
@@ -313,6 +335,18 @@ def main():
         else:
             # 只有在成绩单存在时才显示成绩单数据
             if st.session_state.transcript_content != "No transcript provided.":
+                cache_status = st.session_state.transcript_cache_status
+                if cache_status and cache_status.get("mock"):
+                    st.caption("⚠️ Transcript extraction failed; the transcript data below is sample data, not the uploaded transcript")
+                elif cache_status and cache_status.get("failed"):
+                    st.caption(f"⚠️ {cache_status['failed']} of {cache_status['pages']} transcript pages could not be extracted")
+                elif cache_status and cache_status["pages"]:
+                    if cache_status["cached"] == cache_status["pages"]:
+                        st.caption(f"⚡ Transcript loaded from cache ({cache_status['pages']} page(s)), no vision model call")
+                    elif cache_status["cached"]:
+                        st.caption(f"⚡ {cache_status['cached']} of {cache_status['pages']} transcript pages loaded from cache")
+                    else:
+                        st.caption(f"Transcript extracted by the vision model ({cache_status['pages']} page(s)), result cached")
                 with st.expander("Transcript Data", expanded=False):
                     st.text_area("Transcript Content", st.session_state.transcript_content, height=200, disabled=True)
             
@@ -337,7 +371,9 @@ def main():
                     st.session_state.competitiveness_report = None
                     st.session_state.project_recommendations = None
                     st.session_state.transcript_content = None
-                    st.session_state.transcript_image = None
+                    st.session_state.transcript_files = None
+                    st.session_state.transcript_cache_status = None
+                    st.session_state.program_search_report = None
                     st.session_state.show_recommendations = False
                     st.session_state.custom_requirements = ""
                     st.session_state.analysis_status = None
@@ -374,11 +410,17 @@ def main():
                                     custom_requirements=custom_requirements
                                 )
                             
+                            st.session_state.program_search_report = consultant.search_report
+                            
                             # 重新加载页面以显示结果
                             st.rerun()
             
             # 如果已经生成了项目推荐，则显示
             if st.session_state.project_recommendations is not None:
+                search_report = st.session_state.program_search_report
+                if search_report and search_report["queries"]:
+                    st.caption(f"🔎 {search_report['queries']} program searches "
+                               f"({search_report['cached']} from cache), {search_report['programs']} unique programs found")
                 with st.expander("UCL Program Recommendations", expanded=True):
                     st.markdown(st.session_state.project_recommendations)
                     
@@ -515,9 +557,22 @@ def main():
         # Display Serper client status
         if st.session_state.serper_initialized:
             st.success("✅ Serper 客户端已成功初始化")
+            serper_stats = get_serper_client().stats
+            st.info(f"MCP会话保持连接并被所有搜索复用：已连接 {serper_stats['connects']} 次，"
+                    f"工具调用 {serper_stats['calls']} 次，断线重连 {serper_stats['reconnects']} 次")
         else:
             st.warning("⚠️ Serper 客户端未初始化。点击上方按钮进行初始化。")
         
+        # 成绩单识别结果缓存
+        st.subheader("Transcript Cache")
+        transcript_cache = TranscriptCache()
+        cache_stats = transcript_cache.stats()
+        st.info(f"{cache_stats['entries']} 页成绩单的识别结果已缓存（{cache_stats['size_bytes'] / 1024:.1f} KB），"
+                f"相同页面再次分析时直接使用缓存，不调用视觉模型")
+        if st.button("清空成绩单缓存", key="clear_transcript_cache"):
+            transcript_cache.clear()
+            st.success("成绩单缓存已清空")
+        
         # Add some help text
         st.markdown("""
         ### API 密钥配置
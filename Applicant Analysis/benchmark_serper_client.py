@@ -0,0 +1,172 @@
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, List
+
+from agents.serper_client import SerperClient, REQUEST_TIMEOUT
+from agents.program_search import TTLCache, find_programs, rank_programs, parse_program
+from mock_mcp_server import MockMCPServer
+
+QUERIES = [
+    "UCL postgraduate programs Computer Science", "UCL postgraduate programs Data Science",
+    "UCL postgraduate programs Machine Learning", "UCL postgraduate programs Statistics",
+    "UCL postgraduate programs Software Engineering", "UCL postgraduate programs Business Analytics",
+    "UCL postgraduate programs Information Science", "UCL postgraduate programs Mathematical Modelling",
+]
+
+# UCL项目页面摘要中的申请日期写法，以及期望解析出的 (开放日期, 截止日期)
+DATE_SNIPPETS = [
+    ("Applications open 14 October 2024. Applications close 31 March 2025.", "14 October 2024", "31 March 2025"),
+    ("Application dates. All applicants. Open: 14 October 2024 Close: 28 March 2025", "14 October 2024", "28 March 2025"),
+    ("Application deadline: 31 March 2025. Places are limited, apply early.", "See program page", "31 March 2025"),
+    ("Applications accepted. Applicants who require a visa: 14 Oct 2024 – 28 Feb 2025", "14 Oct 2024", "28 Feb 2025"),
+    ("Applications for 2025/26 entry open on 14 October 2024 and close on 2 May 2025.", "14 October 2024", "2 May 2025"),
+    ("Applications open October 14, 2024 and the deadline is March 31, 2025.", "October 14, 2024", "March 31, 2025"),
+    ("Applications open October 2024 and close in July.", "October 2024", "July"),
+    ("This programme is open to graduates of any discipline.", "See program page", "See program page"),
+]
+
+
+def check_date_parsing() -> List[str]:
+    """Parse DATE_SNIPPETS as UCL search results; returns a description of each mismatch."""
+    failures = []
+    for snippet, expected_open, expected_close in DATE_SNIPPETS:
+        program = parse_program({
+            "title": "Computer Science MSc | UCL Graduate Prospective Students",
+            "link": "https://www.ucl.ac.uk/prospective-students/graduate/taught-degrees/computer-science-msc",
+            "snippet": snippet,
+        })
+        parsed = (program["application_open"], program["application_close"])
+        if parsed != (expected_open, expected_close):
+            failures.append(f"{snippet!r}: {parsed} != {(expected_open, expected_close)}")
+    return failures
+
+
+def _errors(results: List[Dict[str, Any]]) -> int:
+    return sum(1 for r in results if "error" in r)
+
+
+def run_per_query(url: str, queries: List[str]) -> List[Dict[str, Any]]:
+    """Previous behaviour: a new connection and MCP session for every query."""
+    results = []
+    for query in queries:
+        client = SerperClient(url=url)
+        results.append(client.run_async(client.search_web(query)))
+        client.close()
+    return results
+
+
+def run_sequential(client: SerperClient, queries: List[str]) -> List[Dict[str, Any]]:
+    """One persistent session, queries issued one after another."""
+    return [client.run_async(client.search_web(query)) for query in queries]
+
+
+def run_concurrent(client: SerperClient, queries: List[str]) -> List[Dict[str, Any]]:
+    """One persistent session, all queries in flight at once."""
+    async def search_all():
+        return await asyncio.gather(*(client.search_web(query) for query in queries))
+    return client.run_async(search_all())
+
+
+def run_reconnect(client: SerperClient, server: MockMCPServer, queries: List[str]) -> List[Dict[str, Any]]:
+    """Drop the connection halfway; the remaining queries must reconnect transparently."""
+    half = len(queries) // 2
+    results = run_sequential(client, queries[:half])
+    server.drop_connections()
+    return results + run_sequential(client, queries[half:])
+
+
+def run_timeout(client: SerperClient, queries: List[str]) -> List[Dict[str, Any]]:
+    """Calls slower than request_timeout: each must time out on its own without dropping the shared session."""
+    results = run_concurrent(client, queries)
+    # 超时的调用不应断开会话，之后的查询继续使用同一会话
+    client.request_timeout = REQUEST_TIMEOUT
+    return results + run_sequential(client, queries[:1])
+
+
+def run_program_search(client: SerperClient, keywords: List[str]) -> List[tuple]:
+    """Single combined query vs. concurrent fan-out, cold and warm cache."""
+    rows = []
+    started = time.perf_counter()
+    combined = client.run_async(client.search_web(f"UCL postgraduate programs {' '.join(keywords)}"))
+    rows.append(("combined", 1, 0, len(rank_programs([combined], keywords)), time.perf_counter() - started))
+
+    cache = TTLCache()
+    for label in ("fan-out", "fan-out+cache"):
+        started = time.perf_counter()
+        programs, report = find_programs(client, keywords, cache=cache)
+        rows.append((label, report["queries"], report["cached"], len(programs), time.perf_counter() - started))
+    return rows
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Compare per-query MCP sessions with the persistent SerperClient session")
+    parser.add_argument("--rounds", type=int, default=3, help="Times the query list is repeated")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock tool call latency in seconds")
+    parser.add_argument("--handshake-latency", type=float, default=0.3,
+                        help="Mock session setup latency in seconds (remote websocket + initialize)")
+    parser.add_argument("--keywords", nargs="+", default=["Computer Science", "Software Engineering", "Data Science"],
+                        help="Program keywords for the recommendation search comparison")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_arguments()
+    date_failures = check_date_parsing()
+    print(f"Application date parsing: {len(DATE_SNIPPETS) - len(date_failures)}/{len(DATE_SNIPPETS)} snippets")
+    for failure in date_failures:
+        print(f"  {failure}")
+
+    queries = QUERIES * args.rounds
+    server = MockMCPServer(latency=args.latency, handshake_latency=args.handshake_latency)
+    url = server.start()
+    print(f"Mock MCP server: {url}, call latency {args.latency}s, session setup {args.handshake_latency}s, "
+          f"{len(queries)} queries\n")
+
+    rows = []
+    for mode in ["per-query", "sequential", "concurrent", "reconnect", "timeout"]:
+        server.reset_stats()
+        client = SerperClient(url=url) if mode != "per-query" else None
+        if mode == "timeout":
+            client.run_async(client.initialize())
+            client.request_timeout = args.latency / 2
+        started = time.perf_counter()
+        if mode == "per-query":
+            results = run_per_query(url, queries)
+        elif mode == "sequential":
+            results = run_sequential(client, queries)
+        elif mode == "concurrent":
+            results = run_concurrent(client, queries)
+        elif mode == "reconnect":
+            results = run_reconnect(client, server, queries)
+        else:
+            results = run_timeout(client, queries)
+        wall = time.perf_counter() - started
+        reconnects = client.stats["reconnects"] if client else 0
+        if client:
+            client.close()
+        rows.append((mode, wall, wall / len(queries) * 1000, server.stats["initializes"],
+                     server.stats["max_in_flight"], reconnects, _errors(results)))
+
+    client = SerperClient(url=url)
+    client.run_async(client.initialize())
+    search_rows = run_program_search(client, args.keywords)
+    client.close()
+    server.stop()
+
+    print(f"{'mode':<12}{'seconds':>9}{'ms/query':>10}{'sessions':>10}{'max in flight':>15}{'reconnects':>12}{'errors':>8}")
+    for mode, wall, per_query, sessions, in_flight, reconnects, errors in rows:
+        print(f"{mode:<12}{wall:>9.2f}{per_query:>10.1f}{sessions:>10}{in_flight:>15}{reconnects:>12}{errors:>8}")
+
+    print(f"\nProgram search for {args.keywords}:")
+    print(f"{'search':<15}{'queries':>9}{'cached':>8}{'programs':>10}{'seconds':>9}")
+    for label, query_count, cached, programs, seconds in search_rows:
+        print(f"{label:<15}{query_count:>9}{cached:>8}{programs:>10}{seconds:>9.3f}")
+    if date_failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
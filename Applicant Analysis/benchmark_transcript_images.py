@@ -0,0 +1,303 @@
+import io
+import os
+import re
+import time
+import base64
+import random
+import argparse
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import requests
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from agents.image_preprocessor import (ImagePreprocessor, DEFAULT_MAX_PIXELS, VISION_PATCH_SIZE,
+                                      estimate_vision_tokens)
+
+COURSES = [
+    ("CSE101", "Introduction to Programming", "A", 90), ("CSE102", "Data Structures and Algorithms", "A-", 85),
+    ("MTH201", "Linear Algebra", "B+", 78), ("CSE201", "Database Systems", "A", 92),
+    ("CSE205", "Computer Networks", "B", 75), ("ENG101", "Academic English", "B+", 79),
+    ("MTH103", "Calculus II", "A-", 86), ("CSE210", "Operating Systems", "A", 91),
+    ("STA202", "Probability and Statistics", "B+", 80), ("CSE230", "Software Engineering", "A-", 87),
+    ("CSE301", "Machine Learning", "A", 93), ("CSE305", "Computer Graphics", "B", 74),
+]
+
+WORD_RE = re.compile(r"[A-Za-z0-9.\-/+]+")
+PAGE_COLOR = (250, 248, 242)
+INK_COLOR = (20, 20, 30)
+
+# 可读性检查中容易互相混淆的字符：每个单词与只差一个相似字符的候选词比较
+SIMILAR_CHARS = {
+    "0": "O86", "O": "0QD", "1": "l7I", "l": "1I", "I": "l1", "2": "Z7", "3": "85", "4": "A9", "5": "63S",
+    "6": "58b", "7": "1", "8": "3B06", "9": "4g", "A": "4R", "B": "8R", "C": "GO", "D": "O0", "E": "F",
+    "F": "E", "G": "C6", "S": "5", "Z": "2", "a": "oe", "b": "6h", "c": "e", "e": "c", "g": "9q", "h": "b",
+    "i": "jl", "m": "n", "n": "mr", "o": "a", "r": "n", "t": "f", "u": "v", "v": "u", "+": "-", "-": "+",
+    ".": ",",
+}
+
+# 可读性检查的像素上限（以视觉token数表示），16384为Qwen2.5-VL处理器的默认上限
+LEGIBILITY_PATCHES = [640, 1280, 2560, 5120, 16384]
+
+
+def render_transcript(seed: int) -> Tuple[Image.Image, List[str], List[Tuple[str, Tuple[float, float], Any]]]:
+    """Render a transcript page; returns the page, the ground-truth words and each word's position and font."""
+    rng = random.Random(seed)
+    page = Image.new("RGB", (2480, 3300), PAGE_COLOR)
+    draw = ImageDraw.Draw(page)
+    title_font = ImageFont.load_default(size=72)
+    font = ImageFont.load_default(size=44)
+    lines = [
+        ("Xi'an Jiaotong-Liverpool University", title_font),
+        ("Official Academic Transcript", font),
+        (f"Student Name: Zhang Wei    Student ID: 2022XJU{rng.randint(100, 999)}", font),
+        ("Program: BSc Computer Science    Academic Year: 2023-2024", font),
+        ("", font),
+        ("Code      Course                                   Grade   Mark", font),
+    ]
+    courses = rng.sample(COURSES, 10)
+    lines += [(f"{code:<10}{name:<41}{grade:<8}{mark}", font) for code, name, grade, mark in courses]
+    lines += [("", font), (f"Current GPA: {rng.uniform(3.2, 3.9):.2f}/4.0", font)]
+
+    y = 180
+    words = []
+    for text, line_font in lines:
+        draw.text((160, y), text, fill=INK_COLOR, font=line_font)
+        for match in WORD_RE.finditer(text):
+            words.append((match.group(0), (160 + draw.textlength(text[:match.start()], font=line_font), y), line_font))
+        y += 130 if line_font is title_font else 95
+    draw.line((160, 700, 2320, 700), fill=(40, 40, 40), width=4)
+    # 彩色的学校印章
+    draw.ellipse((1900, 2600, 2250, 2950), outline=(180, 30, 40), width=10)
+
+    return page, [word for word, _, _ in words], words
+
+
+def phone_photo(page: Image.Image, angle: float, seed: int, size: Tuple[int, int] = (3024, 4032)) -> Image.Image:
+    """Place the page on a desk at a slight angle, with uneven lighting and sensor noise (12 MP)."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    yy, xx = np.mgrid[0:height, 0:width]
+    desk = np.stack([120 + 30 * xx / width, 90 + 20 * yy / height, 60 + 10 * xx / width], axis=-1)
+    photo = Image.fromarray(desk.astype(np.uint8))
+    rotated = page.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=(0, 0, 0))
+    mask = page.convert("L").point(lambda _: 255).rotate(angle, expand=True)
+    photo.paste(rotated, ((width - rotated.width) // 2, (height - rotated.height) // 2), mask)
+
+    pixels = np.asarray(photo, dtype=np.float32)
+    light = 0.85 + 0.15 * (1 - ((xx / width - 0.3) ** 2 + (yy / height - 0.3) ** 2))
+    pixels = pixels * light[..., None] + rng.normal(0, 4, pixels.shape)
+    photo = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).filter(ImageFilter.GaussianBlur(0.8))
+
+    # 手机相机保存的高质量JPEG
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=92)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+def legacy_encode(image: Image.Image) -> Dict[str, Any]:
+    """Original TranscriptAnalyzer.encode_image: full resolution JPEG at the default quality."""
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    return {"base64": encoded, "mime_type": "image/jpeg", "bytes": buffer.tell(), "size": image.size,
+            "vision_tokens": estimate_vision_tokens(image.size),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+
+def vision_recall(prepared: Dict[str, Any], truth: List[str], api_key: str, model: str) -> Tuple[float, float]:
+    """Ask the vision model to transcribe the image; returns (word recall, request seconds)."""
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": [
+            {"type": "text", "text": "Transcribe all text in this transcript image exactly, line by line."},
+            {"type": "image_url", "image_url": {"url": f"data:{prepared['mime_type']};base64,{prepared['base64']}"}},
+        ]}],
+        "max_tokens": 2000,
+    }
+    start = time.perf_counter()
+    response = requests.post("https://openrouter.ai/api/v1/chat/completions",
+                             headers={"Authorization": f"Bearer {api_key}"}, json=payload, timeout=300)
+    seconds = time.perf_counter() - start
+    response.raise_for_status()
+    text = response.json()["choices"][0]["message"]["content"]
+    found = set(WORD_RE.findall(text))
+    return sum(1 for w in truth if w in found) / len(truth), seconds
+
+
+def confusables(word: str) -> List[str]:
+    """Words that differ from the given one by a single look-alike character (85/86, B+/B-, A/A-)."""
+    variants = set()
+    for i, char in enumerate(word):
+        for alternative in SIMILAR_CHARS.get(char, ""):
+            variants.add(word[:i] + alternative + word[i + 1:])
+        if char in "+-":
+            variants.add(word[:i] + word[i + 1:])
+    if word[-1] in "AB":
+        variants |= {word + "+", word + "-"}
+    variants.discard(word)
+    return sorted(variants)
+
+
+def _correlation(a: np.ndarray, b: np.ndarray) -> float:
+    a, b = a - a.mean(), b - b.mean()
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-6))
+
+
+def legibility(page: Image.Image, words: List[Tuple[str, Tuple[float, float], Any]], max_pixels: int) -> Tuple[float, Dict[str, Any]]:
+    """
+    Offline legibility of a page at a pixel cap: the share of words still distinguishable from look-alikes.
+
+    Each word is cut from the decoded payload and compared (normalized correlation) with the
+    word and its confusables, rendered in the same font and downscaled by the same factor; the
+    word counts as read when the true word matches best. Templates are tried at sub-pixel offsets
+    so resampling phase does not count against legibility. This is a lower bound on what a
+    template OCR can read, not a vision model's accuracy, but it shows when glyph detail is lost.
+
+    Args:
+        page: Digital transcript page (no crop or skew, so word positions scale directly)
+        words: Word positions from render_transcript
+        max_pixels: Pixel cap passed to ImagePreprocessor
+
+    Returns:
+        (share of words read, ImagePreprocessor.prepare report)
+    """
+    prepared = ImagePreprocessor(max_pixels=max_pixels, crop=False, deskew=False).prepare(page)
+    image = Image.open(io.BytesIO(base64.b64decode(prepared["base64"]))).convert("L")
+    scale_x, scale_y = image.width / page.width, image.height / page.height
+    # 模板与成绩单使用相同的底色和文字颜色（灰度）
+    background, ink = (Image.new("RGB", (1, 1), color).convert("L").getpixel((0, 0)) for color in (PAGE_COLOR, INK_COLOR))
+    probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+    # 全分辨率下对应缩小后半个像素的偏移
+    step = max(1, int(0.5 / scale_x))
+    offsets = [(dx, dy) for dx in (-step, 0, step) for dy in (-step, 0, step)]
+
+    read = 0
+    for word, (x, y), font in words:
+        candidates = [word] + confusables(word)
+        boxes = [probe.textbbox((x, y), candidate, font=font) for candidate in candidates]
+        left, top = min(b[0] for b in boxes) - 6, min(b[1] for b in boxes) - 6
+        right, bottom = max(b[2] for b in boxes) + 6, max(b[3] for b in boxes) + 6
+        width, height = max(1, round((right - left) * scale_x)), max(1, round((bottom - top) * scale_y))
+        origin = (round(left * scale_x), round(top * scale_y))
+        crop = np.asarray(image.crop((*origin, origin[0] + width, origin[1] + height)), dtype=np.float32).ravel()
+
+        def score(candidate: str) -> float:
+            best = -1.0
+            for dx, dy in offsets:
+                template = Image.new("L", (int(right - left), int(bottom - top)), background)
+                ImageDraw.Draw(template).text((x - left + dx, y - top + dy), candidate, fill=ink, font=font)
+                template = np.asarray(template.resize((width, height), Image.LANCZOS), dtype=np.float32).ravel()
+                best = max(best, _correlation(crop, template))
+            return best
+
+        scores = [score(candidate) for candidate in candidates]
+        read += int(np.argmax(scores) == 0)
+    return read / len(words), prepared
+
+
+def run_legibility(pages: int, seed: int, patch_counts: List[int]) -> List[Tuple[int, float, Dict[str, Any]]]:
+    """Legibility of digital transcript pages at each pixel cap; returns (patches, mean share read, sample report)."""
+    rendered = [render_transcript(seed + i) for i in range(pages)]
+    rows = []
+    for patches in patch_counts:
+        results = [legibility(page, words, patches * VISION_PATCH_SIZE ** 2) for page, _, words in rendered]
+        rows.append((patches, float(np.mean([share for share, _ in results])), results[0][1]))
+    return rows
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Compare transcript image payload size and latency before/after preprocessing")
+    parser.add_argument("--images", type=int, default=6,
+                        help="Number of synthetic transcripts (alternating phone photos and digital exports)")
+    parser.add_argument("--max-angle", type=float, default=4.0, help="Maximum page rotation in the photos (degrees)")
+    parser.add_argument("--uplink-mbps", type=float, default=10.0, help="Uplink bandwidth used to estimate upload time")
+    parser.add_argument("--api-key", default=os.environ.get("OPENROUTER_API_KEY"),
+                        help="OpenRouter API key; when set, compares vision model word recall on both payloads")
+    parser.add_argument("--model", default="qwen/qwen2.5-vl-72b-instruct", help="Vision model for the recall check")
+    parser.add_argument("--legibility-pages", type=int, default=2,
+                        help="Digital pages used for the offline legibility check at each pixel cap (0 skips it)")
+    parser.add_argument("--patches", type=int, nargs="+", default=LEGIBILITY_PATCHES,
+                        help="Pixel caps for the legibility check, in 28x28 vision patches")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_arguments()
+    rng = random.Random(args.seed)
+    preprocessor = ImagePreprocessor()
+    rows = []
+    for i in range(args.images):
+        page, truth, _ = render_transcript(args.seed + i)
+        if i % 2 == 0:
+            angle = round(rng.uniform(-args.max_angle, args.max_angle), 1)
+            image, source = phone_photo(page, angle, args.seed + i), "photo"
+        else:
+            # 电子版成绩单的截图/导出图片
+            angle, image, source = 0.0, page, "digital"
+        image.load()
+        legacy = legacy_encode(image)
+        prepared = preprocessor.prepare(image)
+        row = {"source": source, "angle": angle, "legacy": legacy, "prepared": prepared}
+        if args.api_key:
+            row["legacy_recall"], row["legacy_api_s"] = vision_recall(legacy, truth, args.api_key, args.model)
+            row["prepared_recall"], row["prepared_api_s"] = vision_recall(prepared, truth, args.api_key, args.model)
+        rows.append(row)
+
+    def upload_seconds(result):
+        return len(result["base64"]) * 8 / (args.uplink_mbps * 1e6)
+
+    if rows:
+        print(f"{'#':>2} {'source':>8} {'skew':>6} {'detected':>9} {'legacy KB':>10} {'new KB':>8} {'format':>11} {'size':>11}"
+              f" {'tokens':>14} {'encode ms':>14} {'upload s':>12}")
+        for i, row in enumerate(rows):
+            legacy, prepared = row["legacy"], row["prepared"]
+            size = f"{prepared['size'][0]}x{prepared['size'][1]}"
+            print(f"{i:>2} {row['source']:>8} {row['angle']:>6.1f} {-prepared['skew_angle']:>9.2f} {legacy['bytes'] / 1024:>10.0f}"
+                  f" {prepared['bytes'] / 1024:>8.0f} {prepared['mime_type']:>11} {size:>11}"
+                  f" {legacy['vision_tokens']:>6} -> {prepared['vision_tokens']:<5}"
+                  f" {legacy['elapsed_ms']:>5.0f} -> {prepared['elapsed_ms']:<5.0f}"
+                  f" {upload_seconds(legacy):>4.1f} -> {upload_seconds(prepared):<4.2f}")
+            if args.api_key:
+                print(f"   word recall {row['legacy_recall']:.1%} -> {row['prepared_recall']:.1%}, "
+                      f"API time {row['legacy_api_s']:.1f}s -> {row['prepared_api_s']:.1f}s")
+
+        legacy_total = sum(r["legacy"]["bytes"] for r in rows)
+        prepared_total = sum(r["prepared"]["bytes"] for r in rows)
+        legacy_tokens = sum(r["legacy"]["vision_tokens"] for r in rows)
+        prepared_tokens = sum(r["prepared"]["vision_tokens"] for r in rows)
+        print(f"\nPayload: {legacy_total / 1024:.0f} KB -> {prepared_total / 1024:.0f} KB "
+              f"({prepared_total / legacy_total:.1%}), vision tokens: {legacy_tokens} -> {prepared_tokens} "
+              f"({prepared_tokens / legacy_tokens:.1%})")
+        if not args.api_key:
+            print("Set OPENROUTER_API_KEY (or --api-key) to compare vision model word recall on both payloads")
+
+    if args.legibility_pages <= 0:
+        return
+    default_patches = DEFAULT_MAX_PIXELS // VISION_PATCH_SIZE ** 2
+    patch_counts = sorted(set(args.patches) | {default_patches})
+    rows = run_legibility(args.legibility_pages, args.seed, patch_counts)
+    print(f"\nOffline legibility ({args.legibility_pages} digital pages, words distinguishable from look-alikes):")
+    print(f"{'patches':>8} {'megapixels':>11} {'size':>11} {'KB':>6} {'words read':>11}")
+    for patches, share, prepared in rows:
+        size = f"{prepared['size'][0]}x{prepared['size'][1]}"
+        marker = "  <- DEFAULT_MAX_PIXELS" if patches == default_patches else ""
+        print(f"{patches:>8} {patches * VISION_PATCH_SIZE ** 2 / 1e6:>11.2f} {size:>11} {prepared['bytes'] / 1024:>6.0f}"
+              f" {share:>11.1%}{marker}")
+    # 最高上限下的识别率作为基准，默认上限不能比它差
+    baseline = rows[-1][1]
+    smallest = next(patches for patches, share, _ in rows if share >= baseline - 0.005)
+    default_share = next(share for patches, share, _ in rows if patches == default_patches)
+    print(f"Smallest cap matching the {rows[-1][0]}-patch baseline: {smallest} patches")
+    if default_share < baseline - 0.005:
+        print(f"DEFAULT_MAX_PIXELS ({default_patches} patches) loses words: {default_share:.1%} vs {baseline:.1%}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
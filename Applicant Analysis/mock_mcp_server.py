@@ -0,0 +1,238 @@
+import json
+import asyncio
+import argparse
+import threading
+from typing import Dict, Any, List, Optional
+
+from aiohttp import web, WSMsgType
+
+# 模拟搜索结果使用的UCL项目目录：查询词与项目名或学院名匹配的项目会被返回，
+# 不同查询的结果会有重叠，便于测试按URL去重
+PROGRAM_CATALOG = [
+    ("Department of Computer Science", "MSc Computer Science", "computer-science-msc"),
+    ("Department of Computer Science", "MSc Data Science and Machine Learning", "data-science-machine-learning-msc"),
+    ("Department of Computer Science", "MSc Software Systems Engineering", "software-systems-engineering-msc"),
+    ("Department of Computer Science", "MSc Machine Learning", "machine-learning-msc"),
+    ("Department of Computer Science", "MSc Artificial Intelligence for Sustainable Development",
+     "artificial-intelligence-sustainable-development-msc"),
+    ("Department of Computer Science", "MSc Web Technologies and Information Architecture",
+     "web-technologies-information-architecture-msc"),
+    ("Department of Statistical Science", "MSc Statistics", "statistics-msc"),
+    ("Department of Statistical Science", "MSc Data Science", "data-science-msc"),
+    ("Department of Electronic and Electrical Engineering", "MSc Integrated Machine Learning Systems",
+     "integrated-machine-learning-systems-msc"),
+    ("Department of Information Studies", "MSc Information Science", "information-science-msc"),
+    ("School of Management", "MSc Business Analytics", "business-analytics-msc"),
+    ("Department of Mathematics", "MSc Mathematical Modelling", "mathematical-modelling-msc"),
+]
+PROGRAM_URL = "https://www.ucl.ac.uk/prospective-students/graduate/taught-degrees/{slug}"
+
+_STOP_WORDS = {"ucl", "university", "college", "london", "postgraduate", "programs", "programmes", "program",
+               "programme", "msc", "ma", "department", "of", "and", "the", "for", "in", "school", "taught", "degree"}
+
+TOOLS = [{
+    "name": "web-search",
+    "description": "Search the web (mock Serper search over a fixed UCL program catalog)",
+    "inputSchema": {
+        "type": "object",
+        "properties": {"query": {"type": "string"}, "numResults": {"type": "integer"}},
+        "required": ["query"],
+    },
+}]
+
+
+def search_catalog(query: str, num_results: int = 5) -> Dict[str, Any]:
+    """Match the query against the program catalog and return Serper-style results (more matching words rank higher)."""
+    words = {w for w in query.lower().replace(",", " ").split() if w not in _STOP_WORDS}
+    scored = []
+    for index, (department, name, slug) in enumerate(PROGRAM_CATALOG):
+        text = f"{department} {name}".lower()
+        score = sum(1 for w in words if w in text)
+        if score:
+            scored.append((-score, index, department, name, slug))
+    organic = [{
+        "title": f"{name} | UCL Graduate Prospective Students",
+        "link": PROGRAM_URL.format(slug=slug),
+        "snippet": f"{name} at UCL {department}. Applications open October and close in July.",
+        "position": position + 1,
+    } for position, (_, _, department, name, slug) in enumerate(sorted(scored)[:num_results])]
+    return {"searchParameters": {"q": query, "num": num_results}, "organic": organic}
+
+
+class MockMCPServer:
+    """
+    Local mock MCP server (websocket transport) for testing SerperClient offline:
+    session reuse, concurrent calls and reconnection.
+
+    Implements the MCP initialize, tools/list, tools/call (web-search) and ping methods.
+    Requests on one websocket are handled concurrently, so responses may arrive out of order.
+    """
+
+    def __init__(self, latency: float = 0.05, handshake_latency: float = 0.3):
+        """
+        Initialize the mock server.
+
+        Args:
+            latency: Delay of each tool call in seconds
+            handshake_latency: Delay of the initialize request (the cost of opening a remote session)
+        """
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.url: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sockets: List[web.WebSocketResponse] = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the statistics."""
+        self.stats = {"connections": 0, "initializes": 0, "calls": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def app(self) -> web.Application:
+        """Create the aiohttp application."""
+        app = web.Application()
+        app.router.add_get("/ws", self.handle_ws)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(protocols=("mcp",))
+        await ws.prepare(request)
+        self.stats["connections"] += 1
+        self._sockets.append(ws)
+        send_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(message: Dict[str, Any]):
+            reply = await self._dispatch(message)
+            if reply is not None and not ws.closed:
+                async with send_lock:
+                    await ws.send_str(json.dumps(reply))
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                # 每个请求单独处理，同一连接上的请求可以并发
+                task = asyncio.create_task(respond(json.loads(msg.data)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._sockets.remove(ws)
+        return ws
+
+    async def _dispatch(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Handle one JSON-RPC message; notifications return None."""
+        method, request_id = message.get("method"), message.get("id")
+        if request_id is None:
+            return None
+        params = message.get("params") or {}
+        if method == "initialize":
+            self.stats["initializes"] += 1
+            await asyncio.sleep(self.handshake_latency)
+            result = {"protocolVersion": params.get("protocolVersion", "2024-11-05"),
+                      "capabilities": {"tools": {"listChanged": False}},
+                      "serverInfo": {"name": "mock-serper", "version": "1.0.0"}}
+        elif method == "ping":
+            result = {}
+        elif method == "tools/list":
+            result = {"tools": TOOLS}
+        elif method == "tools/call":
+            self.stats["calls"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            try:
+                await asyncio.sleep(self.latency)
+            finally:
+                self.stats["in_flight"] -= 1
+            if params.get("name") != "web-search":
+                return {"jsonrpc": "2.0", "id": request_id,
+                        "error": {"code": -32602, "message": f"Unknown tool: {params.get('name')}"}}
+            arguments = params.get("arguments") or {}
+            results = search_catalog(arguments.get("query", ""), int(arguments.get("numResults", 5)))
+            result = {"content": [{"type": "text", "text": json.dumps(results)}], "isError": False}
+        else:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def drop_connections(self):
+        """Close all client connections (to test reconnection)."""
+        async def close_all():
+            for ws in list(self._sockets):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(close_all(), self._loop).result()
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start the server on a background thread.
+
+        Args:
+            host: Listen address
+            port: Port, 0 picks a free one
+
+        Returns:
+            Websocket URL (e.g. ws://127.0.0.1:12345/ws)
+        """
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app())
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, host, port)
+            self._loop.run_until_complete(site.start())
+            bound_host, bound_port = self._runner.addresses[0][:2]
+            self.url = f"ws://{bound_host}:{bound_port}/ws"
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="mock-mcp-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.url
+
+    def stop(self):
+        """Stop the background server."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Run a local mock Serper MCP server (websocket transport)')
+    parser.add_argument('--host', default='127.0.0.1', help='Listen address')
+    parser.add_argument('--port', type=int, default=8901, help='Listen port')
+    parser.add_argument('--latency', type=float, default=0.05, help='Delay of each tool call in seconds')
+    parser.add_argument('--handshake-latency', type=float, default=0.3, help='Delay of the initialize request in seconds')
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_arguments()
+    server = MockMCPServer(latency=args.latency, handshake_latency=args.handshake_latency)
+    print(f"Mock MCP server: ws://{args.host}:{args.port}/ws (use SerperClient(url=...))")
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
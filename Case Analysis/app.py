@@ -1,16 +1,12 @@
 import streamlit as st
-import os
 import json
-import tempfile
 import asyncio
-from pathlib import Path
 
 # Import your existing code modules
 from processor import SimpleProcessor
 from llm_processor import LLMProcessor
-from pdf_parser import PDFParser
-from pdf_offer_parser import PDFOfferParser
 from test_llm import enrich_school_rankings, calculate_student_tags
+from vision_ocr import VisionOCR
 
 # Set page config
 st.set_page_config(
@@ -30,13 +26,18 @@ Upload your documents to get started!
 # Initialize processors
 @st.cache_resource
 def initialize_processors():
-    processor = SimpleProcessor()
-    
     # Initialize LLM processor with API key from secrets
     api_key = st.secrets.get("OPENAI_API_KEY", None)
     api_base = st.secrets.get("OPENAI_API_BASE", None)
     model_name = st.secrets.get("OPENAI_MODEL_NAME", None)
     
+    # Scanned PDFs without a text layer are routed to a vision model when configured
+    try:
+        ocr = VisionOCR(api_key, api_base, st.secrets.get("VISION_MODEL_NAME", None))
+        processor = SimpleProcessor(ocr_handler=ocr.extract_text)
+    except ValueError:
+        processor = SimpleProcessor()
+    
     try:
         llm_processor = LLMProcessor(api_key, api_base, model_name)
         return processor, llm_processor
@@ -69,171 +70,299 @@ with st.sidebar:
     st.header("Settings")
     enable_school_ranking = st.checkbox("Enable School Ranking Enrichment", value=True)
     enable_student_tags = st.checkbox("Calculate Student Tags", value=True)
+    max_in_flight = st.slider("Max concurrent LLM calls", min_value=1, max_value=10, value=4)
+    force_refresh = st.checkbox("Ignore cached LLM results", value=False,
+                                help="Re-run the LLM even if this document was analyzed before")
+    stream_responses = st.checkbox("Stream LLM responses", value=True,
+                                   help="Show education, test scores and admissions as soon as the model writes them")
+    
+    # LLM cache statistics for this server process
+    if llm_processor is not None and llm_processor.cache is not None:
+        stats = llm_processor.cache_stats()
+        st.caption(
+            f"LLM cache: {stats['hits']} hits / {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%}), {stats['entries']} entries, "
+            f"{stats['size_bytes'] / 1024 / 1024:.1f} MB"
+        )
+
+def render_extraction_stats(result):
+    """Show how the PDF text was extracted (backend, per-page timings, scanned/OCR)."""
+    report = (result or {}).get("extraction")
+    if not report:
+        return
+    timings = report["page_timings_ms"]
+    details = [f"{report['pages']} pages via {report['backend']} in {report['total_ms']:.0f} ms"]
+    if timings:
+        slowest = max(range(len(timings)), key=timings.__getitem__)
+        details.append(f"slowest page {slowest + 1}: {timings[slowest]:.0f} ms")
+    if report["parallel"]:
+        details.append("page-parallel")
+    if report["scanned"]:
+        details.append("scanned, OCR" if report["ocr"] else "scanned, no OCR")
+    st.caption(" · ".join(details))
+
+def render_resume_analysis(resume_analysis, resume_result):
+    """Render the resume analysis section."""
+    if resume_analysis is None:
+        if resume_result and not resume_result["success"]:
+            st.error(f"Resume processing failed: {resume_result['error']}")
+        elif resume_result and resume_result.get("content"):
+            # Extraction only (no LLM available): show the text
+            st.text_area("Extracted Resume Text", resume_result["content"], height=300)
+            render_extraction_stats(resume_result)
+        return
+    if "error" in resume_analysis:
+        st.error(f"Resume analysis failed: {resume_analysis['error']}")
+    
+    # Create tabs for different sections
+    resume_tab1, resume_tab2, resume_tab3 = st.tabs(["Overview", "Extracted Text", "JSON Result"])
+    
+    with resume_tab1:
+        # Basic information
+        if "studentName" in resume_analysis:
+            st.write(f"**Student:** {resume_analysis['studentName']}")
+        
+        # Education
+        if "education" in resume_analysis:
+            education = resume_analysis["education"]
+            st.write("### Education")
+            st.write(f"**Institution:** {education.get('institution', 'N/A')}")
+            st.write(f"**Major:** {education.get('major', 'N/A')}")
+            st.write(f"**GPA:** {education.get('gpaOriginal', 'N/A')}")
+            st.write(f"**Institution Type:** {education.get('institutionType', 'N/A')}")
+        
+        # Test scores
+        if "testScores" in resume_analysis and resume_analysis["testScores"]:
+            st.write("### Test Scores")
+            for score in resume_analysis["testScores"]:
+                st.write(f"**{score.get('testName', 'N/A')}:** {score.get('testScore', 'N/A')}")
+                if "detailScores" in score and score["detailScores"]:
+                    for key, value in score["detailScores"].items():
+                        st.write(f"  - {key}: {value}")
+        
+        # Experiences
+        if "experiences" in resume_analysis and resume_analysis["experiences"]:
+            st.write("### Experiences")
+            for exp in resume_analysis["experiences"]:
+                st.write(f"**{exp.get('type', 'N/A')}:** {exp.get('description', 'N/A')}")
+                st.write(f"**Organization:** {exp.get('organization', 'N/A')}")
+                st.write(f"**Role:** {exp.get('role', 'N/A')}")
+                st.write(f"**Duration:** {exp.get('duration', 'N/A')}")
+                st.write(f"**Achievement:** {exp.get('achievement', 'N/A')}")
+                st.write("---")
+    
+    with resume_tab2:
+        if resume_result and resume_result.get("content"):
+            st.text_area("Extracted Resume Text", resume_result["content"], height=300)
+            render_extraction_stats(resume_result)
+        else:
+            st.info("No resume text extracted.")
+    
+    with resume_tab3:
+        st.json(resume_analysis)
+
+def render_partial_resume(partial):
+    """Render the resume fields the model has finished writing so far (no widgets, safe to redraw)."""
+    st.info("Analyzing resume...")
+    if partial.get("studentName"):
+        st.write(f"**Student:** {partial['studentName']}")
+    education = partial.get("education")
+    if isinstance(education, dict) and education:
+        st.write("### Education")
+        for label, key in [("Institution", "institution"), ("Major", "major"), ("GPA", "gpaOriginal")]:
+            if key in education:
+                st.write(f"**{label}:** {education[key]}")
+    scores = partial.get("testScores")
+    if isinstance(scores, list) and scores:
+        st.write("### Test Scores")
+        for score in scores:
+            if isinstance(score, dict) and "testName" in score:
+                st.write(f"**{score['testName']}:** {score.get('testScore', '...')}")
+
+def render_partial_offer(partial):
+    """Render the admissions the model has finished writing so far (no widgets, safe to redraw)."""
+    st.info("Analyzing offer letter...")
+    admissions = partial.get("admissions")
+    if isinstance(admissions, list):
+        for j, admission in enumerate(admissions):
+            if isinstance(admission, dict) and "school" in admission:
+                program = admission.get("program", "...")
+                st.write(f"**Admission {j+1}:** {admission['school']} - {program}")
+
+def render_offer_analysis(i, offer_analysis, offer_result):
+    """Render the analysis of one offer letter."""
+    if offer_analysis is None:
+        if offer_result and offer_result["success"] and offer_result.get("content"):
+            # Extraction only (no LLM available): show the text
+            st.text_area(f"Offer {i+1} Text", offer_result["content"], height=200)
+            render_extraction_stats(offer_result)
+            return
+        error = offer_result["error"] if offer_result else "No text extracted"
+        st.error(f"Offer {i+1} processing failed: {error}")
+        return
+    if "error" in offer_analysis:
+        st.error(f"Offer {i+1} analysis failed: {offer_analysis['error']}")
+    
+    if "admissions" in offer_analysis and offer_analysis["admissions"]:
+        for j, admission in enumerate(offer_analysis["admissions"]):
+            st.write(f"### Admission {j+1}")
+            st.write(f"**School:** {admission.get('school', 'N/A')}")
+            st.write(f"**Country:** {admission.get('country', 'N/A')}")
+            st.write(f"**Program:** {admission.get('program', 'N/A')}")
+            st.write(f"**Major Category:** {admission.get('majorCategory', 'N/A')}")
+            st.write(f"**Degree Type:** {admission.get('degreeType', 'N/A')}")
+            
+            # Ranking information
+            st.write("#### Ranking")
+            st.write(f"**Ranking Type:** {admission.get('rankingType', 'N/A')}")
+            st.write(f"**Ranking Value:** {admission.get('rankingValue', 'N/A')}")
+            st.write(f"**Ranking Tier:** {admission.get('rankingTier', 'N/A')}")
+            
+            # Enrollment and scholarship information
+            st.write("#### Enrollment & Scholarship")
+            st.write(f"**Enrollment Season:** {admission.get('enrollmentSeason', 'N/A')}")
+            
+            if admission.get('hasScholarship'):
+                st.write(f"**Scholarship Amount:** {admission.get('scholarshipAmount', 'N/A')}")
+                if admission.get('scholarshipNote'):
+                    st.write(f"**Scholarship Note:** {admission.get('scholarshipNote')}")
+            else:
+                st.write("**Scholarship:** None")
+            
+            st.write("---")
+    
+    # Add a section for raw text and JSON
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("#### Extracted Text")
+        if offer_result and offer_result.get("content"):
+            st.text_area(f"Offer {i+1} Text", offer_result["content"], height=200)
+            render_extraction_stats(offer_result)
+    
+    with col2:
+        st.write("#### JSON Result")
+        st.json(offer_analysis)
+
+async def analyze_uploads(resume_file, offer_files, max_in_flight, extraction_results, on_result,
+                          force_refresh=False, on_partial=None):
+    """
+    Extract text from all PDFs in worker threads and analyze them concurrently.
+    
+    Each document's LLM call starts as soon as its own extraction finishes, so
+    extraction of later offers overlaps with analysis of earlier ones.
+    Uploads are parsed straight from memory (``getvalue()`` returns the buffered
+    bytes without copying), and documents already in the extraction cache are
+    not parsed again.
+    Extraction results are stored in ``extraction_results`` as they complete.
+    When ``on_partial`` is given the LLM responses are streamed and partial
+    results are passed to it while each document is being analyzed.
+    Without an LLM processor the documents are only extracted, and ``on_result``
+    is called with ``None`` for each one as soon as its text is ready.
+    """
+    async def extract(key, upload):
+        result = await asyncio.to_thread(processor.process_resume, upload.getvalue(), upload.name)
+        extraction_results[key] = result
+        return result["content"] if result["success"] else None
+    
+    resume_text = extract("resume", resume_file) if resume_file is not None else None
+    offer_texts = [extract(("offer", i), offer_file) for i, offer_file in enumerate(offer_files)]
+    
+    if llm_processor is None:
+        async def extract_only(kind, index, text):
+            await text
+            on_result(kind, index, None)
+        
+        jobs = [extract_only("offer", i, text) for i, text in enumerate(offer_texts)]
+        if resume_text is not None:
+            jobs.append(extract_only("resume", 0, resume_text))
+        await asyncio.gather(*jobs)
+        return {"resume_analysis": None, "offer_analyses": [None] * len(offer_texts)}
+    
+    try:
+        combined_result = await llm_processor.process_documents(
+            resume_text,
+            offer_texts,
+            max_in_flight=max_in_flight,
+            on_result=on_result,
+            force_refresh=force_refresh,
+            on_partial=on_partial
+        )
+    finally:
+        # The HTTP session belongs to this run's event loop, close it before the loop ends
+        await llm_processor.aclose()
+    return combined_result
 
 # Main content area
 if process_button:
     if resume_file is None and not offer_files:
         st.error("Please upload at least one document to analyze.")
     else:
-        with st.spinner("Processing documents..."):
-            # Create a temporary directory to save uploaded files
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
-                # Process resume if uploaded
-                resume_result = None
-                resume_analysis = None
-                if resume_file is not None:
-                    # Save the uploaded resume to a temporary file
-                    resume_path = temp_path / "resume.pdf"
-                    with open(resume_path, "wb") as f:
-                        f.write(resume_file.getvalue())
-                    
-                    # Process the resume
-                    resume_result = processor.process_resume(str(resume_path))
-                    
-                    if resume_result["success"] and llm_processor is not None:
-                        # Analyze the resume with LLM
-                        resume_analysis = llm_processor.analyze_resume(resume_result["content"])
-                
-                # Process offer letters if uploaded
-                offer_results = []
-                offer_analyses = []
-                
-                for i, offer_file in enumerate(offer_files):
-                    # Save the uploaded offer letter to a temporary file
-                    offer_path = temp_path / f"offer_{i}.pdf"
-                    with open(offer_path, "wb") as f:
-                        f.write(offer_file.getvalue())
-                    
-                    # Process the offer letter
-                    offer_result = processor.process_resume(str(offer_path))
-                    offer_results.append(offer_result)
-                    
-                    if offer_result["success"] and llm_processor is not None:
-                        # Analyze the offer with LLM
-                        offer_analysis = llm_processor.analyze_offer(offer_result["content"])
-                        offer_analyses.append(offer_analysis)
-                
-                # Combine the results
-                combined_result = {
-                    "resume_analysis": resume_analysis,
-                    "offer_analyses": offer_analyses
-                }
-                
-                # Enrich school rankings if enabled
-                if enable_school_ranking and llm_processor is not None:
-                    combined_result = enrich_school_rankings(combined_result)
-                
-                # Calculate student tags if enabled
-                if enable_student_tags and llm_processor is not None and resume_analysis is not None:
-                    tags = calculate_student_tags(combined_result)
-                    combined_result["tags"] = tags
-        
-        # Display the results
         st.header("Analysis Results")
+        tags_placeholder = st.empty()
         
-        # Display student tags if available
-        if "tags" in combined_result and combined_result["tags"]:
-            st.success(f"Student Tags: {combined_result['tags']}")
-        
-        # Display resume results if available
-        if resume_analysis:
+        # Placeholders are laid out up front and filled in as each document finishes
+        resume_placeholder = None
+        if resume_file is not None:
             st.subheader("Resume Analysis")
-            
-            # Create tabs for different sections
-            resume_tab1, resume_tab2, resume_tab3 = st.tabs(["Overview", "Extracted Text", "JSON Result"])
-            
-            with resume_tab1:
-                # Basic information
-                if "studentName" in resume_analysis:
-                    st.write(f"**Student:** {resume_analysis['studentName']}")
-                
-                # Education
-                if "education" in resume_analysis:
-                    education = resume_analysis["education"]
-                    st.write("### Education")
-                    st.write(f"**Institution:** {education.get('institution', 'N/A')}")
-                    st.write(f"**Major:** {education.get('major', 'N/A')}")
-                    st.write(f"**GPA:** {education.get('gpaOriginal', 'N/A')}")
-                    st.write(f"**Institution Type:** {education.get('institutionType', 'N/A')}")
-                
-                # Test scores
-                if "testScores" in resume_analysis and resume_analysis["testScores"]:
-                    st.write("### Test Scores")
-                    for score in resume_analysis["testScores"]:
-                        st.write(f"**{score.get('testName', 'N/A')}:** {score.get('testScore', 'N/A')}")
-                        if "detailScores" in score and score["detailScores"]:
-                            for key, value in score["detailScores"].items():
-                                st.write(f"  - {key}: {value}")
-                
-                # Experiences
-                if "experiences" in resume_analysis and resume_analysis["experiences"]:
-                    st.write("### Experiences")
-                    for exp in resume_analysis["experiences"]:
-                        st.write(f"**{exp.get('type', 'N/A')}:** {exp.get('description', 'N/A')}")
-                        st.write(f"**Organization:** {exp.get('organization', 'N/A')}")
-                        st.write(f"**Role:** {exp.get('role', 'N/A')}")
-                        st.write(f"**Duration:** {exp.get('duration', 'N/A')}")
-                        st.write(f"**Achievement:** {exp.get('achievement', 'N/A')}")
-                        st.write("---")
-            
-            with resume_tab2:
-                if resume_result and "content" in resume_result:
-                    st.text_area("Extracted Resume Text", resume_result["content"], height=300)
-                else:
-                    st.info("No resume text extracted.")
-            
-            with resume_tab3:
-                st.json(resume_analysis)
+            resume_placeholder = st.empty()
+            resume_placeholder.info("Analyzing resume..." if llm_processor is not None else "Extracting resume text...")
         
-        # Display offer results if available
-        if offer_analyses:
+        offer_placeholders = []
+        if offer_files:
             st.subheader("Offer Letter Analysis")
-            
-            # Create tabs for each offer
-            offer_tabs = st.tabs([f"Offer {i+1}" for i in range(len(offer_analyses))])
-            
-            for i, (offer_tab, offer_analysis, offer_result) in enumerate(zip(offer_tabs, offer_analyses, offer_results)):
+            offer_tabs = st.tabs([f"Offer {i+1}" for i in range(len(offer_files))])
+            for offer_tab in offer_tabs:
                 with offer_tab:
-                    if "admissions" in offer_analysis and offer_analysis["admissions"]:
-                        for j, admission in enumerate(offer_analysis["admissions"]):
-                            st.write(f"### Admission {j+1}")
-                            st.write(f"**School:** {admission.get('school', 'N/A')}")
-                            st.write(f"**Country:** {admission.get('country', 'N/A')}")
-                            st.write(f"**Program:** {admission.get('program', 'N/A')}")
-                            st.write(f"**Major Category:** {admission.get('majorCategory', 'N/A')}")
-                            st.write(f"**Degree Type:** {admission.get('degreeType', 'N/A')}")
-                            
-                            # Ranking information
-                            st.write("#### Ranking")
-                            st.write(f"**Ranking Type:** {admission.get('rankingType', 'N/A')}")
-                            st.write(f"**Ranking Value:** {admission.get('rankingValue', 'N/A')}")
-                            st.write(f"**Ranking Tier:** {admission.get('rankingTier', 'N/A')}")
-                            
-                            # Enrollment and scholarship information
-                            st.write("#### Enrollment & Scholarship")
-                            st.write(f"**Enrollment Season:** {admission.get('enrollmentSeason', 'N/A')}")
-                            
-                            if admission.get('hasScholarship'):
-                                st.write(f"**Scholarship Amount:** {admission.get('scholarshipAmount', 'N/A')}")
-                                if admission.get('scholarshipNote'):
-                                    st.write(f"**Scholarship Note:** {admission.get('scholarshipNote')}")
-                            else:
-                                st.write("**Scholarship:** None")
-                            
-                            st.write("---")
-                    
-                    # Add a section for raw text and JSON
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write("#### Extracted Text")
-                        if "content" in offer_result:
-                            st.text_area(f"Offer {i+1} Text", offer_result["content"], height=200)
-                    
-                    with col2:
-                        st.write("#### JSON Result")
-                        st.json(offer_analysis)
+                    placeholder = st.empty()
+                    placeholder.info("Analyzing offer letter..." if llm_processor is not None else "Extracting offer text...")
+                    offer_placeholders.append(placeholder)
+        
+        extraction_results = {}
+        
+        def on_result(kind, index, analysis):
+            # Called on the script thread as soon as a document's analysis completes
+            if kind == "resume":
+                if resume_placeholder is None:
+                    return
+                with resume_placeholder.container():
+                    render_resume_analysis(analysis, extraction_results.get("resume"))
+            else:
+                if analysis is not None and enable_school_ranking:
+                    enrich_school_rankings({"offer_analyses": [analysis]})
+                with offer_placeholders[index].container():
+                    render_offer_analysis(index, analysis, extraction_results.get(("offer", index)))
+        
+        def on_partial(kind, index, partial):
+            # Redraws the placeholder with the fields completed so far; on_result replaces it at the end
+            if not isinstance(partial, dict):
+                return
+            if kind == "resume":
+                if resume_placeholder is None:
+                    return
+                with resume_placeholder.container():
+                    render_partial_resume(partial)
+            else:
+                with offer_placeholders[index].container():
+                    render_partial_offer(partial)
+        
+        with st.spinner("Processing documents..."):
+            combined_result = asyncio.run(
+                analyze_uploads(resume_file, offer_files or [], max_in_flight, extraction_results,
+                                on_result, force_refresh=force_refresh,
+                                on_partial=on_partial if stream_responses else None)
+            )
+        
+        resume_analysis = combined_result["resume_analysis"]
+        combined_result["offer_analyses"] = [a for a in combined_result["offer_analyses"] if a is not None]
+        
+        # Calculate student tags if enabled
+        if enable_student_tags and resume_analysis is not None:
+            tags = calculate_student_tags(combined_result)
+            combined_result["tags"] = tags
+        
+        # Display student tags if available
+        if "tags" in combined_result and combined_result["tags"]:
+            tags_placeholder.success(f"Student Tags: {combined_result['tags']}")
         
         # Download button for the combined results
         st.download_button(
@@ -243,6 +372,7 @@ if process_button:
             mime="application/json"
         )
 
+
 # Footer
 st.markdown("---")
 st.markdown("© 2025 Resume & Offer Analyzer - Built with Streamlit")
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import asyncio
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Set
+
+from processor import SimpleProcessor
+from llm_processor import LLMProcessor
+from test_llm import enrich_school_rankings, calculate_student_tags
+
+# 文件名包含以下关键词的PDF视为简历，其余PDF视为Offer
+RESUME_KEYWORDS = ("resume", "cv", "简历")
+
+# 进程池中每个子进程各自持有一个处理器
+_worker_processor: Optional[SimpleProcessor] = None
+
+
+def _init_worker():
+    global _worker_processor
+    _worker_processor = SimpleProcessor()
+
+
+def extract_pdf(file_path: str) -> Dict[str, Any]:
+    """
+    在子进程中提取PDF文本（与网页端一致，简历和Offer都使用简历解析器）
+
+    Args:
+        file_path: PDF文件路径
+
+    Returns:
+        SimpleProcessor.process_resume 的结果
+    """
+    if _worker_processor is None:
+        _init_worker()
+    try:
+        return _worker_processor.process_resume(file_path)
+    except Exception as e:
+        return {"success": False, "error": f"提取PDF时出错: {str(e)}", "content": None, "file_path": file_path}
+
+
+def is_resume_file(file_name: str, keywords=RESUME_KEYWORDS) -> bool:
+    """根据文件名判断是否为简历"""
+    name = file_name.lower()
+    return any(keyword in name for keyword in keywords)
+
+
+def discover_students(root_dir: str, keywords=RESUME_KEYWORDS) -> List[Dict[str, Any]]:
+    """
+    遍历目录树，每个直接包含PDF的目录视为一个学生
+
+    Args:
+        root_dir: 根目录
+        keywords: 识别简历文件名的关键词
+
+    Returns:
+        学生列表，每项包含 student_id（相对根目录的路径）、folder、resume、offers
+    """
+    students = []
+    for folder, dirs, files in os.walk(root_dir):
+        # 排序保证每次运行的顺序一致
+        dirs.sort()
+        pdf_files = sorted(f for f in files if f.lower().endswith('.pdf'))
+        if not pdf_files:
+            continue
+
+        resume = None
+        offers = []
+        for file_name in pdf_files:
+            if resume is None and is_resume_file(file_name, keywords):
+                resume = os.path.join(folder, file_name)
+            else:
+                offers.append(os.path.join(folder, file_name))
+
+        student_id = os.path.relpath(folder, root_dir).replace(os.sep, '/')
+        students.append({
+            "student_id": student_id,
+            "folder": folder,
+            "resume": resume,
+            "offers": offers
+        })
+    return students
+
+
+def load_checkpoint(output_path: str, retry_failed: bool = False) -> Set[str]:
+    """
+    从已有的JSONL输出中读取已完成的学生，用于断点续跑
+
+    Args:
+        output_path: JSONL输出路径
+        retry_failed: 为True时出错的学生不算完成，会重新处理
+
+    Returns:
+        已完成的 student_id 集合
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 中断时最后一行可能写了一半
+                continue
+            if retry_failed and record.get("status") != "ok":
+                # 同一学生以最后一条记录为准
+                done.discard(record.get("student_id"))
+                continue
+            done.add(record.get("student_id"))
+    return done
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[int(q * 100) - 1]
+
+
+class BatchStats:
+    """批处理吞吐统计"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.documents = 0
+        self.latencies: List[float] = []
+        self.started = time.perf_counter()
+
+    def add(self, record: Dict[str, Any]):
+        self.done += 1
+        if record["status"] != "ok":
+            self.failed += 1
+        self.documents += (1 if record["resume_file"] else 0) + len(record["offer_files"])
+        self.latencies.append(record["elapsed_s"])
+
+    def report(self, llm_processor: LLMProcessor, final: bool = False) -> str:
+        minutes = max(time.perf_counter() - self.started, 1e-6) / 60
+        line = (
+            f"{'完成' if final else '进度'}: {self.done}/{self.total} 个学生 (失败 {self.failed}), "
+            f"{self.done / minutes:.1f} 学生/分钟, {self.documents / minutes:.1f} 文档/分钟, "
+            f"单个学生耗时 p50={_percentile(self.latencies, 0.5):.1f}s p95={_percentile(self.latencies, 0.95):.1f}s"
+        )
+        cache_stats = llm_processor.cache_stats()
+        if cache_stats:
+            line += f", LLM缓存命中率 {cache_stats['hit_rate']:.0%}"
+        return line
+
+
+async def process_student(student: Dict[str, Any], llm_processor: LLMProcessor, pool: ProcessPoolExecutor,
+                          enable_school_ranking: bool = True, enable_student_tags: bool = True,
+                          force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    处理一个学生：子进程提取PDF，提取完成的文档立即进入LLM分析
+
+    Args:
+        student: discover_students 返回的学生信息
+        llm_processor: LLM处理器（并发上限由其 max_concurrency 控制）
+        pool: PDF提取进程池
+        enable_school_ranking: 是否补充学校排名
+        enable_student_tags: 是否计算学生标签
+        force_refresh: 忽略LLM缓存
+
+    Returns:
+        写入JSONL的记录
+    """
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    errors = []
+
+    async def extract(path):
+        result = await loop.run_in_executor(pool, extract_pdf, path)
+        if not result["success"]:
+            errors.append(f"{os.path.basename(path)}: {result['error']}")
+            return None
+        return result["content"]
+
+    resume_text = extract(student["resume"]) if student["resume"] else None
+    offer_texts = [extract(path) for path in student["offers"]]
+
+    try:
+        combined_result = await llm_processor.process_documents(
+            resume_text, offer_texts, force_refresh=force_refresh
+        )
+    except Exception as e:
+        combined_result = {"resume_analysis": None, "offer_analyses": []}
+        errors.append(f"分析出错: {str(e)}")
+
+    resume_analysis = combined_result["resume_analysis"]
+    offer_analyses = [a for a in combined_result["offer_analyses"] if a is not None]
+    for analysis in [resume_analysis] + offer_analyses:
+        if isinstance(analysis, dict) and "error" in analysis:
+            errors.append(f"LLM: {analysis['error']}")
+    combined_result["offer_analyses"] = offer_analyses
+
+    if enable_school_ranking:
+        enrich_school_rankings(combined_result)
+    tags = None
+    if enable_student_tags and resume_analysis is not None:
+        tags = calculate_student_tags(combined_result)
+
+    return {
+        "student_id": student["student_id"],
+        "folder": student["folder"],
+        "resume_file": student["resume"],
+        "offer_files": student["offers"],
+        "status": "error" if errors else "ok",
+        "errors": errors,
+        "resume_analysis": resume_analysis,
+        "offer_analyses": offer_analyses,
+        "tags": tags,
+        "elapsed_s": round(time.perf_counter() - started, 3)
+    }
+
+
+async def run_batch(root_dir: str, output_path: str, workers: Optional[int] = None,
+                    students_in_flight: int = 8, max_concurrency: Optional[int] = None,
+                    limit: Optional[int] = None, retry_failed: bool = False,
+                    enable_school_ranking: bool = True, enable_student_tags: bool = True,
+                    force_refresh: bool = False, report_every: int = 10,
+                    llm_processor: Optional[LLMProcessor] = None) -> Dict[str, Any]:
+    """
+    批量处理学生目录，结果逐条追加到JSONL，已完成的学生在重跑时跳过
+
+    Args:
+        root_dir: 学生目录的根目录
+        output_path: JSONL输出路径（同时作为断点记录）
+        workers: PDF提取进程数，默认CPU核数
+        students_in_flight: 同时处理的学生数
+        max_concurrency: 同时进行的LLM请求数，默认取配置
+        limit: 最多处理的学生数
+        retry_failed: 重新处理上次出错的学生
+        enable_school_ranking: 是否补充学校排名
+        enable_student_tags: 是否计算学生标签
+        force_refresh: 忽略LLM缓存
+        report_every: 每完成多少个学生打印一次进度
+        llm_processor: 使用的LLM处理器（如指向模拟服务），默认按配置创建
+
+    Returns:
+        汇总统计
+    """
+    students = discover_students(root_dir)
+    done = load_checkpoint(output_path, retry_failed)
+    pending = [s for s in students if s["student_id"] not in done]
+    skipped = len(students) - len(pending)
+    if limit is not None:
+        pending = pending[:limit]
+    print(f"共发现 {len(students)} 个学生目录，已完成 {skipped} 个，本次处理 {len(pending)} 个")
+
+    if llm_processor is None:
+        llm_processor = LLMProcessor(max_concurrency=max_concurrency)
+    stats = BatchStats(len(pending))
+    semaphore = asyncio.Semaphore(students_in_flight)
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    async def run_one(student):
+        async with semaphore:
+            return await process_student(
+                student, llm_processor, pool,
+                enable_school_ranking=enable_school_ranking,
+                enable_student_tags=enable_student_tags,
+                force_refresh=force_refresh
+            )
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool, \
+            open(output_path, 'a', encoding='utf-8') as out:
+        try:
+            for future in asyncio.as_completed([run_one(s) for s in pending]):
+                record = await future
+                # 每条结果立即落盘，中断后可从此处续跑
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats.add(record)
+                if report_every and stats.done % report_every == 0:
+                    print(stats.report(llm_processor))
+        finally:
+            await llm_processor.aclose()
+
+    print(stats.report(llm_processor, final=True))
+    return {
+        "total": stats.total,
+        "done": stats.done,
+        "failed": stats.failed,
+        "documents": stats.documents,
+        "output": output_path
+    }
@@ -0,0 +1,97 @@
+import time
+import argparse
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from excel_parser import ExcelParser
+from token_budget import estimate_tokens
+
+
+def legacy_dataframe_to_text(df: pd.DataFrame, max_rows: Optional[int] = 20) -> str:
+    """原 _dataframe_to_text 的逐行逐格实现（max_rows=None 时渲染全部行）"""
+    text_lines = ["Excel数据内容：", f"总行数: {len(df)}", f"列名: {', '.join(df.columns.astype(str))}", ""]
+    for idx, row in df.iterrows():
+        text_lines.append(f"行 {idx+1}:")
+        for col_name in df.columns:
+            value = row[col_name]
+            if pd.notna(value):
+                if isinstance(value, (int, float)):
+                    formatted_value = str(int(value)) if value == int(value) else str(value)
+                elif isinstance(value, (np.integer, np.floating)):
+                    formatted_value = str(int(value)) if value == int(value) else str(value)
+                else:
+                    formatted_value = str(value)
+                text_lines.append(f"  {col_name}: {formatted_value}")
+        text_lines.append("")
+        if max_rows is not None and idx >= max_rows - 1 and len(df) > max_rows:
+            text_lines.append(f"... 已省略剩余 {len(df) - max_rows} 行数据 ...")
+            break
+    return "\n".join(text_lines)
+
+
+def generate_sheet(rows: int, seed: int = 42) -> pd.DataFrame:
+    """生成与申请案例表类似的混合类型数据：编号、成绩（含空值和整数值的浮点数）、中英文文本、日期、布尔值等"""
+    rng = np.random.default_rng(seed)
+    gpa = np.round(rng.uniform(2.5, 4.0, rows), 2)
+    gpa[rng.random(rows) < 0.1] = np.nan
+    toefl = rng.integers(80, 120, rows).astype(float)
+    toefl[rng.random(rows) < 0.3] = np.nan
+    schools = np.array(["清华大学", "北京大学", "复旦大学", "Zhejiang University", "University of Toronto",
+                        "National University of Singapore", "上海交通大学", "中山大学"])
+    majors = np.array(["计算机科学", "金融", "Electrical Engineering", "Economics", "数据科学", "Statistics"])
+    notes = np.array([None] * 9 + ["转专业申请，有两段实习经历"], dtype=object)[rng.integers(0, 10, rows)]
+    return pd.DataFrame({
+        "编号": np.arange(1, rows + 1),
+        "本科学校": schools[rng.integers(0, len(schools), rows)],
+        "专业": majors[rng.integers(0, len(majors), rows)],
+        "GPA": gpa,
+        "托福": toefl,
+        "申请年份": np.full(rows, 2025),
+        "提交日期": pd.Timestamp("2024-10-01") + pd.to_timedelta(rng.integers(0, 120, rows), unit="D"),
+        "是否录取": rng.random(rows) < 0.4,
+        "备注": notes,
+    })
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='对比逐行和向量化渲染表格文本的速度，并校验输出一致')
+    parser.add_argument('--rows', type=int, default=50000, help='表格行数')
+    parser.add_argument('--token-budget', type=int, default=8000, help='预算模式的token数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    return parser.parse_args()
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    df = generate_sheet(args.rows, args.seed)
+    parser = ExcelParser()
+    print(f"表格: {len(df)} 行 x {len(df.columns)} 列")
+
+    legacy_20, legacy_20_ms = timed(legacy_dataframe_to_text, df)
+    vector_20, vector_20_ms = timed(parser._dataframe_to_text, df)
+    legacy_all, legacy_all_ms = timed(legacy_dataframe_to_text, df, None)
+    vector_all, vector_all_ms = timed(parser._dataframe_to_text, df, None)
+    budgeted, budgeted_ms = timed(parser._dataframe_to_text, df, token_budget=args.token_budget)
+
+    print(f"\n{'模式':<22}{'逐行(ms)':>10}{'向量化(ms)':>12}{'输出一致':>8}")
+    print(f"{'前20行':<22}{legacy_20_ms:>10.1f}{vector_20_ms:>12.1f}{str(legacy_20 == vector_20):>8}")
+    print(f"{'全部行':<22}{legacy_all_ms:>10.1f}{vector_all_ms:>12.1f}{str(legacy_all == vector_all):>8}")
+    print(f"\n全部行文本约 {estimate_tokens(vector_all)} tokens")
+    print(f"预算模式（{args.token_budget} tokens）: {budgeted_ms:.1f}ms，输出约 {estimate_tokens(budgeted)} tokens")
+    print("\n".join(budgeted.splitlines()[:6]))
+    if legacy_20 != vector_20 or legacy_all != vector_all:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import time
+import argparse
+import tempfile
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font, PatternFill
+
+from excel_parser import ExcelParser
+
+
+def _format_blank(sheet, row: int, column: int = 1):
+    """给空单元格设置格式：单元格没有值，但会计入工作表尺寸信息（max_row）"""
+    cell = sheet.cell(row=row, column=column)
+    cell.font = Font(bold=True)
+    cell.fill = PatternFill("solid", fgColor="FFFF00")
+
+
+def trailing_formatted_blank(path: str):
+    """3行数据，第10行有一个只设置了格式的空单元格"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["姓名", "学校", "GPA"])
+    for row in [["张三", "清华大学", 3.8], ["李四", "北京大学", 3.5], ["王五", "复旦大学", 3.6]]:
+        ws.append(row)
+    _format_blank(ws, 10)
+    wb.save(path)
+
+
+def blank_rows_inside(path: str):
+    """中间有空行（pandas保留为全空的行），末尾有空字符串和设置了格式的空行"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["编号", "备注", None, "分数"])
+    ws.append([1, "first", None, 90])
+    _format_blank(ws, 3, 2)
+    ws.append([])
+    ws.cell(row=4, column=1, value=3)
+    ws.cell(row=6, column=2, value="")
+    _format_blank(ws, 8, 4)
+    wb.save(path)
+
+
+def without_dimension(path: str):
+    """只写模式生成的文件没有尺寸信息，末尾带空行"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(["编号", "学校"])
+    for i in range(5):
+        ws.append([i, f"学校{i}"])
+    ws.append([None, None])
+    ws.append([None, ""])
+    wb.save(path)
+
+
+def generate_sheet(rows: int, seed: int = 42) -> pd.DataFrame:
+    """生成混合类型的数据：编号、成绩（含空值和整数值的浮点数）、中英文文本、日期、布尔值"""
+    rng = np.random.default_rng(seed)
+    gpa = np.round(rng.uniform(2.5, 4.0, rows), 2)
+    gpa[rng.random(rows) < 0.1] = np.nan
+    schools = np.array(["清华大学", "北京大学", "Zhejiang University", "University of Toronto"])
+    notes = np.array([None] * 9 + ["转专业申请，有两段实习经历"], dtype=object)[rng.integers(0, 10, rows)]
+    return pd.DataFrame({
+        "编号": np.arange(1, rows + 1),
+        "本科学校": schools[rng.integers(0, len(schools), rows)],
+        "GPA": gpa,
+        "托福": rng.integers(80, 120, rows).astype(float),
+        "提交日期": pd.Timestamp("2024-10-01") + pd.to_timedelta(rng.integers(0, 120, rows), unit="D"),
+        "是否录取": rng.random(rows) < 0.4,
+        "备注": notes,
+    })
+
+
+def generated_sheet(rows: int, seed: int = 42) -> Callable[[str], None]:
+    """混合类型的数据表，末尾有一段设置了格式的空行"""
+    def build(path: str):
+        generate_sheet(rows, seed).to_excel(path, index=False)
+        wb = load_workbook(path)
+        ws = wb.active
+        for row in range(ws.max_row + 1, ws.max_row + 50):
+            _format_blank(ws, row, 1 + row % 5)
+        wb.save(path)
+    return build
+
+
+def compare(path: str) -> Tuple[int, List[int]]:
+    """
+    逐行比较流式读取和pandas读取的结果（含越界的行索引）
+
+    Returns:
+        (pandas读取的总行数, 结果不一致的行索引列表)
+    """
+    streaming = ExcelParser(streaming_threshold=0)
+    full = ExcelParser(streaming_threshold=None)
+    _, total_rows = full.extract_row(path, 0)
+    mismatches = [row_index for row_index in range(-1, total_rows + 2)
+                  if streaming.extract_row(path, row_index) != full.extract_row(path, row_index)]
+    return total_rows, mismatches
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='校验流式读取单行与pandas读取的结果一致（含末尾只有格式的空行），并对比耗时')
+    parser.add_argument('--rows', type=int, default=20000, help='耗时对比用的表格行数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    cases = [
+        ("末尾格式空单元格", trailing_formatted_blank),
+        ("中间空行", blank_rows_inside),
+        ("无尺寸信息", without_dimension),
+        ("混合类型300行", generated_sheet(300, args.seed)),
+    ]
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'用例':<16}{'尺寸行数':>8}{'数据行数':>8}{'不一致':>8}")
+        for label, build in cases:
+            path = os.path.join(tmp, f"{label}.xlsx")
+            build(path)
+            max_row = load_workbook(path, read_only=True).active.max_row
+            total_rows, mismatches = compare(path)
+            failed = failed or bool(mismatches)
+            print(f"{label:<16}{str(max_row):>8}{total_rows:>8}{len(mismatches):>8}"
+                  + (f"  行索引: {mismatches[:10]}" if mismatches else ""))
+
+        path = os.path.join(tmp, "large.xlsx")
+        generated_sheet(args.rows, args.seed)(path)
+        row_index = args.rows // 2
+        start = time.perf_counter()
+        full_result = ExcelParser(streaming_threshold=None, cache_size=0).extract_row(path, row_index)
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        stream_result = ExcelParser(streaming_threshold=0).extract_row(path, row_index)
+        stream_seconds = time.perf_counter() - start
+        failed = failed or stream_result != full_result
+        print(f"\n{args.rows} 行表格取第 {row_index + 1} 行: pandas {full_seconds:.2f}s，流式 {stream_seconds:.2f}s，"
+              f"结果一致: {stream_result == full_result}")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
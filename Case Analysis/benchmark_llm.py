@@ -0,0 +1,220 @@
+import io
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from llm_processor import LLMProcessor
+from mock_llm_server import MockLLMServer
+
+RESUME_TEMPLATE = (
+    "Student {n} Peking University B.Sc. in Computer Science GPA 3.78/4.0 2019-2023. "
+    "TOEFL 108 (R29 L28 S24 W27), GRE 329. Software Engineering Intern at ByteDance, "
+    "built data pipelines processing 2TB per day. National Scholarship 2021."
+)
+OFFER_TEMPLATE = (
+    "Dear Student {n}, we are pleased to offer you admission to the Master of Science in Computer Science "
+    "program at Carnegie Mellon University for Fall 2025 (offer {m}). You have been awarded a merit "
+    "scholarship of $10,000 per year."
+)
+
+
+def generate_students(count: int, offers_per_student: int) -> List[Dict[str, Any]]:
+    """生成文本互不相同的学生文档"""
+    return [{
+        "resume": RESUME_TEMPLATE.format(n=n),
+        "offers": [OFFER_TEMPLATE.format(n=n, m=m) for m in range(offers_per_student)],
+    } for n in range(count)]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[int(q * 100) - 1]
+
+
+def _count_errors(results: List[Optional[Dict[str, Any]]]) -> int:
+    return sum(1 for r in results if not isinstance(r, dict) or "error" in r)
+
+
+def make_processor(server: MockLLMServer, concurrency: int, max_retries: int) -> LLMProcessor:
+    """创建指向模拟服务的处理器：关闭缓存，限流放宽到不影响测量"""
+    with redirect_stdout(io.StringIO()):
+        return LLMProcessor(api_key="mock-key", api_base=server.url, model_name="mock-model",
+                            max_concurrency=concurrency, requests_per_minute=1e7,
+                            max_retries=max_retries, enable_cache=False)
+
+
+async def run_async(processor: LLMProcessor, students: List[Dict[str, Any]], stream: bool = False) -> Dict[str, Any]:
+    """所有学生同时调用 process_documents，记录每个学生的耗时（流式时还记录首个部分结果的时间）"""
+    latencies, first_partial, results = [], [], []
+
+    async def run_student(student):
+        started = time.perf_counter()
+        seen = set()
+
+        def on_partial(kind, index, partial):
+            if (kind, index) not in seen:
+                seen.add((kind, index))
+                first_partial.append(time.perf_counter() - started)
+
+        combined = await processor.process_documents(student["resume"], student["offers"],
+                                                     on_partial=on_partial if stream else None)
+        latencies.append(time.perf_counter() - started)
+        results.append(combined["resume_analysis"])
+        results.extend(combined["offer_analyses"])
+
+    try:
+        await asyncio.gather(*(run_student(s) for s in students))
+    finally:
+        await processor.aclose()
+    return {"latencies": latencies, "results": results, "first_partial": first_partial}
+
+
+def run_sync(processor: LLMProcessor, students: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """同步接口逐个调用，记录每次调用的耗时"""
+    latencies, results = [], []
+    for student in students:
+        for kind, text in [("resume", student["resume"])] + [("offer", t) for t in student["offers"]]:
+            started = time.perf_counter()
+            if kind == "resume":
+                results.append(processor.analyze_resume(text))
+            else:
+                results.append(processor.analyze_offer(text))
+            latencies.append(time.perf_counter() - started)
+    return {"latencies": latencies, "results": results, "first_partial": []}
+
+
+def run_batch_mode(processor: LLMProcessor, root_dir: str, concurrency: int, workers: int) -> Dict[str, Any]:
+    """通过 batch_processor.run_batch 处理生成的PDF目录（含PDF提取）"""
+    from batch_processor import run_batch
+
+    output = os.path.join(root_dir, f"results_{concurrency}.jsonl")
+    asyncio.run(run_batch(root_dir, output, workers=workers, students_in_flight=concurrency,
+                          enable_student_tags=False, report_every=0, llm_processor=processor))
+    latencies, results = [], []
+    with open(output, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            latencies.append(record["elapsed_s"])
+            results.append(record["resume_analysis"])
+            results.extend(record["offer_analyses"])
+    os.remove(output)
+    return {"latencies": latencies, "results": results, "first_partial": []}
+
+
+def generate_pdf_students(root_dir: str, count: int, offers_per_student: int) -> None:
+    """为批处理模式生成学生目录（每个目录一份简历和若干Offer）"""
+    from benchmark_pdf_backends import generate_corpus
+
+    for n in range(count):
+        folder = Path(root_dir) / f"student_{n:03d}"
+        folder.mkdir(parents=True)
+        paths = generate_corpus(str(folder), 1 + offers_per_student, pages_per_file=1)
+        for i, path in enumerate(paths):
+            Path(path).with_suffix(".txt").unlink()
+            name = f"resume_{n:03d}.pdf" if i == 0 else f"offer_{n:03d}_{i}.pdf"
+            Path(path).rename(folder / name)
+
+
+def summarize(mode: str, concurrency: int, run: Dict[str, Any], wall: float, server: MockLLMServer,
+              documents: int, offers_per_student: int) -> Dict[str, Any]:
+    """汇总吞吐、尾延迟、重试和客户端开销"""
+    requests = server.stats["requests"]
+    mean_server_latency = server.latency + server.jitter / 2
+    if mode == "stream":
+        # 流式输出本身的耗时属于服务端
+        mean_server_latency += (server.stream_seconds("resume") +
+                                offers_per_student * server.stream_seconds("offer")) / (1 + offers_per_student)
+    # 并发为c时理想耗时约为 请求数 x 服务端延迟 / c，多出的部分折算到每个请求即为客户端开销
+    ideal = requests * mean_server_latency / concurrency
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "documents": documents,
+        "seconds": wall,
+        "docs_per_second": documents / wall if wall else 0.0,
+        "p50": _percentile(run["latencies"], 0.5),
+        "p95": _percentile(run["latencies"], 0.95),
+        "p99": _percentile(run["latencies"], 0.99),
+        "first_partial_p50": _percentile(run["first_partial"], 0.5) if run["first_partial"] else None,
+        "requests": requests,
+        "retries": requests - documents,
+        "injected_errors": server.stats["errors"],
+        "failed": _count_errors(run["results"]),
+        "max_in_flight": server.stats["max_in_flight"],
+        "overhead_ms": max(0.0, wall - ideal) * concurrency / max(requests, 1) * 1000,
+    }
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='使用本地模拟LLM服务测试LLMProcessor的吞吐、尾延迟和重试行为')
+    parser.add_argument('--students', type=int, default=20, help='学生数量')
+    parser.add_argument('--offers', type=int, default=2, help='每个学生的Offer数量')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16], help='测试的并发数')
+    parser.add_argument('--modes', nargs='+', default=['async', 'stream', 'sync', 'batch'],
+                        choices=['async', 'stream', 'sync', 'batch'], help='测试的调用方式')
+    parser.add_argument('--latency', type=float, default=0.2, help='模拟服务每个请求的延迟秒数')
+    parser.add_argument('--jitter', type=float, default=0.1, help='延迟的随机浮动上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.1, help='模拟服务返回503的请求比例')
+    parser.add_argument('--max-retries', type=int, default=3, help='客户端最大重试次数')
+    parser.add_argument('--workers', type=int, default=2, help='批处理模式的PDF提取进程数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    students = generate_students(args.students, args.offers)
+    documents = args.students * (1 + args.offers)
+    server = MockLLMServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    server.start()
+    print(f"模拟服务: {server.url}，延迟 {args.latency}s+[0,{args.jitter})s，错误率 {args.error_rate:.0%}")
+    print(f"学生: {args.students} 个，文档: {documents} 个\n")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if "batch" in args.modes:
+            with redirect_stdout(io.StringIO()):
+                generate_pdf_students(temp_dir, args.students, args.offers)
+        for mode in args.modes:
+            # 同步接口逐个调用，并发数不起作用
+            levels = [1] if mode == "sync" else args.concurrency
+            for concurrency in levels:
+                processor = make_processor(server, concurrency, args.max_retries)
+                server.reset_stats()
+                started = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    if mode == "sync":
+                        run = run_sync(processor, students)
+                    elif mode == "batch":
+                        run = run_batch_mode(processor, temp_dir, concurrency, args.workers)
+                    else:
+                        run = asyncio.run(run_async(processor, students, stream=(mode == "stream")))
+                wall = time.perf_counter() - started
+                rows.append(summarize(mode, concurrency, run, wall, server, documents, args.offers))
+    server.stop()
+
+    print(f"{'方式':<8}{'并发':>5}{'耗时(s)':>9}{'文档/秒':>9}{'p50(s)':>8}{'p95(s)':>8}{'p99(s)':>8}"
+          f"{'首个部分(s)':>12}{'请求':>6}{'重试':>6}{'注入错误':>9}{'失败':>6}{'服务端并发':>11}{'开销(ms/请求)':>14}")
+    for r in rows:
+        first = f"{r['first_partial_p50']:.2f}" if r["first_partial_p50"] is not None else "-"
+        print(f"{r['mode']:<8}{r['concurrency']:>5}{r['seconds']:>9.2f}{r['docs_per_second']:>9.1f}"
+              f"{r['p50']:>8.2f}{r['p95']:>8.2f}{r['p99']:>8.2f}{first:>12}{r['requests']:>6}{r['retries']:>6}"
+              f"{r['injected_errors']:>9}{r['failed']:>6}{r['max_in_flight']:>11}{r['overhead_ms']:>14.1f}")
+    print("\n延迟列：async/stream/batch 为单个学生的耗时，sync 为单次调用的耗时；"
+          "批处理模式包含PDF提取，开销列相应偏大")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from collections import Counter
+from contextlib import redirect_stdout
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pdf_backends import BACKENDS, create_backend
+from pdf_parser import PDFParser
+
+# 生成测试PDF时使用的示例段落
+SAMPLE_SECTIONS = [
+    ("EDUCATION", "Peking University, B.Sc. in Computer Science, GPA 3.78/4.0, 2019-2023"),
+    ("EXPERIENCE", "Software Engineering Intern at ByteDance, built data pipelines processing 2TB per day"),
+    ("PROJECT", "Course scheduling optimizer using integer programming, reduced conflicts by 35 percent"),
+    ("AWARDS", "National Scholarship 2021, First Prize in the Mathematical Contest in Modeling"),
+    ("SKILLS", "Python, C++, SQL, PyTorch, Spark, Docker, Kubernetes"),
+]
+
+
+def generate_corpus(output_dir: str, num_files: int = 10, pages_per_file: int = 8) -> List[str]:
+    """
+    用PyMuPDF生成多页测试PDF，同名.txt文件保存写入的原文，作为保真度的参考
+
+    Args:
+        output_dir: 输出目录
+        num_files: 文件数
+        pages_per_file: 每个文件的页数
+
+    Returns:
+        生成的PDF路径列表
+    """
+    import fitz
+
+    paths = []
+    for n in range(num_files):
+        doc = fitz.open()
+        reference = []
+        for p in range(pages_per_file):
+            page = doc.new_page()
+            y = 72
+            for header, body in SAMPLE_SECTIONS:
+                line = f"{body} (student {n}, page {p + 1})"
+                page.insert_text((72, y), header, fontsize=12)
+                page.insert_text((72, y + 18), line, fontsize=10)
+                reference.extend([header, line])
+                y += 60
+        pdf_path = os.path.join(output_dir, f"sample_{n:03d}.pdf")
+        doc.save(pdf_path)
+        doc.close()
+        Path(pdf_path).with_suffix(".txt").write_text("\n".join(reference), encoding="utf-8")
+        paths.append(pdf_path)
+    return paths
+
+
+def _words(text: str) -> List[str]:
+    return text.split()
+
+
+def fidelity(text: str, reference: str) -> Dict[str, float]:
+    """
+    文本保真度：词序列相似度和词频F1
+
+    Args:
+        text: 待评估文本
+        reference: 参考文本
+
+    Returns:
+        {"sequence": 词序列相似度, "f1": 词频F1}
+    """
+    words, ref_words = _words(text), _words(reference)
+    if not words and not ref_words:
+        return {"sequence": 1.0, "f1": 1.0}
+    overlap = sum((Counter(words) & Counter(ref_words)).values())
+    precision = overlap / len(words) if words else 0.0
+    recall = overlap / len(ref_words) if ref_words else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    sequence = SequenceMatcher(None, words, ref_words, autojunk=False).ratio()
+    return {"sequence": sequence, "f1": f1}
+
+
+def run_benchmark(pdf_paths: List[str], backends: List[str], repeat: int = 3,
+                  reference_backend: Optional[str] = "pdfplumber") -> List[Dict[str, float]]:
+    """
+    对比各后端的提取速度和文本保真度
+
+    保真度的参考优先使用PDF同名的.txt文件，没有时使用 reference_backend 的提取结果。
+
+    Args:
+        pdf_paths: PDF文件列表
+        backends: 参与对比的后端
+        repeat: 每个文件重复提取次数（取中位数）
+        reference_backend: 没有.txt参考时作为参考的后端
+
+    Returns:
+        每个后端一行的结果
+    """
+    # 不回退，确保测到的是指定后端本身
+    parsers = {name: PDFParser(backend=name, fallback=None) for name in backends}
+    counter = create_backend(backends[0])
+    page_counts = {path: counter.page_count(path) for path in pdf_paths}
+
+    outputs: Dict[str, Dict[str, str]] = {name: {} for name in backends}
+    rows = []
+    for name, parser in parsers.items():
+        durations = []
+        for path in pdf_paths:
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    text = parser.extract_text(path)
+                times.append(time.perf_counter() - start)
+            durations.append(statistics.median(times))
+            outputs[name][path] = text or ""
+        total_pages = sum(page_counts.values())
+        total_seconds = sum(durations)
+        rows.append({
+            "backend": name,
+            "files": len(pdf_paths),
+            "pages": total_pages,
+            "seconds": total_seconds,
+            "pages_per_second": total_pages / total_seconds if total_seconds else 0.0,
+        })
+
+    for row in rows:
+        scores = []
+        for path in pdf_paths:
+            reference_file = Path(path).with_suffix(".txt")
+            if reference_file.exists():
+                reference = reference_file.read_text(encoding="utf-8")
+            elif reference_backend in outputs:
+                reference = outputs[reference_backend][path]
+            else:
+                continue
+            scores.append(fidelity(outputs[row["backend"]][path], reference))
+        row["sequence_similarity"] = statistics.mean(s["sequence"] for s in scores) if scores else float("nan")
+        row["word_f1"] = statistics.mean(s["f1"] for s in scores) if scores else float("nan")
+    return rows
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='对比PDF提取后端的速度（页/秒）和文本保真度')
+    parser.add_argument('corpus', nargs='?', help='测试PDF所在目录（PDF旁的同名.txt作为参考文本）；不指定时自动生成')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), help='参与对比的后端')
+    parser.add_argument('--repeat', type=int, default=3, help='每个文件重复提取次数')
+    parser.add_argument('--reference', default='pdfplumber', help='没有参考文本时作为参考的后端')
+    parser.add_argument('--generate', type=int, default=10, help='自动生成的PDF数量')
+    parser.add_argument('--pages', type=int, default=8, help='自动生成的PDF页数')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.corpus:
+            pdf_paths = sorted(str(p) for p in Path(args.corpus).rglob("*.pdf"))
+        else:
+            pdf_paths = generate_corpus(temp_dir, args.generate, args.pages)
+        if not pdf_paths:
+            print("没有找到PDF文件")
+            sys.exit(1)
+
+        print(f"测试文件: {len(pdf_paths)} 个，每个重复 {args.repeat} 次")
+        rows = run_benchmark(pdf_paths, args.backends, args.repeat, args.reference)
+
+    print(f"\n{'后端':<12}{'页数':>8}{'耗时(s)':>10}{'页/秒':>10}{'词序相似度':>12}{'词频F1':>10}")
+    for row in rows:
+        print(f"{row['backend']:<12}{row['pages']:>8}{row['seconds']:>10.2f}{row['pages_per_second']:>10.1f}"
+              f"{row['sequence_similarity']:>12.3f}{row['word_f1']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from qs_usnews_school_dict import qs_school_ranking, usnews_school_ranking
+from school_resolver import RANKING_TABLES, SchoolResolver, EXTRA_ALIASES, load_ranking_entries, normalize_name
+
+LEGACY_TABLES = {"QS": qs_school_ranking, "US News": usnews_school_ranking}
+
+
+def legacy_lookup(school_name: str, ranking_dict: Dict[int, str]) -> Optional[int]:
+    """原 enrich_school_rankings 中的线性扫描（双向子串匹配，命中第一个即返回）"""
+    for rank, name in ranking_dict.items():
+        if school_name.lower() in name.lower() or name.lower() in school_name.lower():
+            return rank
+    return None
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    """在最长的单词中交换相邻两个字母"""
+    words = name.split()
+    i = max(range(len(words)), key=lambda k: len(words[k]))
+    word = words[i]
+    if len(word) < 5:
+        return name
+    j = rng.randrange(1, len(word) - 2)
+    words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return " ".join(words)
+
+
+def make_variant(name: str, rng: random.Random) -> str:
+    """生成录取通知中常见的学校名写法"""
+    base = name.split(" (")[0]
+    variants = [
+        name,
+        base,
+        base.lower(),
+        base.replace("--", ", ").replace("The ", ""),
+        base + " - Graduate School",
+        _typo(base, rng),
+    ]
+    if "(" in name:
+        variants.append(name[name.index("(") + 1:name.index(")")])
+    return rng.choice(variants)
+
+
+def generate_admissions(count: int, seed: int = 42, unknown_ratio: float = 0.1) -> List[Tuple[str, str, Optional[int]]]:
+    """
+    生成测试用的录取记录
+
+    Returns:
+        (学校名写法, 排名类型, 期望名次) 列表；不在排名表中的学校期望名次为None
+    """
+    rng = random.Random(seed)
+    entries = {t: load_ranking_entries(table) for t, table in RANKING_TABLES.items()}
+    admissions = []
+    for i in range(count):
+        ranking_type = rng.choice(list(entries))
+        if rng.random() < unknown_ratio:
+            admissions.append((f"University of Nowhere Campus {i}", ranking_type, None))
+            continue
+        rank, name = rng.choice(entries[ranking_type])
+        admissions.append((make_variant(name, rng), ranking_type, rank))
+    return admissions
+
+
+def evaluate(lookup, admissions) -> Dict[str, float]:
+    """统计耗时、准确率和误匹配率"""
+    correct = wrong = missed = 0
+    start = time.perf_counter()
+    results = [lookup(name, ranking_type) for name, ranking_type, _ in admissions]
+    seconds = time.perf_counter() - start
+    for result, (_, _, expected) in zip(results, admissions):
+        if result == expected:
+            correct += 1
+        elif result is None:
+            missed += 1
+        else:
+            wrong += 1
+    total = len(admissions)
+    return {
+        "seconds": seconds,
+        "us_per_lookup": seconds / total * 1e6,
+        "accuracy": correct / total,
+        "wrong": wrong / total,
+        "missed": missed / total,
+    }
+
+
+def alias_conflicts(entries: List[Tuple[int, str]]) -> List[Tuple[str, str, str]]:
+    """
+    检查排名表中的学校名是否会互相解析
+
+    依次去掉每个学校后用它的各个别名查找：不在表中的学校（如QS表中没有的Northeastern）
+    必须返回None，而不是落到名称相近的另一所学校。多所学校共用的缩写（如NTU）不检查。
+
+    Returns:
+        (被去掉的学校, 查找用的别名, 错误解析到的学校) 列表
+    """
+    owners = Counter(key for _, name in entries for key in set(SchoolResolver._aliases(name)))
+    conflicts = []
+    for i, (_, name) in enumerate(entries):
+        resolver = SchoolResolver(entries[:i] + entries[i + 1:], EXTRA_ALIASES, memo_size=0)
+        for alias in SchoolResolver._aliases(name):
+            if owners[alias] > 1:
+                continue
+            match = resolver.resolve(alias)
+            if match and normalize_name(match[1]) != normalize_name(name):
+                conflicts.append((name, alias, match[1]))
+    return conflicts
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='对比学校名线性扫描和索引查找的速度与准确率')
+    parser.add_argument('--count', type=int, default=3000, help='录取记录数量')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    admissions = generate_admissions(args.count, args.seed)
+
+    start = time.perf_counter()
+    resolvers = {t: SchoolResolver(load_ranking_entries(table), EXTRA_ALIASES) for t, table in RANKING_TABLES.items()}
+    build_ms = (time.perf_counter() - start) * 1000
+    cold_resolvers = {t: SchoolResolver(load_ranking_entries(table), EXTRA_ALIASES, memo_size=0)
+                      for t, table in RANKING_TABLES.items()}
+
+    def indexed_with(table):
+        def lookup(name, ranking_type):
+            match = table[ranking_type].resolve(name)
+            return match[0] if match else None
+        return lookup
+
+    def legacy(name, ranking_type):
+        return legacy_lookup(name, LEGACY_TABLES[ranking_type])
+
+    print(f"录取记录: {len(admissions)} 条，索引构建耗时 {build_ms:.1f}ms")
+    print(f"\n{'方法':<16}{'总耗时(ms)':>12}{'单次(us)':>10}{'正确率':>8}{'误匹配':>8}{'未匹配':>8}")
+    for label, lookup in [("线性扫描", legacy), ("索引查找(无缓存)", indexed_with(cold_resolvers)),
+                          ("索引查找", indexed_with(resolvers))]:
+        r = evaluate(lookup, admissions)
+        print(f"{label:<16}{r['seconds'] * 1000:>12.1f}{r['us_per_lookup']:>10.1f}"
+              f"{r['accuracy']:>8.1%}{r['wrong']:>8.1%}{r['missed']:>8.1%}")
+
+    conflicts = []
+    for ranking_type, table in RANKING_TABLES.items():
+        for name, alias, other in alias_conflicts(load_ranking_entries(table)):
+            conflicts.append(f"{ranking_type}: 去掉 {name} 后，{alias!r} 解析为 {other}")
+    print(f"\n别名互相解析检查: {'通过' if not conflicts else f'{len(conflicts)} 处冲突'}")
+    for conflict in conflicts:
+        print(f"  {conflict}")
+    if conflicts:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import time
+import random
+import argparse
+from typing import Any, Dict, List
+
+from test_llm import calculate_student_tags
+
+SCHOOLS = [
+    "Harvard University", "The Hotchkiss School", "Phillips Exeter Academy", "University of Toronto",
+    "Shanghai High School", "The Lawrenceville School", "Imperial College London", "Choate Rosemary Hall",
+    "The Juilliard School", "Boston College",
+]
+PROGRAMS = ["MSc Computer Science", "专业未定", "无专业", "General Studies", "Grade 10", "MBA", None, ""]
+DEGREE_TYPES = ["MASTER", "BACHELOR", "PHD", "OTHER", None]
+TEST_NAMES = ["托福", "TOEFL iBT", "雅思", "IELTS Academic", "GRE", "GMAT", None]
+SCORES = [85, 95, "6.0", "7.5", "总分: 88", "总分: 102", "N/A", None, "", 320, 5.5]
+RANKINGS = [None, "", "3", 45, 99.5, "150", "N/A", 100]
+GPAS = [None, "", "3.1", 3.8, "3.5/4.0", 2.9, 0, "N/A", 85]
+
+
+def legacy_calculate_student_tags(student_data):
+    """
+    改动前的 calculate_student_tags（每条录取记录重新转换关键词列表），用于对比耗时和校验结果；
+    只改了一处：testName 缺失时按空字符串处理（原实现会抛出异常）
+
+    基于学生数据计算适用的标签(tags)
+    
+    此函数根据学生的学术成绩、录取学校和奖学金情况，判断学生是否符合以下标签：
+    - 奖学金：学生获得了任何形式的奖学金
+    - 低分逆袭：学生GPA或语言成绩偏低，但被排名前100的大学录取
+    - 低龄留学：学生被K12级别的学校录取
+    
+    Args:
+        student_data (dict): 包含学生信息的字典(处理后的数据)，包括:
+            - gpaValue: GPA成绩值
+            - testScores: 考试成绩列表
+            - admissions: 录取学校列表
+        
+    Returns:
+        str or None: 加号分隔的标签字符串，如果没有任何适用标签则返回None
+    """
+    # 存储识别出的所有适用标签
+    tags = []
+    
+    # 提取关键数据，用于后续标签判断
+    resume_data = student_data.get("resume_analysis", {})
+    education = resume_data.get("education", {})
+    gpa_value = education.get("gpaValue")  # 从education中获取GPA成绩
+    test_scores = resume_data.get("testScores", [])  # 从resume_analysis中获取语言和标准化考试成绩
+    
+    # 从offer_analyses中提取admissions信息
+    admissions = []
+    for offer in student_data.get("offer_analyses", []):
+        admissions.extend(offer.get("admissions", []))
+    
+    #--------------------------------------------------
+    # 1. 判断'奖学金'标签
+    #--------------------------------------------------
+    # 只要任何一所学校提供了奖学金，就添加"奖学金"标签
+    has_scholarship = False
+    for adm in admissions:
+        # 检查hasScholarship字段为true或scholarshipAmount字段非空
+        if adm.get("hasScholarship") == True or adm.get("scholarshipAmount"):
+            has_scholarship = True
+            break
+    
+    if has_scholarship:
+        tags.append("奖学金")
+    
+    #--------------------------------------------------
+    # 2. 判断'低分逆袭'标签
+    #--------------------------------------------------
+    # 低分逆袭需要同时满足两个条件：1) 成绩较低 2) 录取学校排名好
+    low_score = False  # 标记成绩是否较低
+    good_ranking = False  # 标记是否有排名好的学校录取
+    
+    # 2.1 检查GPA是否低于3.2
+    if gpa_value and isinstance(gpa_value, (int, float, str)):
+        try:
+            # 尝试将GPA转换为浮点数进行比较
+            gpa = float(gpa_value)
+            if gpa < 3.2:  # GPA低于3.2被视为"低分"
+                low_score = True
+        except (ValueError, TypeError):
+            pass  # 忽略无法转换为数字的GPA
+    
+    # 2.2 检查语言成绩是否低
+    for test in test_scores:
+        test_name = str(test.get("testName") or "").lower()  # 获取考试名称并转小写
+        test_score = test.get("testScore")  # 获取考试分数
+        
+        if test_score and isinstance(test_score, (int, float, str)):
+            try:
+                # 处理可能的格式: "总分: 88"或直接数字
+                score_str = str(test_score)
+                # 如果包含冒号，提取冒号后的数字部分
+                score_val = float(score_str.split(":")[-1].strip() if ":" in score_str else score_str)
+                
+                # 检查托福分数是否低于90
+                if ("托福" in test_name or "toefl" in test_name) and score_val < 90:
+                    low_score = True
+                # 检查雅思分数是否低于6.5
+                elif ("雅思" in test_name or "ielts" in test_name) and score_val < 6.5:
+                    low_score = True
+            except (ValueError, TypeError):
+                pass  # 忽略无法解析的分数
+    
+    # 2.3 检查是否有排名前100的学校录取
+    for adm in admissions:
+        ranking = adm.get("rankingValue")  # 获取学校排名
+        if ranking and isinstance(ranking, (int, float, str)):
+            try:
+                # 尝试将排名转换为浮点数
+                rank_val = float(ranking)
+                if rank_val < 100:  # 排名小于100被视为"好学校"
+                    good_ranking = True
+                    break
+            except (ValueError, TypeError):
+                pass  # 忽略无法转换为数字的排名
+    
+    # 如果同时满足"成绩较低"和"学校排名好"两个条件，添加"低分逆袭"标签
+    if low_score and good_ranking:
+        tags.append("低分逆袭")
+    
+    #--------------------------------------------------
+    # 3. 判断'低龄留学'标签
+    #--------------------------------------------------
+    # K12相关的关键词列表，用于识别K12学校
+    k12_keywords = ["K12", "k12", "High School", "high school", "Middle School", 
+                   "middle school", "小学", "中学", "高中", "Elementary", "Secondary",
+                   "Preparatory", "Prep", "Academy", "Day School", "Grammar School", 
+                   "Primary", "Junior"]
+    
+    # "The X School"模式的正则表达式
+    the_x_school_pattern = r"^the\s+[\w\s\-']+\s+school$"
+    
+    has_k12_school = False
+    
+    # 遍历所有录取学校
+    for adm in admissions:
+        # 首先检查是否为OTHER类型 - 这是K12学校的必要条件
+        if adm.get("degreeType") == "OTHER":
+            # 获取学校名称和项目名称
+            school = str(adm.get("school", "")).lower()
+            program = str(adm.get("program", "")).lower()
+            
+            # 方法1: 检查学校名称或项目名称中是否包含K12相关关键词
+            for keyword in k12_keywords:
+                if keyword.lower() in school or keyword.lower() in program:
+                    has_k12_school = True
+                    break
+            
+            # 如果关键词检查没有找到匹配，尝试其他模式匹配
+            if not has_k12_school:
+                # 方法2: 检查是否符合"The X School"模式且不含"University"或"College"
+                if (school.startswith("the ") and school.endswith(" school") and 
+                    "university" not in school and "college" not in school):
+                    has_k12_school = True
+                
+                # 方法3: 检查degreeType为OTHER，同时也缺少排名信息和专业具体信息可能是K12
+                elif (adm.get("degreeType") == "OTHER" and 
+                     (not adm.get("rankingValue") or not adm.get("rankingType")) and
+                     (program == "专业未定" or program == "无专业" or "general" in program.lower())):
+                    has_k12_school = True
+            
+            # 如果已确定是K12学校，添加标签并跳出循环
+            if has_k12_school:
+                tags.append("低龄留学")
+                break
+    
+    # 返回结果：如果有标签则返回加号分隔的标签字符串，否则返回None
+    return "+".join(tags) if tags else None
+
+
+def generate_students(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """生成覆盖各种取值（空值、字符串分数、无法解析的值）的学生数据"""
+    rng = random.Random(seed)
+    students = []
+    for _ in range(count):
+        admissions = [{
+            "school": rng.choice(SCHOOLS),
+            "program": rng.choice(PROGRAMS),
+            "degreeType": rng.choice(DEGREE_TYPES),
+            "rankingValue": rng.choice(RANKINGS),
+            "rankingType": rng.choice(["QS", "US News", None]),
+            "hasScholarship": rng.choice([True, False, None, 1]),
+            "scholarshipAmount": rng.choice([None, "", "$5,000", 0]),
+        } for _ in range(rng.randint(0, 5))]
+        students.append({
+            "resume_analysis": {
+                "education": {"gpaValue": rng.choice(GPAS)},
+                "testScores": [{"testName": rng.choice(TEST_NAMES), "testScore": rng.choice(SCORES)}
+                               for _ in range(rng.randint(0, 3))],
+            },
+            "offer_analyses": [{"admissions": admissions}],
+        })
+    return students
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='对比改动前后逐个计算学生标签的速度，并校验结果一致')
+    parser.add_argument('--count', type=int, default=10000, help='学生数量')
+    parser.add_argument('--rounds', type=int, default=5, help='重复次数，取最快的一次')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    return parser.parse_args()
+
+
+def best_of(func, students: List[Dict[str, Any]], rounds: int):
+    """重复计算rounds次，返回(结果, 最快一次的秒数)"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = [func(s) for s in students]
+        best = min(best, time.perf_counter() - start)
+    return results, best
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    students = generate_students(args.count, args.seed)
+
+    legacy, legacy_seconds = best_of(legacy_calculate_student_tags, students, args.rounds)
+    current, current_seconds = best_of(calculate_student_tags, students, args.rounds)
+
+    mismatches = sum(1 for a, b in zip(legacy, current) if a != b)
+    tagged = sum(1 for t in current if t)
+    print(f"学生: {len(students)} 个，有标签: {tagged} 个")
+    print(f"改动前: {legacy_seconds * 1000:.1f}ms")
+    print(f"改动后: {current_seconds * 1000:.1f}ms（{legacy_seconds / current_seconds:.1f}x）")
+    print(f"结果不一致: {mismatches} 个")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
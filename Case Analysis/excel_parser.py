@@ -1,22 +1,173 @@
 import pandas as pd
 import numpy as np
 import os
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, Tuple, Union
+from token_budget import estimate_tokens, estimate_tokens_array
+
+# 超过该大小的xlsx/xlsm文件提取单行时用openpyxl只读模式流式读取，不把整个工作表载入内存
+STREAMING_ROW_THRESHOLD = 20 * 1024 * 1024
+
+# 支持流式读取单行的文件类型（openpyxl只读模式）
+STREAMING_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# 默认展示的最大行数
+DEFAULT_MAX_ROWS = 20
+
+
+def _has_value(row: Tuple[Any, ...]) -> bool:
+    """行中是否有非空单元格（与pandas一致，空字符串也视为空）"""
+    return any(value is not None and value != "" for value in row)
+
+
+def _header_names(header: Tuple[Any, ...], width: int) -> List[Any]:
+    """
+    按pandas的规则生成列名：空表头为 "Unnamed: 序号"，重复列名依次加 ".1"、".2"
+
+    Args:
+        header: 表头行的单元格值
+        width: 列数
+
+    Returns:
+        列名列表
+    """
+    names = []
+    seen: Dict[Any, int] = {}
+    for i in range(width):
+        name = header[i] if i < len(header) and header[i] is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+class _CachedWorkbook:
+    """一个工作簿的缓存：文件句柄只打开一次，每个工作表只解析一次"""
+
+    def __init__(self, path: str, ext: str):
+        self.path = path
+        self.is_csv = ext == '.csv'
+        self._excel_file = None if self.is_csv else pd.ExcelFile(path)
+        self._sheets: Dict[Any, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def sheet_names(self) -> List[Any]:
+        """工作表名称列表（CSV视为只有一个工作表）"""
+        return [None] if self.is_csv else self._excel_file.sheet_names
+
+    def sheet(self, sheet_name: Any = None) -> pd.DataFrame:
+        """
+        返回工作表的DataFrame，首次访问时解析
+
+        Args:
+            sheet_name: 工作表名称，CSV文件忽略
+
+        Returns:
+            工作表数据（调用方不应修改）
+        """
+        key = None if self.is_csv else sheet_name
+        with self._lock:
+            if key not in self._sheets:
+                if self.is_csv:
+                    self._sheets[key] = pd.read_csv(self.path)
+                else:
+                    self._sheets[key] = self._excel_file.parse(sheet_name=key)
+            return self._sheets[key]
+
+    def close(self):
+        """关闭文件句柄"""
+        if self._excel_file is not None:
+            self._excel_file.close()
+
 
 class ExcelParser:
     """Excel文件解析工具"""
     
-    def __init__(self):
-        """初始化Excel解析器"""
-        pass
+    def __init__(self, cache_size: int = 8, streaming_threshold: Optional[int] = STREAMING_ROW_THRESHOLD):
+        """
+        初始化Excel解析器
+        
+        Args:
+            cache_size: 最多缓存的工作簿数量（按文件路径、修改时间和大小区分，文件修改后自动重新读取）
+            streaming_threshold: 提取单行时，未缓存且超过该字节数的xlsx/xlsm文件改用流式读取；None表示不使用流式读取
+        """
+        self.cache_size = cache_size
+        self.streaming_threshold = streaming_threshold
+        self._workbooks: "OrderedDict[Tuple[str, int, int], _CachedWorkbook]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _cache_key(excel_path: str) -> Tuple[str, int, int]:
+        stat = os.stat(excel_path)
+        return os.path.abspath(excel_path), stat.st_mtime_ns, stat.st_size
+    
+    def _workbook(self, excel_path: str, ext: str) -> _CachedWorkbook:
+        """
+        获取工作簿缓存，不存在时打开文件并放入缓存
+        
+        Args:
+            excel_path: 文件路径
+            ext: 小写的文件扩展名
+            
+        Returns:
+            工作簿缓存
+        """
+        key = self._cache_key(excel_path)
+        with self._lock:
+            workbook = self._workbooks.get(key)
+            if workbook is not None:
+                self._workbooks.move_to_end(key)
+                return workbook
+        
+        workbook = _CachedWorkbook(excel_path, ext)
+        if self.cache_size <= 0:
+            return workbook
+        with self._lock:
+            if key in self._workbooks:
+                # 其他线程已经打开了同一个文件
+                workbook.close()
+                self._workbooks.move_to_end(key)
+                return self._workbooks[key]
+            # 同一路径的旧版本（文件已修改）不会再被命中，直接移除
+            for stale in [k for k in self._workbooks if k[0] == key[0]]:
+                self._workbooks.pop(stale).close()
+            self._workbooks[key] = workbook
+            while len(self._workbooks) > self.cache_size:
+                _, evicted = self._workbooks.popitem(last=False)
+                evicted.close()
+        return workbook
+    
+    def clear_cache(self):
+        """清空工作簿缓存并关闭文件句柄"""
+        with self._lock:
+            for workbook in self._workbooks.values():
+                workbook.close()
+            self._workbooks.clear()
+    
+    def _should_stream(self, excel_path: str, ext: str) -> bool:
+        """提取单行时是否使用流式读取：文件很大且尚未缓存"""
+        if self.streaming_threshold is None or ext not in STREAMING_EXTENSIONS:
+            return False
+        if os.path.getsize(excel_path) < self.streaming_threshold:
+            return False
+        with self._lock:
+            return self._cache_key(excel_path) not in self._workbooks
         
-    def extract_data(self, excel_path: str, sheet_name: Optional[str] = None) -> str:
+    def extract_data(self, excel_path: str, sheet_name: Optional[str] = None,
+                     max_rows: Optional[int] = DEFAULT_MAX_ROWS, token_budget: Optional[int] = None) -> str:
         """
         从Excel文件中提取数据
         
         Args:
             excel_path: Excel文件路径
             sheet_name: 工作表名称，如果不指定则读取第一个工作表
+            max_rows: 最多展示的行数，None表示全部
+            token_budget: 文本的token预算，指定时从全部行中挑选信息量最高的行（忽略max_rows）
             
         Returns:
             提取的文本内容，格式化为便于处理的文本
@@ -33,29 +184,29 @@ class ExcelParser:
             
             # 对CSV文件特殊处理
             if ext.lower() == '.csv':
-                df = pd.read_csv(excel_path)
-                text_content = self._dataframe_to_text(df)
+                df = self._workbook(excel_path, '.csv').sheet()
+                text_content = self._dataframe_to_text(df, max_rows, token_budget)
                 return text_content
             
-            # 读取Excel文件
+            # 读取Excel文件（工作簿只打开一次，已解析的工作表直接复用）
             try:
+                workbook = self._workbook(excel_path, ext.lower())
                 if sheet_name:
-                    df = pd.read_excel(excel_path, sheet_name=sheet_name)
+                    df = workbook.sheet(sheet_name)
                 else:
                     # 尝试列出所有工作表
-                    excel_file = pd.ExcelFile(excel_path)
-                    sheet_names = excel_file.sheet_names
+                    sheet_names = workbook.sheet_names
                     
                     if not sheet_names:
                         return "错误: Excel文件中没有找到工作表"
                     
                     # 默认使用第一个工作表
-                    df = pd.read_excel(excel_path, sheet_name=sheet_names[0])
+                    df = workbook.sheet(sheet_names[0])
                     
                     # 如果只读取了表头，尝试读取其他工作表
                     if len(df) == 0 and len(sheet_names) > 1:
                         for name in sheet_names[1:]:
-                            temp_df = pd.read_excel(excel_path, sheet_name=name)
+                            temp_df = workbook.sheet(name)
                             if len(temp_df) > 0:
                                 df = temp_df
                                 break
@@ -67,7 +218,7 @@ class ExcelParser:
                 return "错误: Excel文件中没有数据"
                 
             # 将DataFrame转换为文本格式
-            text_content = self._dataframe_to_text(df)
+            text_content = self._dataframe_to_text(df, max_rows, token_budget)
             
             return text_content
         except Exception as e:
@@ -95,23 +246,27 @@ class ExcelParser:
             if ext.lower() not in ['.xls', '.xlsx', '.xlsm', '.csv']:
                 return f"错误: 不支持的文件类型 - {ext}", 0
             
-            # 读取Excel文件
+            # 很大的文件只流式读取需要的那一行
+            if self._should_stream(excel_path, ext.lower()):
+                return self._stream_row(excel_path, row_index, sheet_name)
+            
+            # 读取Excel文件（同一文件的后续行直接从缓存的工作表中取）
             df = None
             try:
+                workbook = self._workbook(excel_path, ext.lower())
                 if ext.lower() == '.csv':
-                    df = pd.read_csv(excel_path)
+                    df = workbook.sheet()
                 elif sheet_name:
-                    df = pd.read_excel(excel_path, sheet_name=sheet_name)
+                    df = workbook.sheet(sheet_name)
                 else:
                     # 尝试列出所有工作表
-                    excel_file = pd.ExcelFile(excel_path)
-                    sheet_names = excel_file.sheet_names
+                    sheet_names = workbook.sheet_names
                     
                     if not sheet_names:
                         return "错误: Excel文件中没有找到工作表", 0
                     
                     # 默认使用第一个工作表
-                    df = pd.read_excel(excel_path, sheet_name=sheet_names[0])
+                    df = workbook.sheet(sheet_names[0])
             except Exception as e:
                 return f"读取Excel文件时出错: {str(e)}", 0
             
@@ -134,6 +289,136 @@ class ExcelParser:
         except Exception as e:
             return f"解析Excel行数据时出错: {str(e)}", 0
     
+    def _stream_row(self, excel_path: str, row_index: int = 0, sheet_name: Optional[str] = None) -> Tuple[str, int]:
+        """
+        用openpyxl只读模式流式提取指定行，内存占用与工作表大小无关
+        
+        Args:
+            excel_path: xlsx/xlsm文件路径
+            row_index: 要提取的行索引（0表示第一行数据，不含表头）
+            sheet_name: 工作表名称，如果不指定则读取第一个工作表
+            
+        Returns:
+            (提取的文本内容，总行数) 元组，格式与 extract_row 相同
+        """
+        from openpyxl import load_workbook
+        
+        try:
+            workbook = load_workbook(excel_path, read_only=True, data_only=True)
+        except Exception as e:
+            return f"读取Excel文件时出错: {str(e)}", 0
+        
+        try:
+            if sheet_name:
+                if sheet_name not in workbook.sheetnames:
+                    return f"读取Excel文件时出错: Worksheet named '{sheet_name}' not found", 0
+                sheet = workbook[sheet_name]
+            else:
+                if not workbook.sheetnames:
+                    return "错误: Excel文件中没有找到工作表", 0
+                sheet = workbook[workbook.sheetnames[0]]
+            
+            # 总行数算到最后一个有值的行（与pandas一致，不计末尾只设置了格式的空行，
+            # 工作表尺寸信息max_row会计入这些行），在同一遍扫描中计数并取出表头和目标行
+            header, values, last_row = None, None, 0
+            for row_number, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+                if row_number == 1:
+                    header = row
+                elif row_number == row_index + 2:
+                    values = row
+                if _has_value(row):
+                    last_row = row_number
+            total_rows = max(last_row - 1, 0)
+            
+            if header is None or total_rows == 0:
+                return "错误: Excel文件中没有数据", 0
+            if row_index < 0 or row_index >= total_rows:
+                return f"错误: 行索引 {row_index} 超出范围，文件共有 {total_rows} 行数据", total_rows
+            
+            # 去掉末尾的空单元格，列数与pandas读取时一致
+            header = tuple(header)
+            while header and header[-1] is None:
+                header = header[:-1]
+            values = list(values or ())
+            while values and values[-1] is None:
+                values.pop()
+            width = max(len(header), len(values))
+            values += [None] * (width - len(values))
+            row_df = pd.DataFrame([values], columns=_header_names(header, width))
+            
+            return self._row_to_text(row_df, row_index), total_rows
+        except Exception as e:
+            return f"解析Excel行数据时出错: {str(e)}", 0
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _format_value(value: Any) -> Optional[str]:
+        """
+        格式化单个单元格：空值返回None，整数值的浮点数去掉小数部分
+        
+        Args:
+            value: 单元格的值
+            
+        Returns:
+            文本，空值返回None
+        """
+        # 跳过NaN值
+        if not pd.notna(value):
+            return None
+        # 处理各种数据类型
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            if value == int(value):  # 检查是否为整数值的浮点数
+                return str(int(value))
+            return str(value)
+        # 其他类型（包括列表、字典等复杂类型）转换为字符串
+        return str(value)
+    
+    def _format_column(self, column: pd.Series, bool_as_int: bool = True) -> np.ndarray:
+        """
+        按 _format_value 的规则格式化整列，数值列用向量化运算
+        
+        Args:
+            column: 一列数据
+            bool_as_int: 布尔值是否按整数输出（"1"/"0"）。逐行读取混合类型的表格时布尔值会被当作整数，
+                只有全部列都是布尔类型时才保持 "True"/"False"
+            
+        Returns:
+            文本数组（object类型），空值为None
+        """
+        values = column.to_numpy()
+        result = np.full(len(values), None, dtype=object)
+        if pd.api.types.is_bool_dtype(column.dtype) and values.dtype == bool:
+            result[:] = np.where(values, "1", "0") if bool_as_int else np.where(values, "True", "False")
+        elif pd.api.types.is_integer_dtype(column.dtype) and values.dtype.kind in "iu":
+            result[:] = values.astype(str)
+        elif (pd.api.types.is_datetime64_dtype(column.dtype) and column.dt.tz is None
+              and not (column.dt.microsecond.any() or column.dt.nanosecond.any())):
+            # 没有时区和秒以下部分时，与 str(Timestamp) 的格式相同
+            present = column.notna().to_numpy()
+            result[present] = column[present].dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy(dtype=object)
+        elif pd.api.types.is_float_dtype(column.dtype) and values.dtype.kind == "f":
+            present = ~np.isnan(values)
+            # 整数值的浮点数输出为整数；超出int64范围的少数值交给Python处理
+            whole = present & np.isfinite(values) & (values == np.floor(values))
+            small = whole & (np.abs(values) < 2 ** 62)
+            result[small] = values[small].astype(np.int64).astype(str)
+            fraction = present & ~whole
+            result[fraction] = values[fraction].astype(str)
+            for i in np.flatnonzero(present & ~small & ~fraction):
+                result[i] = self._format_value(float(values[i]))
+        else:
+            values = column.astype(object).to_numpy()
+            if pd.api.types.infer_dtype(values, skipna=True) == "string":
+                # 字符串列（可含空值）直接使用原值
+                present = pd.notna(values)
+                result[present] = values[present]
+            else:
+                # 混合类型逐个格式化
+                for i, value in enumerate(values):
+                    result[i] = self._format_value(value)
+        return result
+    
     def _row_to_text(self, row_df: pd.DataFrame, row_index: int) -> str:
         """
         将单行DataFrame转换为文本格式
@@ -155,41 +440,60 @@ class ExcelParser:
         # 处理行数据
         row = row_df.iloc[0]  # 获取第一行（唯一的一行）
         for col_name in row_df.columns:
-            value = row[col_name]
+            formatted_value = self._format_value(row[col_name])
             # 跳过NaN值
-            if pd.notna(value):
-                # 处理各种数据类型
-                if isinstance(value, (int, float)):
-                    if value == int(value):  # 检查是否为整数值的浮点数
-                        formatted_value = str(int(value))
-                    else:
-                        formatted_value = str(value)
-                elif isinstance(value, (np.integer, np.floating)):
-                    if value == int(value):
-                        formatted_value = str(int(value))
-                    else:
-                        formatted_value = str(value)
-                elif isinstance(value, (list, dict)):
-                    # 转换复杂类型为字符串
-                    formatted_value = str(value)
-                else:
-                    formatted_value = str(value)
-                    
+            if formatted_value is not None:
                 text_lines.append(f"  {col_name}: {formatted_value}")
         
         return "\n".join(text_lines)
     
-    def _dataframe_to_text(self, df: pd.DataFrame) -> str:
+    def _render_cells(self, df: pd.DataFrame, bool_as_int: bool) -> Dict[Any, np.ndarray]:
+        """
+        将每列格式化为 "  列名: 值\n" 形式的文本数组，空值为空字符串
+        
+        Args:
+            df: 要渲染的数据
+            bool_as_int: 见 _format_column
+            
+        Returns:
+            列名 -> 文本数组
+        """
+        cells = {}
+        for position, col_name in enumerate(df.columns):
+            values = self._format_column(df.iloc[:, position], bool_as_int)
+            present = values != None  # noqa: E711  逐元素比较
+            rendered = np.full(len(values), "", dtype=object)
+            rendered[present] = f"  {col_name}: " + values[present] + "\n"
+            cells[col_name] = rendered
+        return cells
+    
+    @staticmethod
+    def _join_rows(cells: List[np.ndarray], row_numbers: np.ndarray) -> List[str]:
+        """把各列的单元格文本按行拼接成 "行 N:" 开头的文本块"""
+        blocks = np.array([f"行 {n}:\n" for n in row_numbers], dtype=object)
+        for column_cells in cells:
+            blocks = blocks + column_cells
+        return blocks.tolist()
+    
+    def _dataframe_to_text(self, df: pd.DataFrame, max_rows: Optional[int] = DEFAULT_MAX_ROWS,
+                           token_budget: Optional[int] = None) -> str:
         """
         将DataFrame转换为文本格式
         
+        按列向量化格式化后再按行拼接，输出与逐行逐格格式化相同。
+        
         Args:
             df: Pandas DataFrame对象
+            max_rows: 最多展示的行数，None表示全部
+            token_budget: token预算，指定时改用 _dataframe_to_budgeted_text 挑选行（忽略max_rows）
             
         Returns:
             文本表示，每行是"列名: 值"的格式
         """
         try:
+            if token_budget is not None:
+                return self._dataframe_to_budgeted_text(df, token_budget)
+            
             text_lines = []
             
             # 添加列名作为标题
@@ -198,39 +502,98 @@ class ExcelParser:
             text_lines.append(f"列名: {', '.join(df.columns.astype(str))}")
             text_lines.append("")
             
-            # 处理每一行数据
-            for idx, row in df.iterrows():
-                text_lines.append(f"行 {idx+1}:")
-                for col_name in df.columns:
-                    value = row[col_name]
-                    # 跳过NaN值
-                    if pd.notna(value):
-                        # 处理各种数据类型
-                        if isinstance(value, (int, float)):
-                            if value == int(value):  # 检查是否为整数值的浮点数
-                                formatted_value = str(int(value))
-                            else:
-                                formatted_value = str(value)
-                        elif isinstance(value, (np.integer, np.floating)):
-                            if value == int(value):
-                                formatted_value = str(int(value))
-                            else:
-                                formatted_value = str(value)
-                        elif isinstance(value, (list, dict)):
-                            # 转换复杂类型为字符串
-                            formatted_value = str(value)
-                        else:
-                            formatted_value = str(value)
-                            
-                        text_lines.append(f"  {col_name}: {formatted_value}")
-                        
-                text_lines.append("")  # 空行分隔每行数据
-                
-                # 如果数据量太大，只展示前20行
-                if idx >= 19 and len(df) > 20:
-                    text_lines.append(f"... 已省略剩余 {len(df) - 20} 行数据 ...")
-                    break
-                    
-            return "\n".join(text_lines)
+            shown = df if max_rows is None else df.iloc[:max_rows]
+            bool_as_int = not all(pd.api.types.is_bool_dtype(dtype) for dtype in df.dtypes)
+            cells = self._render_cells(shown, bool_as_int)
+            blocks = self._join_rows(list(cells.values()), np.arange(1, len(shown) + 1))
+            
+            parts = ["\n".join(text_lines)] + blocks
+            # 如果数据量太大，只展示前max_rows行
+            if len(shown) < len(df):
+                parts.append(f"... 已省略剩余 {len(df) - len(shown)} 行数据 ...")
+            return "\n".join(parts)
         except Exception as e:
-            return f"格式化DataFrame时出错: {str(e)}" 
\ No newline at end of file
+            return f"格式化DataFrame时出错: {str(e)}"
+    
+    def _dataframe_to_budgeted_text(self, df: pd.DataFrame, token_budget: int) -> str:
+        """
+        在token预算内挑选信息量最高的行和列转换为文本
+        
+        - 全部为空的列不输出；所有行取值相同的列只在开头列出一次
+        - 单行平均占用超过预算的1/4时，依次去掉信息量/token比最低的列
+        - 每行的信息量为各单元格取值稀有度（1/该值在本列出现次数）之和，
+          按信息量从高到低选取直到用完预算，输出时按原顺序排列
+        
+        Args:
+            df: Pandas DataFrame对象
+            token_budget: 输出文本的token预算（估算值）
+            
+        Returns:
+            文本表示
+        """
+        total = len(df)
+        bool_as_int = not all(pd.api.types.is_bool_dtype(dtype) for dtype in df.dtypes)
+        
+        constants = []
+        columns = []  # (列名, 单元格文本, 每行token数, 每行信息量)
+        for position, col_name in enumerate(df.columns):
+            column = df.iloc[:, position]
+            values = self._format_column(column, bool_as_int)
+            present = values != None  # noqa: E711
+            if not present.any():
+                continue
+            codes, uniques = pd.factorize(values)
+            if present.all() and len(uniques) == 1:
+                constants.append(f"{col_name}={uniques[0]}")
+                continue
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            information = np.zeros(total)
+            information[present] = 1.0 / counts[codes[present]]
+            prefix = f"  {col_name}: "
+            rendered = np.full(total, "", dtype=object)
+            rendered[present] = prefix + values[present] + "\n"
+            # 列名可能是中文，单独估算；值只对去重后的取值估算一次，数值列的值都是ASCII
+            ascii_only = pd.api.types.is_numeric_dtype(column.dtype)
+            value_tokens = estimate_tokens_array(uniques, ascii_only=ascii_only)
+            tokens = np.zeros(total)
+            tokens[present] = estimate_tokens(prefix) + value_tokens[codes[present]] + 0.25
+            columns.append((col_name, rendered, tokens, information))
+        
+        text_lines = [
+            "Excel数据内容：",
+            f"总行数: {total}",
+            f"列名: {', '.join(df.columns.astype(str))}",
+        ]
+        if constants:
+            text_lines.append(f"所有行取值相同的列: {', '.join(constants)}")
+        
+        # 每行开头 "行 N:" 和结尾空行的token数
+        header_tokens = 1 + (np.floor(np.log10(np.arange(1, total + 1))) + 5) / 4
+        
+        # 单行太长时去掉性价比最低的列，保证预算内至少能放下几行
+        dropped = []
+        while len(columns) > 1:
+            row_tokens = sum(tokens for _, _, tokens, _ in columns) + header_tokens
+            if row_tokens.mean() <= token_budget / 4:
+                break
+            ratios = [information.sum() / max(tokens.sum(), 1.0) for _, _, tokens, information in columns]
+            col_name = columns.pop(int(np.argmin(ratios)))[0]
+            dropped.append(str(col_name))
+        if dropped:
+            text_lines.append(f"因token预算省略的列: {', '.join(dropped)}")
+        
+        # 按信息量从高到低（相同时按原顺序）累计token，取预算内的前缀
+        remaining = token_budget - estimate_tokens("\n".join(text_lines)) - 40
+        row_tokens = sum((tokens for _, _, tokens, _ in columns), header_tokens)
+        row_information = sum((information for _, _, _, information in columns), np.zeros(total))
+        order = np.lexsort((np.arange(total), -row_information))
+        fits = np.cumsum(row_tokens[order]) <= remaining
+        selected = np.sort(order[:int(fits.sum())] if fits.all() else order[:int(np.argmin(fits))])
+        
+        text_lines.append(f"按token预算选取 {len(selected)}/{total} 行（优先保留取值少见、信息多的行，按原顺序排列）")
+        text_lines.append("")
+        blocks = self._join_rows([rendered[selected] for _, rendered, _, _ in columns], selected + 1)
+        parts = ["\n".join(text_lines)] + blocks
+        if len(selected) < total:
+            parts.append(f"... 已省略其余 {total - len(selected)} 行数据 ...")
+        return "\n".join(parts)
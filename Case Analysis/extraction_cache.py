@@ -0,0 +1,92 @@
+import os
+import gzip
+import threading
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 默认缓存目录：脚本所在目录下的 .cache/extracted
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "extracted"
+
+
+def bytes_digest(data: bytes) -> str:
+    """返回字节内容的SHA-256"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """分块读取文件并返回SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """PDF提取结果的磁盘缓存 - 按文件内容哈希和解析器版本存储压缩后的文本"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，默认 .cache/extracted
+        """
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, digest: str, parser_id: str) -> Path:
+        # 同一文件在不同解析器/版本下分别缓存；按哈希前两位分目录，避免单个目录文件过多
+        key = hashlib.sha256(f"{digest}:{parser_id}".encode("utf-8")).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.json.gz"
+
+    def get(self, digest: str, parser_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Args:
+            digest: PDF内容的SHA-256
+            parser_id: 解析器标识（类名、版本和后端）
+
+        Returns:
+            缓存的记录（包含 content 和 extraction），未命中返回None
+        """
+        path = self._path(digest, parser_id)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            # 缓存文件损坏时当作未命中，稍后会被覆盖
+            print(f"读取提取缓存失败: {path}: {str(e)}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def put(self, digest: str, parser_id: str, record: Dict[str, Any]):
+        """
+        写入缓存（先写临时文件再替换，并发写入时不会读到半个文件）
+
+        Args:
+            digest: PDF内容的SHA-256
+            parser_id: 解析器标识
+            record: 要缓存的记录
+        """
+        path = self._path(digest, parser_id)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # 目录只读等情况下不影响提取本身
+            print(f"写入提取缓存失败: {path}: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
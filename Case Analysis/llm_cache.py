@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 默认缓存位置：脚本所在目录下的 .cache
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".cache" / "llm_cache.db"
+
+
+def make_cache_key(model_name: str, prompt_template: str, document_text: str) -> str:
+    """
+    生成缓存键：(模型名, 提示词模板哈希, 文档文本哈希)
+
+    Args:
+        model_name: 模型名称
+        prompt_template: 不含文档内容的提示词模板（模板变化时缓存自动失效）
+        document_text: 文档文本
+
+    Returns:
+        缓存键
+    """
+    template_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+    text_hash = hashlib.sha256(document_text.encode("utf-8")).hexdigest()
+    return f"{model_name}:{template_hash}:{text_hash}"
+
+
+class LLMResponseCache:
+    """LLM解析结果的磁盘缓存 - SQLite存储，按总大小做LRU淘汰"""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 100 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            path: SQLite文件路径，默认 .cache/llm_cache.db
+            max_bytes: 缓存内容总大小上限，超出时淘汰最久未使用的条目
+        """
+        self.path = str(path or DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的解析结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            解析后的JSON结果，未命中返回None
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        # 每次返回新的对象，调用方修改结果不会影响缓存
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """
+        写入解析结果，并在超出大小上限时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 解析后的JSON结果
+        """
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for old_key, old_size in conn.execute(
+                "SELECT key, size FROM llm_cache WHERE key != ? ORDER BY last_access", (key,)
+            ).fetchall():
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (old_key,))
+                self.evictions += 1
+                total -= old_size
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计
+
+        Returns:
+            命中/未命中/淘汰次数、命中率、条目数和总大小
+        """
+        with self._lock, self._connect() as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": total,
+        }
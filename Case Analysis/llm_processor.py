@@ -1,16 +1,33 @@
 import os
 import json
+import time
 import requests
 import asyncio
+import inspect
+import weakref
+import threading
 import aiohttp
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
 from config_loader import load_api_config
+from rate_limiter import get_rate_limiter, retry_delay
+from llm_cache import LLMResponseCache, make_cache_key
+from stream_json import SSEJSONStream, validate_analysis
+from token_budget import estimate_tokens
+from prompt_budget import DEFAULT_DOCUMENT_TOKENS, DEFAULT_MAX_CHUNKS, document_budget, plan_document, merge_analyses
 import re
 
+# 需要重试的HTTP状态码：限流和服务端临时错误
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 class LLMProcessor:
     """简单的LLM处理器 - 使用OpenAI API直接与LLM交互"""
     
-    def __init__(self, api_key: Optional[str] = None, api_base: Optional[str] = None, model_name: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, api_base: Optional[str] = None, model_name: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, requests_per_minute: Optional[float] = None,
+                 max_retries: Optional[int] = None, cache: Optional[LLMResponseCache] = None,
+                 enable_cache: Optional[bool] = None, max_document_tokens: Optional[int] = None,
+                 max_chunks: Optional[int] = None):
         """
         初始化LLM处理器
         
@@ -18,6 +35,14 @@ class LLMProcessor:
             api_key: OpenAI API密钥，如果为None则尝试从环境变量OPENAI_API_KEY或api_config.json获取
             api_base: API基础URL，如果为None则尝试从api_config.json获取，否则使用OpenAI默认URL
             model_name: 模型名称，如果为None则尝试从api_config.json获取，否则使用gpt-3.5-turbo
+            max_concurrency: 异步请求的并发上限，默认取api_config.json的MAX_CONCURRENCY，否则为4
+            requests_per_minute: 每个API密钥每分钟的请求上限，默认取REQUESTS_PER_MINUTE，否则为60
+            max_retries: 429/5xx/网络错误的最大重试次数，默认取MAX_RETRIES，否则为3
+            cache: 解析结果缓存，默认按LLM_CACHE_PATH/LLM_CACHE_MAX_MB配置创建
+            enable_cache: 是否启用缓存，默认取LLM_CACHE_ENABLED，否则启用
+            max_document_tokens: 单次调用中文档文本的tokens上限（同时受模型上下文长度限制），
+                                 默认取MAX_DOCUMENT_TOKENS，否则为12000
+            max_chunks: 超出上限的文档最多拆成几块并行抽取后合并，默认取MAX_CHUNKS，否则为4；为1时只裁剪不拆分
         """
         # 加载配置
         config = load_api_config()
@@ -36,34 +61,63 @@ class LLMProcessor:
         # 检查是否使用OpenRouter
         self.is_openrouter = "openrouter.ai" in self.api_base
         
+        # 并发、限流与重试设置
+        self.max_concurrency = int(max_concurrency or config.get("MAX_CONCURRENCY") or 4)
+        self.requests_per_minute = float(requests_per_minute or config.get("REQUESTS_PER_MINUTE") or 60)
+        self.max_retries = int(max_retries if max_retries is not None else config.get("MAX_RETRIES", 3))
+        self._rate_limiter = get_rate_limiter(self.api_key, self.requests_per_minute)
+        
+        # 提示词预算：过长的文档去重、裁剪或拆块
+        self.max_document_tokens = int(max_document_tokens or config.get("MAX_DOCUMENT_TOKENS") or DEFAULT_DOCUMENT_TOKENS)
+        self.max_chunks = int(max_chunks or config.get("MAX_CHUNKS") or DEFAULT_MAX_CHUNKS)
+        
+        # 长连接：同步请求复用requests.Session；异步会话和信号量绑定在事件循环上，每个循环一份，按需创建
+        self._http = requests.Session()
+        self._async_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+        
+        # 解析结果缓存：相同模型、相同提示词模板、相同文档文本时直接复用
+        if enable_cache is None:
+            enable_cache = bool(config.get("LLM_CACHE_ENABLED", True))
+        if cache is None and enable_cache:
+            cache = LLMResponseCache(
+                config.get("LLM_CACHE_PATH"),
+                max_bytes=int(float(config.get("LLM_CACHE_MAX_MB", 100)) * 1024 * 1024)
+            )
+        self.cache = cache if enable_cache else None
+        
         print(f"LLM配置: API基础URL={self.api_base}, 模型={self.model_name}")
         print(f"使用OpenRouter API: {self.is_openrouter}")
         
-    def analyze_resume(self, resume_text: str) -> Dict[str, Any]:
+    def analyze_resume(self, resume_text: str, force_refresh: bool = False,
+                       on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         分析简历文本
         
         Args:
             resume_text: 提取的简历文本
+            force_refresh: 忽略缓存重新调用LLM（结果仍会写回缓存）
+            on_partial: 传入时以流式方式调用LLM，每当有字段完整生成就以当前的部分结果回调
             
         Returns:
             分析结果，包含结构化的简历信息
         """
-        # 调用同步方法
-        return self._call_llm(self._get_resume_prompt(resume_text))
+        return self._analyze("resume", resume_text, force_refresh, on_partial)
     
-    async def analyze_resume_async(self, resume_text: str) -> Dict[str, Any]:
+    async def analyze_resume_async(self, resume_text: str, force_refresh: bool = False,
+                                   on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         异步分析简历文本
         
         Args:
             resume_text: 提取的简历文本
+            force_refresh: 忽略缓存重新调用LLM（结果仍会写回缓存）
+            on_partial: 传入时以流式方式调用LLM，每当有字段完整生成就以当前的部分结果回调
             
         Returns:
             分析结果，包含结构化的简历信息
         """
-        # 调用异步方法
-        return await self._call_llm_async(self._get_resume_prompt(resume_text))
+        return await self._analyze_async("resume", resume_text, force_refresh, on_partial)
     
     def _get_resume_prompt(self, resume_text: str) -> str:
         """生成简历分析提示词"""
@@ -109,31 +163,35 @@ Resume text:
 Please return only the JSON format analysis result without additional explanation text.
 """
         
-    def analyze_offer(self, offer_text: str) -> Dict[str, Any]:
+    def analyze_offer(self, offer_text: str, force_refresh: bool = False,
+                      on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         分析Offer文本
         
         Args:
             offer_text: 提取的Offer文本
+            force_refresh: 忽略缓存重新调用LLM（结果仍会写回缓存）
+            on_partial: 传入时以流式方式调用LLM，每当有字段完整生成就以当前的部分结果回调
             
         Returns:
             分析结果，包含结构化的Offer信息
         """
-        # 调用同步方法
-        return self._call_llm(self._get_offer_prompt(offer_text))
+        return self._analyze("offer", offer_text, force_refresh, on_partial)
     
-    async def analyze_offer_async(self, offer_text: str) -> Dict[str, Any]:
+    async def analyze_offer_async(self, offer_text: str, force_refresh: bool = False,
+                                  on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         异步分析Offer文本
         
         Args:
             offer_text: 提取的Offer文本
+            force_refresh: 忽略缓存重新调用LLM（结果仍会写回缓存）
+            on_partial: 传入时以流式方式调用LLM，每当有字段完整生成就以当前的部分结果回调
             
         Returns:
             分析结果，包含结构化的Offer信息
         """
-        # 调用异步方法
-        return await self._call_llm_async(self._get_offer_prompt(offer_text))
+        return await self._analyze_async("offer", offer_text, force_refresh, on_partial)
     
     def _get_offer_prompt(self, offer_text: str) -> str:
         """生成Offer分析提示词"""
@@ -170,37 +228,184 @@ Offer letter text:
 Please return only the JSON format analysis result without additional explanation text.
 """
     
-    async def process_documents(self, resume_text: str, offer_texts: list) -> Dict[str, Any]:
+    async def process_documents(self, resume_text, offer_texts: list,
+                                max_in_flight: Optional[int] = None,
+                                on_result: Optional[Callable[[str, int, Optional[Dict[str, Any]]], None]] = None,
+                                force_refresh: bool = False,
+                                on_partial: Optional[Callable[[str, int, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         异步处理所有文档
         
         Args:
-            resume_text: 简历文本
-            offer_texts: Offer文本列表
+            resume_text: 简历文本，也可以是返回文本的awaitable（如异步的PDF提取任务），为None时跳过简历
+            offer_texts: Offer文本列表，元素同样可以是awaitable
+            max_in_flight: 同时进行的LLM请求数上限，None表示不限制
+            on_result: 每个文档分析完成时的回调，参数为 ("resume"/"offer", 序号, 分析结果)；
+                       文本为空时分析结果为None
+            force_refresh: 忽略缓存重新调用LLM
+            on_partial: 传入时以流式方式调用LLM，生成过程中以 ("resume"/"offer", 序号, 部分结果) 回调；
+                        命中缓存时不回调，直接通过on_result返回完整结果
             
         Returns:
             包含简历和所有Offer分析结果的字典
         """
-        # 创建任务列表
-        tasks = [
-            self.analyze_resume_async(resume_text)
-        ]
-        
-        # 添加所有offer分析任务
-        for offer_text in offer_texts:
-            tasks.append(self.analyze_offer_async(offer_text))
+        semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+        
+        async def analyze(kind: str, index: int, text_or_awaitable):
+            # 先等待文本（PDF提取可与其他文档的LLM调用重叠进行）
+            text = await text_or_awaitable if inspect.isawaitable(text_or_awaitable) else text_or_awaitable
+            partial_callback = None
+            if on_partial is not None:
+                partial_callback = lambda partial: on_partial(kind, index, partial)
+            if not text:
+                result = None
+            else:
+                if semaphore is not None:
+                    async with semaphore:
+                        result = await self._analyze_async(kind, text, force_refresh, partial_callback)
+                else:
+                    result = await self._analyze_async(kind, text, force_refresh, partial_callback)
+            if on_result is not None:
+                on_result(kind, index, result)
+            return result
+        
+        # 创建任务列表（没有简历时不创建简历任务，也不回调）
+        tasks = [analyze("offer", i, offer_text) for i, offer_text in enumerate(offer_texts)]
+        if resume_text is not None:
+            tasks.insert(0, analyze("resume", 0, resume_text))
         
         # 并行执行所有任务
         results = await asyncio.gather(*tasks)
         
         # 构建结果字典
+        if resume_text is not None:
+            resume_result, offer_results = results[0], results[1:]
+        else:
+            resume_result, offer_results = None, results
         combined_result = {
-            "resume_analysis": results[0],
-            "offer_analyses": results[1:] if len(results) > 1 else []
+            "resume_analysis": resume_result,
+            "offer_analyses": list(offer_results)
         }
         
         return combined_result
         
+    def _get_prompt(self, kind: str, text: str) -> str:
+        """按文档类型生成提示词"""
+        return self._get_resume_prompt(text) if kind == "resume" else self._get_offer_prompt(text)
+    
+    def _cache_key(self, kind: str, text: str) -> str:
+        """缓存键：模型名 + 提示词模板哈希 + 文档文本哈希，修改提示词后旧缓存自动失效"""
+        return make_cache_key(self.model_name, self._get_prompt(kind, "{document_text}"), text)
+    
+    def _cache_lookup(self, kind: str, text: str, force_refresh: bool):
+        """返回 (缓存键, 命中的结果)，未启用缓存时缓存键为None"""
+        if self.cache is None:
+            return None, None
+        key = self._cache_key(kind, text)
+        if force_refresh:
+            return key, None
+        cached = self.cache.get(key)
+        if cached is not None:
+            print(f"命中LLM缓存: {kind}")
+        return key, cached
+    
+    def _cache_store(self, key: Optional[str], result: Dict[str, Any]):
+        """写入缓存，出错的结果不缓存以便下次重试"""
+        if key is not None and isinstance(result, dict) and "error" not in result:
+            self.cache.put(key, result)
+    
+    def _analyze(self, kind: str, text: str, force_refresh: bool = False,
+                 on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """带缓存的同步分析"""
+        key, cached = self._cache_lookup(kind, text, force_refresh)
+        if cached is not None:
+            return cached
+        chunks = self._plan_chunks(kind, text)
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), self.max_concurrency)) as pool:
+                results = list(pool.map(lambda chunk: self._call_llm(self._get_prompt(kind, chunk)), chunks))
+            result = self._merge_chunk_results(results)
+        elif on_partial is not None:
+            result = self._call_llm_stream(self._get_prompt(kind, chunks[0]), on_partial)
+        else:
+            result = self._call_llm(self._get_prompt(kind, chunks[0]))
+        result = self._validate_result(kind, result)
+        self._cache_store(key, result)
+        return result
+    
+    async def _analyze_async(self, kind: str, text: str, force_refresh: bool = False,
+                             on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """带缓存的异步分析"""
+        key, cached = self._cache_lookup(kind, text, force_refresh)
+        if cached is not None:
+            return cached
+        chunks = self._plan_chunks(kind, text)
+        if len(chunks) > 1:
+            result = await self._analyze_chunks_async(kind, chunks, on_partial)
+        elif on_partial is not None:
+            result = await self._call_llm_stream_async(self._get_prompt(kind, chunks[0]), on_partial)
+        else:
+            result = await self._call_llm_async(self._get_prompt(kind, chunks[0]))
+        result = self._validate_result(kind, result)
+        self._cache_store(key, result)
+        return result
+    
+    def _plan_chunks(self, kind: str, text: str) -> List[str]:
+        """按模型上下文和文档上限计算预算，返回每次调用使用的文本（通常只有一块）"""
+        prompt_tokens = estimate_tokens(self._get_prompt(kind, ""))
+        budget = document_budget(self.model_name, prompt_tokens, self.max_document_tokens)
+        return plan_document(text, budget, self.max_chunks)
+    
+    async def _analyze_chunks_async(self, kind: str, chunks: List[str],
+                                    on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """并行抽取各块，每块完成时推送合并后的部分结果"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(chunks)
+        
+        async def run(index: int, chunk: str):
+            results[index] = await self._call_llm_async(self._get_prompt(kind, chunk))
+            if on_partial is not None:
+                on_partial(self._merge_chunk_results([r for r in results if r is not None]))
+        
+        await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks)))
+        return self._merge_chunk_results(results)
+    
+    def _merge_chunk_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """合并各块结果；部分块失败时保留已有内容并标记错误（不写入缓存）"""
+        succeeded = [r for r in results if isinstance(r, dict) and "error" not in r]
+        if not succeeded:
+            return results[0]
+        merged = merge_analyses(succeeded)
+        if len(succeeded) < len(results):
+            merged["error"] = f"文档分块解析部分失败（{len(results) - len(succeeded)}/{len(results)} 块）"
+        return merged
+    
+    def _validate_result(self, kind: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """检查最终结果的结构，不符合要求时转为错误结果（不写入缓存）"""
+        if isinstance(result, dict) and "error" in result:
+            return result
+        problems = validate_analysis(kind, result)
+        if not problems:
+            return result
+        print(f"LLM响应结构不符合要求: {'; '.join(problems)}")
+        return {"error": "LLM响应结构不符合要求", "details": problems}
+    
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """返回缓存命中统计，未启用缓存时返回None"""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """构造请求头"""
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",  # 显式指定UTF-8编码
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        
+        # 添加OpenRouter特有的headers
+        if self.is_openrouter:
+            headers["HTTP-Referer"] = "https://localhost"  # OpenRouter需要的refer头
+            headers["X-Title"] = "ResumeAnalyzer"  # 应用标题
+        return headers
+    
     def _call_llm(self, prompt: str) -> Dict[str, Any]:
         """
         同步调用LLM API
@@ -211,15 +416,7 @@ Please return only the JSON format analysis result without additional explanatio
         Returns:
             LLM响应的JSON对象
         """
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",  # 显式指定UTF-8编码
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        # 添加OpenRouter特有的headers
-        if self.is_openrouter:
-            headers["HTTP-Referer"] = "https://localhost"  # OpenRouter需要的refer头
-            headers["X-Title"] = "ResumeAnalyzer"  # 应用标题
+        headers = self._build_headers()
         
         # 准备请求数据和API端点
         data, api_endpoint = self._prepare_request_data(prompt)
@@ -232,16 +429,97 @@ Please return only the JSON format analysis result without additional explanatio
             # 显式将数据转换为UTF-8编码的JSON字符串
             json_data = json.dumps(data, ensure_ascii=False).encode('utf-8')
             
-            # 使用data参数而不是json参数来发送请求
-            response = requests.post(
-                api_endpoint,
-                headers=headers,
-                data=json_data,  # 使用data参数传递UTF-8编码的JSON
-                timeout=60
-            )
+            for attempt in range(self.max_retries + 1):
+                self._rate_limiter.acquire()
+                try:
+                    # 使用data参数而不是json参数来发送请求
+                    response = self._http.post(
+                        api_endpoint,
+                        headers=headers,
+                        data=json_data,  # 使用data参数传递UTF-8编码的JSON
+                        timeout=60
+                    )
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = retry_delay(attempt)
+                    print(f"请求失败，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
+                    time.sleep(delay)
+                    continue
+                
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                    print(f"API返回HTTP {response.status_code}，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
+                    time.sleep(delay)
+                    continue
+                
+                # 处理响应
+                return self._process_response(response)
+                
+        except requests.exceptions.Timeout:
+            return {"error": "API请求超时"}
+        except requests.exceptions.ConnectionError:
+            return {"error": "无法连接到API服务器"}
+        except Exception as e:
+            return {"error": f"调用LLM API时出错: {str(e)}"}
+    
+    def _call_llm_stream(self, prompt: str, on_partial: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """
+        以SSE流式方式同步调用LLM API，生成过程中推送部分结果
+        
+        只在流开始前重试（429/5xx/连接失败）；流开始后出错直接返回错误，避免重复推送部分结果。
+        
+        Args:
+            prompt: 提示文本
+            on_partial: 部分结果回调
+            
+        Returns:
+            LLM响应的JSON对象
+        """
+        headers = self._build_headers()
+        data, api_endpoint = self._prepare_request_data(prompt)
+        data["stream"] = True
+        
+        try:
+            print(f"流式调用LLM API: {api_endpoint}")
+            print(f"使用模型: {self.model_name}")
+            json_data = json.dumps(data, ensure_ascii=False).encode('utf-8')
             
-            # 处理响应
-            return self._process_response(response)
+            for attempt in range(self.max_retries + 1):
+                self._rate_limiter.acquire()
+                try:
+                    # 连接超时10秒；读超时60秒针对两次数据之间的间隔，而不是整个响应
+                    response = self._http.post(
+                        api_endpoint,
+                        headers=headers,
+                        data=json_data,
+                        stream=True,
+                        timeout=(10, 60)
+                    )
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = retry_delay(attempt)
+                    print(f"请求失败，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
+                    time.sleep(delay)
+                    continue
+                
+                with response:
+                    if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                        delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                        print(f"API返回HTTP {response.status_code}，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
+                        time.sleep(delay)
+                        continue
+                    
+                    # 不支持流式的服务端会直接返回完整响应
+                    if response.status_code != 200 or "event-stream" not in response.headers.get("Content-Type", ""):
+                        return self._process_response(response)
+                    
+                    stream = SSEJSONStream(on_partial)
+                    for line in response.iter_lines():
+                        if not stream.feed_line(line):
+                            break
+                    return self._finish_stream(stream)
                 
         except requests.exceptions.Timeout:
             return {"error": "API请求超时"}
@@ -250,6 +528,46 @@ Please return only the JSON format analysis result without additional explanatio
         except Exception as e:
             return {"error": f"调用LLM API时出错: {str(e)}"}
     
+    def _finish_stream(self, stream: SSEJSONStream) -> Dict[str, Any]:
+        """流结束后得到最终结果：增量解析器已确认对象完整时直接解析，否则走原有的提取逻辑"""
+        if stream.error is not None:
+            return stream.error
+        print("API流式响应结束")
+        json_text = stream.parser.json_text
+        if json_text is not None:
+            try:
+                parsed_json = json.loads(json_text)
+                print("成功解析JSON响应")
+                return parsed_json
+            except json.JSONDecodeError:
+                pass
+        return self._parse_content_to_json(stream.parser.text)
+    
+    def _get_async_resources(self):
+        """
+        获取当前事件循环上的长连接会话和并发信号量
+        
+        Streamlit每次点击都会用asyncio.run创建新的事件循环，而aiohttp会话不能跨循环使用；
+        处理器又通过st.cache_resource在所有会话间共享，可能有多个循环同时在用。
+        因此会话按事件循环分别保存，同一循环内的所有请求共享连接池和TLS连接，
+        不同运行之间互不影响。
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            resources = self._async_resources.get(loop)
+            if resources is None or resources[0].closed:
+                connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+                resources = (aiohttp.ClientSession(connector=connector), asyncio.Semaphore(self.max_concurrency))
+                self._async_resources[loop] = resources
+        return resources
+    
+    async def aclose(self):
+        """关闭当前事件循环的异步会话（每次运行结束前在自己的循环中调用，不影响其他运行）"""
+        with self._async_lock:
+            resources = self._async_resources.pop(asyncio.get_running_loop(), None)
+        if resources is not None and not resources[0].closed:
+            await resources[0].close()
+    
     async def _call_llm_async(self, prompt: str) -> Dict[str, Any]:
         """
         异步调用LLM API
@@ -260,15 +578,7 @@ Please return only the JSON format analysis result without additional explanatio
         Returns:
             LLM响应的JSON对象
         """
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",  # 显式指定UTF-8编码
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        # 添加OpenRouter特有的headers
-        if self.is_openrouter:
-            headers["HTTP-Referer"] = "https://localhost"  # OpenRouter需要的refer头
-            headers["X-Title"] = "ResumeAnalyzer"  # 应用标题
+        headers = self._build_headers()
         
         # 准备请求数据和API端点
         data, api_endpoint = self._prepare_request_data(prompt)
@@ -281,37 +591,130 @@ Please return only the JSON format analysis result without additional explanatio
             # 显式将数据转换为UTF-8编码的JSON字符串
             json_data = json.dumps(data, ensure_ascii=False).encode('utf-8')
             
-            # 异步发送请求
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_endpoint,
-                    headers=headers,
-                    data=json_data,  # 使用data参数传递UTF-8编码的JSON
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    # 处理响应
-                    if response.status != 200:
-                        return {
-                            "error": f"API请求失败: HTTP {response.status}",
-                            "details": await response.text()
-                        }
-                    
-                    # 解析JSON
-                    result = await response.json()
-                    print(f"API响应状态: {response.status}")
-                    
-                    # 从结果中提取内容
-                    content = self._extract_content_from_result(result)
+            session, semaphore = self._get_async_resources()
+            async with semaphore:
+                for attempt in range(self.max_retries + 1):
+                    await self._rate_limiter.acquire_async()
+                    try:
+                        async with session.post(
+                            api_endpoint,
+                            headers=headers,
+                            data=json_data,  # 使用data参数传递UTF-8编码的JSON
+                            timeout=aiohttp.ClientTimeout(total=60)
+                        ) as response:
+                            if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                                delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                                print(f"API返回HTTP {response.status}，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
+                            else:
+                                # 处理响应
+                                if response.status != 200:
+                                    return {
+                                        "error": f"API请求失败: HTTP {response.status}",
+                                        "details": await response.text()
+                                    }
+                                
+                                # 解析JSON
+                                result = await response.json()
+                                print(f"API响应状态: {response.status}")
+                                
+                                # 从结果中提取内容
+                                content = self._extract_content_from_result(result)
+                                
+                                # 处理内容
+                                if content is None:
+                                    return {
+                                        "error": "无法从响应中提取内容",
+                                        "raw_response": "响应格式异常"
+                                    }
+                                
+                                # 解析JSON内容
+                                return self._parse_content_to_json(content)
+                    except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                        if attempt >= self.max_retries:
+                            raise
+                        delay = retry_delay(attempt)
+                        print(f"请求失败，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
                     
-                    # 处理内容
-                    if content is None:
-                        return {
-                            "error": "无法从响应中提取内容",
-                            "raw_response": "响应格式异常"
-                        }
+                    # 退避期间继续占用并发名额，避免限流时其他请求继续冲击服务端
+                    await asyncio.sleep(delay)
+                
+        except asyncio.TimeoutError:
+            return {"error": "API请求超时"}
+        except aiohttp.ClientError:
+            return {"error": "无法连接到API服务器"}
+        except Exception as e:
+            return {"error": f"调用LLM API时出错: {str(e)}"}
+    
+    async def _call_llm_stream_async(self, prompt: str, on_partial: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """
+        以SSE流式方式异步调用LLM API，生成过程中推送部分结果
+        
+        Args:
+            prompt: 提示文本
+            on_partial: 部分结果回调
+            
+        Returns:
+            LLM响应的JSON对象
+        """
+        headers = self._build_headers()
+        data, api_endpoint = self._prepare_request_data(prompt)
+        data["stream"] = True
+        
+        try:
+            print(f"异步流式调用LLM API: {api_endpoint}")
+            print(f"使用模型: {self.model_name}")
+            json_data = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            
+            session, semaphore = self._get_async_resources()
+            async with semaphore:
+                for attempt in range(self.max_retries + 1):
+                    await self._rate_limiter.acquire_async()
+                    # 只有发出请求和检查状态码时重试；开始读取SSE后出错直接返回错误，
+                    # 否则重试会从头重放已经推送过的部分结果
+                    try:
+                        response = await session.post(
+                            api_endpoint,
+                            headers=headers,
+                            data=json_data,
+                            # 不限制总时长，只限制两次数据之间的间隔
+                            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+                        )
+                    except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                        if attempt >= self.max_retries:
+                            raise
+                        delay = retry_delay(attempt)
+                        print(f"请求失败，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
+                        await asyncio.sleep(delay)
+                        continue
                     
-                    # 解析JSON内容
-                    return self._parse_content_to_json(content)
+                    async with response:
+                        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                            delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                            print(f"API返回HTTP {response.status}，{delay:.1f}秒后重试({attempt + 1}/{self.max_retries})")
+                            await asyncio.sleep(delay)
+                            continue
+                        
+                        if response.status != 200:
+                            return {
+                                "error": f"API请求失败: HTTP {response.status}",
+                                "details": await response.text()
+                            }
+                        
+                        # 不支持流式的服务端会直接返回完整响应
+                        if "event-stream" not in response.content_type:
+                            content = self._extract_content_from_result(await response.json())
+                            if content is None:
+                                return {
+                                    "error": "无法从响应中提取内容",
+                                    "raw_response": "响应格式异常"
+                                }
+                            return self._parse_content_to_json(content)
+                        
+                        stream = SSEJSONStream(on_partial)
+                        async for line in response.content:
+                            if not stream.feed_line(line):
+                                break
+                        return self._finish_stream(stream)
                 
         except asyncio.TimeoutError:
             return {"error": "API请求超时"}
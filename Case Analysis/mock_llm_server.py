@@ -0,0 +1,240 @@
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+# 默认的固定响应：按提示词判断是简历还是Offer
+DEFAULT_RESPONSES = {
+    "resume": {
+        "studentName": "Z同学",
+        "education": {
+            "institution": "北京大学",
+            "major": "计算机科学与技术",
+            "gpaValue": 3.78,
+            "gpaOriginal": "3.78/4.0",
+            "institutionType": "DOMESTIC_C9"
+        },
+        "testScores": [
+            {"testType": "LANGUAGE", "testName": "TOEFL", "testScore": "108",
+             "detailScores": {"Reading": "29", "Listening": "28", "Speaking": "24", "Writing": "27"}},
+            {"testType": "STANDARDIZED", "testName": "GRE", "testScore": "329", "detailScores": {}}
+        ],
+        "experiences": [
+            {"type": "INTERNSHIP", "description": "互联网公司数据平台实习", "organization": "头部互联网公司",
+             "role": "软件工程实习生", "duration": "2022.06-2022.09", "achievement": "搭建每日处理2TB数据的流水线"}
+        ]
+    },
+    "offer": {
+        "admissions": [
+            {"school": "Carnegie Mellon University", "country": "美国", "program": "Master of Science in Computer Science",
+             "majorCategory": "计算机科学", "degreeType": "MASTER", "rankingType": "US News", "rankingValue": "24",
+             "rankingTier": "TOP30", "enrollmentSeason": "Fall 2025", "hasScholarship": True,
+             "scholarshipAmount": "$10,000/year", "scholarshipNote": "Merit-based"}
+        ]
+    }
+}
+
+
+def detect_kind(prompt: str) -> str:
+    """根据提示词判断请求类型"""
+    return "offer" if "offer letter" in prompt.lower() else "resume"
+
+
+class MockLLMServer:
+    """
+    本地OpenAI兼容的模拟服务 - 用于离线测试并发、重试和流式输出，以及测量自身开销
+
+    POST /v1/chat/completions 返回固定响应（支持 "stream": true 的SSE输出），
+    可配置延迟、抖动和错误率；GET /stats 返回请求统计。
+    错误和抖动由 seed 与请求序号决定，相同配置下注入的错误数量和延迟分布可复现。
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, retry_after: Optional[str] = "0", stream_chunk_chars: int = 16,
+                 stream_chunk_delay: float = 0.005, responses: Optional[Dict[str, Any]] = None, seed: int = 42):
+        """
+        初始化模拟服务
+
+        Args:
+            latency: 每个请求返回前（流式时为首个数据前）的延迟秒数
+            jitter: 延迟的随机浮动上限（秒），实际延迟为 latency + [0, jitter)
+            error_rate: 返回错误状态码的请求比例
+            error_status: 注入错误时的HTTP状态码（如429/503）
+            retry_after: 注入错误时的Retry-After响应头，None表示不返回
+            stream_chunk_chars: 流式输出时每个事件的字符数
+            stream_chunk_delay: 流式输出时两个事件之间的间隔秒数
+            responses: 按类型（"resume"/"offer"）的固定响应，默认使用DEFAULT_RESPONSES
+            seed: 随机种子
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.stream_chunk_delay = stream_chunk_delay
+        self.responses = dict(DEFAULT_RESPONSES, **(responses or {}))
+        self.seed = seed
+        self.url: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清空请求统计"""
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+        self._next_id = 0
+
+    def stream_seconds(self, kind: str) -> float:
+        """流式输出某类响应所需的时间（不含首个数据前的延迟）"""
+        content = json.dumps(self.responses[kind], ensure_ascii=False)
+        return -(-len(content) // self.stream_chunk_chars) * self.stream_chunk_delay
+
+    def app(self) -> web.Application:
+        """创建aiohttp应用"""
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/chat/completions", self.handle_chat)
+        app.router.add_post("/chat/completions", self.handle_chat)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def handle_chat(self, request: web.Request) -> web.StreamResponse:
+        # 请求序号在事件循环中分配，无需加锁
+        request_id = self._next_id
+        self._next_id += 1
+        rng = random.Random(f"{self.seed}:{request_id}")
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            body = await request.json()
+            await asyncio.sleep(self.latency + rng.random() * self.jitter)
+            if rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                headers = {"Retry-After": self.retry_after} if self.retry_after is not None else None
+                return web.json_response({"error": {"message": "injected error", "code": self.error_status}},
+                                         status=self.error_status, headers=headers)
+
+            prompt = body["messages"][-1]["content"]
+            if isinstance(prompt, list):
+                prompt = " ".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+            content = json.dumps(self.responses[detect_kind(prompt)], ensure_ascii=False)
+            if body.get("stream"):
+                self.stats["streamed"] += 1
+                return await self._stream(request, body, content)
+            return web.json_response({
+                "id": f"mock-{request_id}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+            })
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def _stream(self, request: web.Request, body: Dict[str, Any], content: str) -> web.StreamResponse:
+        """按SSE格式逐段输出"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        for start in range(0, len(content), self.stream_chunk_chars):
+            event = {"object": "chat.completion.chunk", "model": body.get("model"),
+                     "choices": [{"index": 0, "delta": {"content": content[start:start + self.stream_chunk_chars]}}]}
+            await response.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            if self.stream_chunk_delay:
+                await asyncio.sleep(self.stream_chunk_delay)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        在后台线程中启动服务
+
+        Args:
+            host: 监听地址
+            port: 端口，0表示自动分配
+
+        Returns:
+            API基础URL（如 http://127.0.0.1:12345/v1）
+        """
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app())
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, host, port)
+            self._loop.run_until_complete(site.start())
+            bound_host, bound_port = self._runner.addresses[0][:2]
+            self.url = f"http://{bound_host}:{bound_port}/v1"
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.url
+
+    def stop(self):
+        """停止后台服务"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='启动本地OpenAI兼容的模拟LLM服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8900, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.2, help='每个请求的延迟秒数')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟的随机浮动上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回错误的请求比例')
+    parser.add_argument('--error-status', type=int, default=503, help='注入错误的HTTP状态码')
+    parser.add_argument('--retry-after', default='0', help='注入错误时的Retry-After响应头，设为空字符串则不返回')
+    parser.add_argument('--stream-chunk-chars', type=int, default=16, help='流式输出时每个事件的字符数')
+    parser.add_argument('--stream-chunk-delay', type=float, default=0.005, help='流式输出时两个事件之间的间隔秒数')
+    parser.add_argument('--responses', help='固定响应的JSON文件，格式为 {"resume": {...}, "offer": {...}}')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    responses = None
+    if args.responses:
+        with open(args.responses, 'r', encoding='utf-8') as f:
+            responses = json.load(f)
+    server = MockLLMServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           error_status=args.error_status, retry_after=args.retry_after or None,
+                           stream_chunk_chars=args.stream_chunk_chars, stream_chunk_delay=args.stream_chunk_delay,
+                           responses=responses, seed=args.seed)
+    print(f"模拟LLM服务: http://{args.host}:{args.port}/v1 （在api_config.json中设置OPENAI_API_BASE即可使用）")
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
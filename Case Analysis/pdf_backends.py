@@ -0,0 +1,276 @@
+import io
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# PDF来源：文件路径，或内存中的内容（bytes/bytearray/memoryview/二进制文件对象）
+PDFSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+# 默认后端，可通过环境变量 PDF_BACKEND 切换
+DEFAULT_BACKEND = os.environ.get("PDF_BACKEND", "pymupdf")
+# 默认后端不可用或出错时使用的后端
+FALLBACK_BACKEND = "pdfplumber"
+
+
+def is_path_source(source: Any) -> bool:
+    """来源是否为文件路径"""
+    return isinstance(source, (str, os.PathLike))
+
+
+def source_bytes(source: Any) -> Union[bytes, bytearray]:
+    """
+    取出内存来源的字节内容，尽量不复制
+
+    Args:
+        source: bytes/bytearray/memoryview/二进制文件对象
+
+    Returns:
+        字节内容
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return source
+    if isinstance(source, memoryview):
+        # 覆盖整个bytes对象的视图直接取原对象，避免复制
+        if isinstance(source.obj, bytes) and source.nbytes == len(source.obj):
+            return source.obj
+        return source.tobytes()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        return source.read()
+    raise TypeError(f"不支持的PDF来源类型: {type(source).__name__}")
+
+
+def describe_source(source: Any) -> str:
+    """用于日志的来源描述"""
+    if is_path_source(source):
+        return str(source)
+    return getattr(source, "name", None) or "<内存中的PDF>"
+
+
+def open_pymupdf(fitz, source: PDFSource):
+    """用PyMuPDF打开路径或内存中的PDF"""
+    if is_path_source(source):
+        return fitz.open(source)
+    return fitz.open(stream=source_bytes(source), filetype="pdf")
+
+
+class PDFBackend(ABC):
+    """PDF文本提取后端基类，子类需实现 page_count 和 iter_pages"""
+
+    name = "base"
+
+    @abstractmethod
+    def page_count(self, pdf_path: PDFSource) -> int:
+        """返回PDF页数"""
+
+    @abstractmethod
+    def iter_pages(self, pdf_path: PDFSource, page_numbers: Optional[Sequence[int]] = None) -> Iterator[str]:
+        """
+        逐页提取文本（文件只打开一次）
+
+        Args:
+            pdf_path: PDF文件路径或内存中的PDF内容
+            page_numbers: 要提取的页码（从0开始），None表示全部页面
+
+        Returns:
+            依次产出每页文本
+        """
+
+    def extract_pages(self, pdf_path: PDFSource, page_numbers: Optional[Sequence[int]] = None) -> List[str]:
+        """
+        逐页提取文本
+
+        Args:
+            pdf_path: PDF文件路径或内存中的PDF内容
+            page_numbers: 要提取的页码（从0开始），None表示全部页面
+
+        Returns:
+            每页的文本列表
+        """
+        return list(self.iter_pages(pdf_path, page_numbers))
+
+    def extract_pages_timed(self, pdf_path: PDFSource, page_numbers: Optional[Sequence[int]] = None) -> List[Tuple[str, float]]:
+        """
+        逐页提取文本并记录每页耗时
+
+        Returns:
+            (每页文本, 耗时秒数) 列表
+        """
+        results = []
+        pages = self.iter_pages(pdf_path, page_numbers)
+        while True:
+            start = time.perf_counter()
+            try:
+                text = next(pages)
+            except StopIteration:
+                break
+            results.append((text, time.perf_counter() - start))
+        return results
+
+
+class PyMuPDFBackend(PDFBackend):
+    """PyMuPDF后端 - C实现，速度快，按阅读顺序排序文本块"""
+
+    name = "pymupdf"
+
+    def __init__(self, sort: bool = True):
+        """
+        Args:
+            sort: 是否按从上到下、从左到右排序文本块（多栏简历更接近阅读顺序）
+        """
+        import fitz  # 延迟导入，未安装时由调用方回退到其他后端
+        self._fitz = fitz
+        self.sort = sort
+
+    def page_count(self, pdf_path: PDFSource) -> int:
+        with open_pymupdf(self._fitz, pdf_path) as doc:
+            return doc.page_count
+
+    def iter_pages(self, pdf_path: PDFSource, page_numbers: Optional[Sequence[int]] = None) -> Iterator[str]:
+        with open_pymupdf(self._fitz, pdf_path) as doc:
+            numbers = range(doc.page_count) if page_numbers is None else page_numbers
+            for i in numbers:
+                yield doc[i].get_text("text", sort=self.sort) or ""
+
+
+class PdfPlumberBackend(PDFBackend):
+    """pdfplumber后端 - 纯Python，较慢，但支持按版面保留空白（适合对版面敏感的文档）"""
+
+    name = "pdfplumber"
+
+    def __init__(self, **extract_options):
+        """
+        Args:
+            **extract_options: 传给 page.extract_text 的参数，如 layout=True
+        """
+        import pdfplumber
+        self._pdfplumber = pdfplumber
+        self.extract_options = extract_options
+
+    def _open(self, pdf_path: PDFSource):
+        if is_path_source(pdf_path):
+            return self._pdfplumber.open(pdf_path)
+        # BytesIO包装bytes时共享缓冲区，不会复制内容
+        return self._pdfplumber.open(io.BytesIO(source_bytes(pdf_path)))
+
+    def page_count(self, pdf_path: PDFSource) -> int:
+        with self._open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+    def iter_pages(self, pdf_path: PDFSource, page_numbers: Optional[Sequence[int]] = None) -> Iterator[str]:
+        with self._open(pdf_path) as pdf:
+            pages = pdf.pages if page_numbers is None else [pdf.pages[i] for i in page_numbers]
+            for page in pages:
+                yield page.extract_text(**self.extract_options) or ""
+
+
+# 后端注册表：名称 -> 工厂函数（接收该后端的参数）
+BACKENDS: Dict[str, Callable[..., PDFBackend]] = {
+    PyMuPDFBackend.name: PyMuPDFBackend,
+    PdfPlumberBackend.name: PdfPlumberBackend,
+}
+
+
+def register_backend(name: str, factory: Callable[..., PDFBackend]):
+    """
+    注册自定义提取后端
+
+    Args:
+        name: 后端名称
+        factory: 创建后端实例的函数
+    """
+    BACKENDS[name] = factory
+
+
+def create_backend(name: str, **options) -> Optional[PDFBackend]:
+    """
+    创建后端实例，依赖库未安装时返回None
+
+    Args:
+        name: 后端名称
+        **options: 后端参数
+
+    Returns:
+        后端实例或None
+    """
+    factory = BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"未知的PDF后端: {name}，可选: {', '.join(BACKENDS)}")
+    try:
+        return factory(**options)
+    except ImportError as e:
+        print(f"PDF后端 {name} 不可用: {str(e)}")
+        return None
+
+
+class PDFTextExtractor:
+    """按优先级使用多个后端提取文本：首选后端不可用或出错时自动回退"""
+
+    def __init__(self, backend: Optional[str] = None, fallback: Optional[str] = FALLBACK_BACKEND,
+                 backend_options: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            backend: 首选后端名称，默认 DEFAULT_BACKEND
+            fallback: 回退后端名称，None表示不回退
+            backend_options: 各后端的参数，如 {"pdfplumber": {"layout": True}}
+        """
+        backend_options = backend_options or {}
+        names = [backend or DEFAULT_BACKEND]
+        if fallback and fallback not in names:
+            names.append(fallback)
+        self.backends = []
+        for name in names:
+            instance = create_backend(name, **backend_options.get(name, {}))
+            if instance is not None:
+                self.backends.append(instance)
+        if not self.backends:
+            raise RuntimeError(f"没有可用的PDF后端: {', '.join(names)}")
+
+    def extract_pages(self, pdf_path: PDFSource, page_numbers: Optional[Sequence[int]] = None) -> Tuple[List[str], str]:
+        """
+        逐页提取文本
+
+        Args:
+            pdf_path: PDF文件路径或内存中的PDF内容
+            page_numbers: 要提取的页码（从0开始），None表示全部页面
+
+        Returns:
+            (每页文本列表, 实际使用的后端名称)
+        """
+        last_error = None
+        for backend in self.backends:
+            try:
+                return backend.extract_pages(pdf_path, page_numbers), backend.name
+            except Exception as e:
+                print(f"PDF后端 {backend.name} 提取失败，尝试下一个后端: {str(e)}")
+                last_error = e
+        raise last_error
+
+    def extract_pages_timed(self, pdf_path: PDFSource,
+                            page_numbers: Optional[Sequence[int]] = None) -> Tuple[List[Tuple[str, float]], str]:
+        """
+        逐页提取文本并记录每页耗时
+
+        Returns:
+            ((每页文本, 耗时秒数) 列表, 实际使用的后端名称)
+        """
+        last_error = None
+        for backend in self.backends:
+            try:
+                return backend.extract_pages_timed(pdf_path, page_numbers), backend.name
+            except Exception as e:
+                print(f"PDF后端 {backend.name} 提取失败，尝试下一个后端: {str(e)}")
+                last_error = e
+        raise last_error
+
+    def page_count(self, pdf_path: PDFSource) -> int:
+        """返回PDF页数"""
+        last_error = None
+        for backend in self.backends:
+            try:
+                return backend.page_count(pdf_path)
+            except Exception as e:
+                last_error = e
+        raise last_error
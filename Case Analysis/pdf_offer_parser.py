@@ -1,49 +1,62 @@
 from typing import Optional
-import pdfplumber
 from pathlib import Path
 import os
+from pdf_backends import PDFTextExtractor, FALLBACK_BACKEND, PDFSource, is_path_source, source_bytes, describe_source
 
 class PDFOfferParser:
     """Offer PDF解析工具 - 提取文本供处理"""
     
-    def __init__(self):
-        pass
+    # 提取或清理逻辑变化时递增，使旧的提取缓存失效
+    VERSION = "2"
+    
+    def __init__(self, backend: Optional[str] = None, fallback: Optional[str] = FALLBACK_BACKEND):
+        """
+        初始化Offer PDF解析器
+        
+        Args:
+            backend: 提取后端名称（pymupdf/pdfplumber），默认取环境变量PDF_BACKEND，否则为pymupdf
+            fallback: 首选后端不可用或出错时的回退后端，默认pdfplumber
+        """
+        self.extractor = PDFTextExtractor(backend, fallback)
+        
+    @property
+    def parser_id(self) -> str:
+        """解析器标识（类名、版本和首选后端），作为提取缓存键的一部分"""
+        return f"{type(self).__name__}:{self.VERSION}:{self.extractor.backends[0].name}"
         
-    def extract_text(self, pdf_path: str) -> Optional[str]:
+    def extract_text(self, pdf_path: PDFSource) -> Optional[str]:
         """
         从Offer PDF文件中提取文本
         
         Args:
-            pdf_path: PDF文件路径或临时文件标识符
+            pdf_path: PDF文件路径或临时文件标识符，也可以是内存中的PDF内容（bytes/memoryview/二进制文件对象）
             
         Returns:
             提取的文本内容,失败则返回None
         """
         try:
-            print(f"开始解析Offer PDF文件: {pdf_path}")
+            print(f"开始解析Offer PDF文件: {describe_source(pdf_path)}")
+            
+            if is_path_source(pdf_path):
+                # 只有路径不存在时才去常见目录中查找
+                file_path = self._find_pdf_file(str(pdf_path))
+                if not file_path:
+                    print(f"找不到PDF文件: {pdf_path}")
+                    return None
+                pdf_path = str(file_path)  # 确保路径是字符串类型
+            else:
+                # 内存中的内容直接解析，无需落盘和查找文件
+                pdf_path = source_bytes(pdf_path)
+            
+            pages, backend_name = self.extractor.extract_pages(pdf_path)
+            text = "".join(page_text + "\n" for page_text in pages if page_text)
             
-            # 添加临时文件查找逻辑
-            file_path = self._find_pdf_file(pdf_path)
-            if not file_path:
-                print(f"找不到PDF文件: {pdf_path}")
-                return None
+            # 清理文本
+            text = self._clean_text(text)
             
-            pdf_path = str(file_path)  # 确保路径是字符串类型
+            print(f"Offer PDF解析完成({backend_name}),提取文本长度: {len(text)}")
+            return text
             
-            with pdfplumber.open(pdf_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    # 提取文本
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                        
-                # 清理文本
-                text = self._clean_text(text)
-                
-                print(f"Offer PDF解析完成,提取文本长度: {len(text)}")
-                return text
-                
         except Exception as e:
             print(f"Offer PDF解析失败: {str(e)}")
             return None
@@ -1,56 +1,216 @@
-from typing import Optional
-import pdfplumber
+import os
+import math
+import time
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Callable, Dict, Any, List, Tuple
 from pathlib import Path
+from pdf_backends import PDFTextExtractor, FALLBACK_BACKEND, PDFSource, is_path_source, source_bytes, describe_source
+
+# pdfplumber后端的提取参数（对版面敏感的简历使用 backend="pdfplumber" 时生效）
+PDFPLUMBER_OPTIONS = {
+    "x_tolerance": 1,  # 增加水平容差
+    "y_tolerance": 1,  # 增加垂直容差
+    "layout": True,    # 保持布局
+    "keep_blank_chars": True,  # 保留空格
+    "use_text_flow": True,     # 使用文本流
+}
+
+# 页数达到该值时按页分片到多个进程并行提取
+PARALLEL_PAGE_THRESHOLD = 8
+
+# 按页并行提取的进程池（每个进程只创建一次），以及子进程中缓存的提取器
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_workers = 0
+_worker_extractors: Dict[tuple, PDFTextExtractor] = {}
+
+
+def _get_page_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _page_pool, _page_pool_workers
+    if _page_pool is None or _page_pool_workers != max_workers:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False)
+        # 使用spawn启动，避免在多线程进程（如Streamlit）中fork
+        _page_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        _page_pool_workers = max_workers
+    return _page_pool
+
+
+@atexit.register
+def _shutdown_page_pool():
+    if _page_pool is not None:
+        _page_pool.shutdown(wait=False)
+
+
+def _extract_page_chunk(backend: Optional[str], fallback: Optional[str], pdf_path: PDFSource,
+                        page_numbers: List[int]) -> Tuple[List[Tuple[str, float]], str]:
+    """在子进程中提取一段连续页面（每个子进程只打开一次文件）"""
+    key = (backend, fallback)
+    extractor = _worker_extractors.get(key)
+    if extractor is None:
+        extractor = PDFTextExtractor(backend, fallback, {"pdfplumber": PDFPLUMBER_OPTIONS})
+        _worker_extractors[key] = extractor
+    return extractor.extract_pages_timed(pdf_path, page_numbers)
+
 
 class PDFParser:
     """PDF解析工具 - 提取文本供处理"""
     
-    def __init__(self):
-        pass
+    # 提取或清理逻辑变化时递增，使旧的提取缓存失效
+    VERSION = "2"
+    
+    def __init__(self, backend: Optional[str] = None, fallback: Optional[str] = FALLBACK_BACKEND,
+                 ocr_handler: Optional[Callable[[PDFSource], Optional[str]]] = None,
+                 parallel_threshold: int = PARALLEL_PAGE_THRESHOLD, max_workers: Optional[int] = None,
+                 probe_pages: int = 2, min_chars_per_page: int = 20):
+        """
+        初始化PDF解析器
+        
+        Args:
+            backend: 提取后端名称（pymupdf/pdfplumber），默认取环境变量PDF_BACKEND，否则为pymupdf
+            fallback: 首选后端不可用或出错时的回退后端，默认pdfplumber
+            ocr_handler: 扫描件（无文本层）的识别函数，接收PDF路径或内容返回文本；为None时扫描件直接返回None
+            parallel_threshold: 页数达到该值时多进程并行提取
+            max_workers: 并行提取的进程数，默认CPU核数（最多4个）
+            probe_pages: 用于判断是否为扫描件的前几页
+            min_chars_per_page: 前几页平均字符数低于该值时视为扫描件
+        """
+        self.backend = backend
+        self.fallback = fallback
+        self.extractor = PDFTextExtractor(backend, fallback, {"pdfplumber": PDFPLUMBER_OPTIONS})
+        self.ocr_handler = ocr_handler
+        self.parallel_threshold = parallel_threshold
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.probe_pages = probe_pages
+        self.min_chars_per_page = min_chars_per_page
         
-    def extract_text(self, pdf_path: str) -> Optional[str]:
+    @property
+    def parser_id(self) -> str:
+        """解析器标识（类名、版本和首选后端），作为提取缓存键的一部分"""
+        return f"{type(self).__name__}:{self.VERSION}:{self.extractor.backends[0].name}"
+        
+    def extract_text(self, pdf_path: PDFSource) -> Optional[str]:
         """
         从PDF文件中提取文本
         
         Args:
-            pdf_path: PDF文件路径
+            pdf_path: PDF文件路径，或内存中的PDF内容（bytes/memoryview/二进制文件对象）
             
         Returns:
             提取的文本内容，如果失败则返回None
         """
+        text, _ = self.extract_text_with_report(pdf_path)
+        return text
+    
+    def extract_text_with_report(self, pdf_path: PDFSource) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        从PDF文件中提取文本，并返回提取过程的统计
+        
+        先提取前几页判断是否有文本层：没有则视为扫描件，不再逐页提取而是交给ocr_handler；
+        页数较多时剩余页面分片到多个进程并行提取。
+        
+        Args:
+            pdf_path: PDF文件路径，或内存中的PDF内容（bytes/memoryview/二进制文件对象）
+            
+        Returns:
+            (提取的文本内容或None, 统计信息)，统计包含后端、页数、每页耗时(毫秒)、是否扫描件/OCR/并行
+        """
+        report = {
+            "file": describe_source(pdf_path),
+            "backend": None,
+            "pages": 0,
+            "page_timings_ms": [],
+            "scanned": False,
+            "ocr": False,
+            "parallel": False,
+            "total_ms": 0.0
+        }
+        start = time.perf_counter()
         try:
-            print(f"开始处理PDF文件: {pdf_path}")
+            print(f"开始处理PDF文件: {report['file']}")
+            
+            if is_path_source(pdf_path):
+                if not Path(pdf_path).exists():
+                    print(f"PDF文件不存在: {pdf_path}")
+                    return None, report
+                pdf_path = str(pdf_path)
+            else:
+                # 内存中的内容直接交给后端解析，文件对象只读取一次
+                pdf_path = source_bytes(pdf_path)
+            page_count = self.extractor.page_count(pdf_path)
+            report["pages"] = page_count
+            
+            # 先提取前几页，没有文本层时提前退出
+            probe = list(range(min(self.probe_pages, page_count)))
+            pages, backend_name = self.extractor.extract_pages_timed(pdf_path, probe)
+            report["backend"] = backend_name
+            if pages and self._looks_scanned(pages):
+                report["scanned"] = True
+                report["page_timings_ms"] = [round(t * 1000, 1) for _, t in pages]
+                return self._extract_scanned(pdf_path, report), report
+            
+            # 提取剩余页面
+            rest = list(range(len(probe), page_count))
+            if rest:
+                if page_count >= self.parallel_threshold and self._can_parallelize():
+                    report["parallel"] = True
+                    pages.extend(self._extract_parallel(pdf_path, rest))
+                else:
+                    rest_pages, _ = self.extractor.extract_pages_timed(pdf_path, rest)
+                    pages.extend(rest_pages)
+            report["page_timings_ms"] = [round(t * 1000, 1) for _, t in pages]
+            
+            # 每页之间添加换行
+            text = "".join(page_text + "\n" for page_text, _ in pages)
             
-            if not Path(pdf_path).exists():
-                print(f"PDF文件不存在: {pdf_path}")
-                return None
-                
-            with pdfplumber.open(pdf_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    # 调整提取参数
-                    page_text = page.extract_text(
-                        x_tolerance=1,  # 增加水平容差
-                        y_tolerance=1,  # 增加垂直容差
-                        layout=True,    # 保持布局
-                        keep_blank_chars=True,  # 保留空格
-                        use_text_flow=True,     # 使用文本流
-                    ) or ""
-                    text += page_text + "\n"  # 每页之间添加换行
-                    
             if not text.strip():
-                print(f"PDF文件内容为空: {pdf_path}")
-                return None
+                print(f"PDF文件内容为空: {report['file']}")
+                return None, report
                 
             # 调用清理文本的方法
             text = self._clean_text(text)
                 
-            print(f"成功提取PDF文本，长度: {len(text)}")
-            return text
+            print(f"成功提取PDF文本（{backend_name}），长度: {len(text)}")
+            return text, report
             
         except Exception as e:
             print(f"处理PDF文件时出错: {str(e)}")
+            return None, report
+        finally:
+            report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    
+    def _looks_scanned(self, pages: List[Tuple[str, float]]) -> bool:
+        """前几页几乎没有文字时判断为扫描件"""
+        chars = sum(len(page_text.strip()) for page_text, _ in pages)
+        return chars < self.min_chars_per_page * len(pages)
+    
+    def _extract_scanned(self, pdf_path: PDFSource, report: Dict[str, Any]) -> Optional[str]:
+        """扫描件交给OCR/视觉模型识别"""
+        if self.ocr_handler is None:
+            print(f"PDF没有文本层（可能是扫描件），未配置OCR: {report['file']}")
             return None
+        print(f"PDF没有文本层（可能是扫描件），使用OCR识别: {report['file']}")
+        report["ocr"] = True
+        text = self.ocr_handler(pdf_path)
+        return self._clean_text(text) if text else None
+    
+    def _can_parallelize(self) -> bool:
+        """只在主进程中并行（批处理的子进程已经按文件并行，避免嵌套进程池）"""
+        return self.max_workers > 1 and multiprocessing.parent_process() is None
+    
+    def _extract_parallel(self, pdf_path: PDFSource, page_numbers: List[int]) -> List[Tuple[str, float]]:
+        """把页面切成连续的分片，分给多个进程提取，按原顺序合并"""
+        workers = min(self.max_workers, len(page_numbers))
+        chunk_size = math.ceil(len(page_numbers) / workers)
+        chunks = [page_numbers[i:i + chunk_size] for i in range(0, len(page_numbers), chunk_size)]
+        pool = _get_page_pool(self.max_workers)
+        futures = [pool.submit(_extract_page_chunk, self.backend, self.fallback, pdf_path, chunk) for chunk in chunks]
+        pages = []
+        for future in futures:
+            chunk_pages, _ = future.result()
+            pages.extend(chunk_pages)
+        return pages
             
     def _clean_text(self, text: str) -> str:
         """
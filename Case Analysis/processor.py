@@ -3,50 +3,115 @@ import sys
 import json
 import argparse
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 
 # 导入自定义工具
 from pdf_parser import PDFParser
 from pdf_offer_parser import PDFOfferParser
 from excel_parser import ExcelParser
+from extraction_cache import ExtractionCache, file_digest, bytes_digest
+from pdf_backends import PDFSource, is_path_source, source_bytes
 
 class SimpleProcessor:
     """简化版处理器 - 不依赖于langchain/langgraph等库"""
     
-    def __init__(self):
-        """初始化处理器"""
-        self.pdf_parser = PDFParser()
+    def __init__(self, ocr_handler: Optional[Callable[[str], Optional[str]]] = None,
+                 cache: Optional[ExtractionCache] = None, enable_cache: bool = True):
+        """
+        初始化处理器
+        
+        Args:
+            ocr_handler: 扫描版PDF的识别函数（如 VisionOCR.extract_text），为None时扫描件提取失败
+            cache: PDF提取结果缓存，默认使用 .cache/extracted
+            enable_cache: 是否启用提取缓存
+        """
+        self.pdf_parser = PDFParser(ocr_handler=ocr_handler)
         self.offer_parser = PDFOfferParser()
         self.excel_parser = ExcelParser()
+        self.cache = (cache or ExtractionCache()) if enable_cache else None
+        
+    def _open_source(self, source: PDFSource, file_name: Optional[str]):
+        """
+        统一处理路径和内存中的PDF
+        
+        Returns:
+            (交给解析器的来源, 结果中记录的文件名, 内容哈希或None, 错误信息或None)
+        """
+        if is_path_source(source):
+            file_path = str(source)
+            if not os.path.exists(file_path):
+                return None, file_path, None, f"文件不存在: {file_path}"
+            digest = file_digest(file_path) if self.cache is not None else None
+            return file_path, file_path, digest, None
+        # 内存中的内容（如上传文件的getvalue()）直接解析，不写临时文件
+        data = source_bytes(source)
+        digest = bytes_digest(data) if self.cache is not None else None
+        return data, file_name or getattr(source, "name", None), digest, None
+        
+    def _from_cache(self, digest: str, parser, file_type: str, file_path: Optional[str]) -> Optional[Dict[str, Any]]:
+        record = self.cache.get(digest, parser.parser_id)
+        if record is None:
+            return None
+        print(f"命中提取缓存: {file_path or digest[:12]}")
+        return {
+            "success": True,
+            "error": None,
+            "content": record["content"],
+            "file_path": file_path,
+            "file_type": file_type,
+            "extraction": record.get("extraction"),
+            "cached": True
+        }
         
-    def process_resume(self, file_path: str) -> Dict[str, Any]:
+    def _to_cache(self, digest: Optional[str], parser, result: Dict[str, Any]):
+        # 只缓存成功的结果，失败的文件下次仍会重新解析
+        if digest is not None and result["success"]:
+            self.cache.put(digest, parser.parser_id, {
+                "content": result["content"],
+                "extraction": result.get("extraction")
+            })
+        
+    def process_resume(self, file_path: PDFSource, file_name: Optional[str] = None) -> Dict[str, Any]:
         """
         处理简历PDF文件
         
         Args:
-            file_path: 简历PDF文件路径
+            file_path: 简历PDF文件路径，或内存中的PDF内容（bytes/memoryview/二进制文件对象）
+            file_name: 内存中的PDF对应的文件名，仅用于记录
             
         Returns:
             提取的文本内容和处理状态
         """
+        source, file_path, digest, error = self._open_source(file_path, file_name)
         print(f"\n=== 处理简历文件: {file_path} ===")
         
         # 检查文件是否存在
-        if not os.path.exists(file_path):
+        if error:
             return {
                 "success": False,
-                "error": f"文件不存在: {file_path}",
+                "error": error,
                 "content": None
             }
             
+        # 先按文件内容查缓存
+        if digest is not None:
+            cached = self._from_cache(digest, self.pdf_parser, "resume", file_path)
+            if cached is not None:
+                return cached
+            
         # 使用PDF解析器提取文本
-        resume_text = self.pdf_parser.extract_text(file_path)
+        resume_text, report = self.pdf_parser.extract_text_with_report(source)
+        print(f"提取耗时: {report['total_ms']}ms，{report['pages']}页，每页耗时(ms): {report['page_timings_ms']}")
         
         if resume_text is None:
+            error = "无法提取简历文本"
+            if report["scanned"]:
+                error = "PDF没有文本层（可能是扫描件），OCR识别失败" if report["ocr"] else "PDF没有文本层（可能是扫描件），未配置OCR"
             return {
                 "success": False,
-                "error": "无法提取简历文本",
-                "content": None
+                "error": error,
+                "content": None,
+                "extraction": report
             }
             
         # 构建结果
@@ -55,17 +120,19 @@ class SimpleProcessor:
             "error": None,
             "content": resume_text,
             "file_path": file_path,
-            "file_type": "resume"
+            "file_type": "resume",
+            "extraction": report
         }
+        self._to_cache(digest, self.pdf_parser, result)
         
         return result
         
-    def process_offer(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+    def process_offer(self, file_paths: List[PDFSource]) -> List[Dict[str, Any]]:
         """
         处理多个Offer PDF文件
         
         Args:
-            file_paths: Offer PDF文件路径列表
+            file_paths: Offer PDF文件路径列表，元素也可以是内存中的PDF内容
             
         Returns:
             处理结果列表
@@ -75,20 +142,28 @@ class SimpleProcessor:
         results = []
         
         for file_path in file_paths:
+            source, file_path, digest, error = self._open_source(file_path, None)
             print(f"正在处理Offer文件: {file_path}")
             
             # 检查文件是否存在
-            if not os.path.exists(file_path):
+            if error:
                 results.append({
                     "success": False,
-                    "error": f"文件不存在: {file_path}",
+                    "error": error,
                     "content": None,
                     "file_path": file_path
                 })
                 continue
                 
+            # 先按文件内容查缓存
+            if digest is not None:
+                cached = self._from_cache(digest, self.offer_parser, "offer", file_path)
+                if cached is not None:
+                    results.append(cached)
+                    continue
+                
             # 使用Offer PDF解析器提取文本
-            offer_text = self.offer_parser.extract_text(file_path)
+            offer_text = self.offer_parser.extract_text(source)
             
             if offer_text is None:
                 results.append({
@@ -107,18 +182,21 @@ class SimpleProcessor:
                 "file_path": file_path,
                 "file_type": "offer"
             }
+            self._to_cache(digest, self.offer_parser, result)
             
             results.append(result)
             
         return results
         
-    def process_excel(self, file_path: str, row_index: Optional[int] = None) -> Dict[str, Any]:
+    def process_excel(self, file_path: str, row_index: Optional[int] = None,
+                      token_budget: Optional[int] = None) -> Dict[str, Any]:
         """
         处理Excel文件
         
         Args:
             file_path: Excel文件路径
             row_index: 要处理的行索引，如果不指定则处理整个文件
+            token_budget: 处理整个文件时输出文本的token预算，指定时从全部行中挑选信息量最高的行
             
         Returns:
             处理结果
@@ -155,7 +233,7 @@ class SimpleProcessor:
                 "total_rows": total_rows
             }
         else:
-            content = self.excel_parser.extract_data(file_path)
+            content = self.excel_parser.extract_data(file_path, token_budget=token_budget)
             
             if content.startswith("错误:"):
                 return {
@@ -250,6 +328,7 @@ def parse_arguments():
     excel_parser.add_argument('file_path', help='Excel文件路径')
     excel_parser.add_argument('--row', '-r', type=int, help='要处理的行索引')
     excel_parser.add_argument('--output', '-o', help='输出文件路径')
+    excel_parser.add_argument('--token-budget', type=int, help='输出文本的token预算（不指定时只展示前20行）')
     
     # 综合处理命令
     combined_parser = subparsers.add_parser('combined', help='综合处理简历和Offer文件')
@@ -258,6 +337,20 @@ def parse_arguments():
     combined_parser.add_argument('--excel', '-e', help='Excel文件路径')
     combined_parser.add_argument('--output', help='输出文件路径')
     
+    # 批量处理命令
+    batch_parser = subparsers.add_parser('batch', help='批量处理学生目录（每个目录包含一份简历和若干Offer）')
+    batch_parser.add_argument('root_dir', help='学生目录的根目录')
+    batch_parser.add_argument('--output', '-o', default='batch_results.jsonl', help='JSONL输出路径，重跑时跳过已完成的学生')
+    batch_parser.add_argument('--workers', '-w', type=int, help='PDF提取进程数，默认CPU核数')
+    batch_parser.add_argument('--students-in-flight', type=int, default=8, help='同时处理的学生数')
+    batch_parser.add_argument('--concurrency', '-c', type=int, help='同时进行的LLM请求数，默认取api_config.json')
+    batch_parser.add_argument('--limit', type=int, help='最多处理的学生数')
+    batch_parser.add_argument('--retry-failed', action='store_true', help='重新处理上次出错的学生')
+    batch_parser.add_argument('--no-ranking', action='store_true', help='不补充学校排名')
+    batch_parser.add_argument('--no-tags', action='store_true', help='不计算学生标签')
+    batch_parser.add_argument('--force-refresh', action='store_true', help='忽略LLM缓存')
+    batch_parser.add_argument('--report-every', type=int, default=10, help='每完成多少个学生打印一次进度')
+    
     return parser.parse_args()
 
 def main():
@@ -304,7 +397,7 @@ def main():
                 
     elif args.command == 'excel':
         # 处理Excel
-        result = processor.process_excel(args.file_path, args.row)
+        result = processor.process_excel(args.file_path, args.row, args.token_budget)
         
         # 输出结果
         if result['success']:
@@ -359,8 +452,26 @@ def main():
         # 保存结果
         if args.output:
             processor.save_results(combined_results, args.output)
+    elif args.command == 'batch':
+        # 批量处理依赖LLM，按需导入
+        import asyncio
+        from batch_processor import run_batch
+        
+        asyncio.run(run_batch(
+            args.root_dir,
+            args.output,
+            workers=args.workers,
+            students_in_flight=args.students_in_flight,
+            max_concurrency=args.concurrency,
+            limit=args.limit,
+            retry_failed=args.retry_failed,
+            enable_school_ranking=not args.no_ranking,
+            enable_student_tags=not args.no_tags,
+            force_refresh=args.force_refresh,
+            report_every=args.report_every
+        ))
     else:
-        print("请指定要执行的命令: resume, offer, excel 或 combined")
+        print("请指定要执行的命令: resume, offer, excel, combined 或 batch")
         
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,311 @@
+import re
+import copy
+from typing import Any, Dict, List, Tuple
+
+from token_budget import estimate_tokens
+
+# 常见模型的上下文长度（tokens），按模型名最长前缀匹配；OpenRouter的 "openai/gpt-4o" 会先去掉厂商前缀
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1000000,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+    "claude": 200000,
+    "gemini": 1000000,
+    "deepseek": 64000,
+    "qwen": 32768,
+    "llama-3": 8192,
+    "llama-3.1": 128000,
+    "mistral": 32768,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# 为模型输出预留的tokens
+OUTPUT_RESERVE_TOKENS = 4096
+
+# 单次调用中文档文本的默认上限：即使上下文足够大，过长的输入也会明显拖慢响应、增加费用
+DEFAULT_DOCUMENT_TOKENS = 12000
+
+# 超出上限时最多拆成几块并行调用，更长的文档先裁剪到 块数x上限
+DEFAULT_MAX_CHUNKS = 4
+
+# 重复片段检测：连续SHINGLE_WORDS个词在前文出现过即视为重复，重复的连续片段至少MIN_DUPLICATE_WORDS个词才删除
+SHINGLE_WORDS = 6
+MIN_DUPLICATE_WORDS = 10
+
+# 切分片段的目标大小（tokens）
+SEGMENT_TOKENS = 120
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？；;])\s+")
+
+# 与抽取内容相关的词，以及条款、隐私声明等样板文字的特征词
+RELEVANT_RE = re.compile(
+    r"admi|offer|scholarship|award|tuition|fellowship|program|degree|master|bachelor|ph\.?d|"
+    r"universit|college|school|semester|fall|spring|gpa|toefl|ielts|gre|gmat|"
+    r"intern|research|competition|录取|奖学金|专业|学位|大学|学院|成绩|实习|科研|竞赛",
+    re.IGNORECASE
+)
+BOILERPLATE_RE = re.compile(
+    r"terms (?:and|&) conditions|privacy|personal (?:data|information)|data protection|liabilit|"
+    r"refund|withdrawal polic|code of conduct|disclaimer|governing law|hereby|pursuant|"
+    r"免责|隐私|条款|个人信息",
+    re.IGNORECASE
+)
+
+# 合并分块结果时用于识别同一条目的字段
+MERGE_KEYS = {
+    "testScores": ("testName", "testScore"),
+    "experiences": ("organization", "role", "description"),
+    "admissions": ("school", "program"),
+}
+_EMPTY_VALUES = {"", "n/a", "na", "none", "null", "unknown", "未知", "无"}
+
+
+def context_tokens(model_name: str) -> int:
+    """按模型名查上下文长度"""
+    name = model_name.lower().split("/")[-1]
+    matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_TOKENS
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)]
+
+
+def document_budget(model_name: str, prompt_tokens: int, max_document_tokens: int = DEFAULT_DOCUMENT_TOKENS) -> int:
+    """
+    计算单次调用中文档文本可用的tokens
+
+    Args:
+        model_name: 模型名称
+        prompt_tokens: 提示词模板（不含文档）的tokens
+        max_document_tokens: 文档文本的上限
+
+    Returns:
+        可用的tokens（至少1000）
+    """
+    available = context_tokens(model_name) - prompt_tokens - OUTPUT_RESERVE_TOKENS
+    return max(1000, min(max_document_tokens, available))
+
+
+def remove_repeated_spans(text: str) -> str:
+    """
+    删除重复出现的长片段（每页重复的页眉页脚、重复附上的条款页等），保留第一次出现
+
+    提取的文本已合并为一行，无法按页比较，因此按词序列检测：连续SHINGLE_WORDS个词
+    在前文出现过的位置标记为重复，只删除长度达到MIN_DUPLICATE_WORDS的连续重复片段。
+    """
+    words = text.split()
+    if len(words) < MIN_DUPLICATE_WORDS:
+        return text
+    duplicate = [False] * len(words)
+    seen = set()
+    for i in range(len(words) - SHINGLE_WORDS + 1):
+        shingle = tuple(words[i:i + SHINGLE_WORDS])
+        if shingle in seen:
+            for j in range(i, i + SHINGLE_WORDS):
+                duplicate[j] = True
+        else:
+            seen.add(shingle)
+
+    kept = []
+    i = 0
+    while i < len(words):
+        if not duplicate[i]:
+            kept.append(words[i])
+            i += 1
+            continue
+        end = i
+        while end < len(words) and duplicate[end]:
+            end += 1
+        if end - i < MIN_DUPLICATE_WORDS:
+            kept.extend(words[i:end])
+        i = end
+    return " ".join(kept)
+
+
+def split_segments(text: str, segment_tokens: int = SEGMENT_TOKENS) -> List[str]:
+    """按句子切分并合并成约segment_tokens大小的片段，过长的句子按词切开"""
+    segments = []
+    current, current_tokens = [], 0
+    for sentence in _SENTENCE_END_RE.split(text):
+        pieces = [sentence]
+        if estimate_tokens(sentence) > segment_tokens:
+            words = sentence.split()
+            step = max(1, segment_tokens * 3 // 4)
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+            if len(pieces) == 1 and estimate_tokens(sentence) > segment_tokens * 2:
+                # 没有空格的长文本（如中文）按字符切开
+                size = segment_tokens
+                pieces = [sentence[i:i + size] for i in range(0, len(sentence), size)]
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if current and current_tokens + tokens > segment_tokens:
+                segments.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        segments.append(" ".join(current))
+    return segments
+
+
+def _segment_score(segment: str) -> int:
+    return len(RELEVANT_RE.findall(segment)) - 2 * len(BOILERPLATE_RE.findall(segment))
+
+
+def trim_segments(segments: List[str], budget: int) -> Tuple[List[str], int]:
+    """
+    裁剪到预算以内：先去掉样板文字为主的片段，仍超出时按相关度保留片段（相同相关度优先保留靠前的）
+
+    Returns:
+        (按原顺序保留的片段, 删除的片段数)
+    """
+    tokens = [estimate_tokens(s) for s in segments]
+    if sum(tokens) <= budget:
+        return segments, 0
+    scores = [_segment_score(s) for s in segments]
+    keep = [score >= 0 or not BOILERPLATE_RE.search(s) for s, score in zip(segments, scores)]
+    if sum(t for t, k in zip(tokens, keep) if k) > budget:
+        order = sorted((i for i in range(len(segments)) if keep[i]), key=lambda i: (-scores[i], i))
+        keep = [False] * len(segments)
+        used = 0
+        for i in order:
+            if used + tokens[i] <= budget:
+                keep[i] = True
+                used += tokens[i]
+    kept = [s for s, k in zip(segments, keep) if k]
+    return kept, len(segments) - len(kept)
+
+
+def pack_chunks(segments: List[str], budget: int) -> List[str]:
+    """把片段按顺序装入不超过budget的块中"""
+    chunks, current, current_tokens = [], [], 0
+    for segment in segments:
+        tokens = estimate_tokens(segment)
+        if current and current_tokens + tokens > budget:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(segment)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def plan_document(text: str, budget: int, max_chunks: int = DEFAULT_MAX_CHUNKS) -> List[str]:
+    """
+    把文档整理成一次或多次LLM调用的输入
+
+    1. 删除重复的长片段（页眉页脚、重复的条款页）
+    2. 仍超过 budget x max_chunks 时裁剪（优先去掉条款、隐私声明等样板文字）
+    3. 超过budget时拆成多块，由调用方并行抽取后合并（max_chunks为1时只裁剪不拆分）
+
+    Args:
+        text: 文档文本
+        budget: 单次调用的文档tokens上限
+        max_chunks: 最多拆成的块数
+
+    Returns:
+        每次调用使用的文本列表
+    """
+    if estimate_tokens(text) <= budget:
+        return [text]
+    deduped = remove_repeated_spans(text)
+    original_tokens = estimate_tokens(text)
+    tokens = estimate_tokens(deduped)
+    if tokens <= budget:
+        print(f"文档删除重复片段: {original_tokens} -> {tokens} tokens")
+        return [deduped]
+
+    segments = split_segments(deduped)
+    target = budget * max(1, max_chunks)
+    kept, dropped = trim_segments(segments, target)
+    chunks = pack_chunks(kept, budget)
+    while len(chunks) > max_chunks:
+        # 块的边界留有空隙时装箱会多出一块，逐步收紧裁剪目标
+        target -= budget // 4
+        kept, dropped = trim_segments(segments, target)
+        chunks = pack_chunks(kept, budget)
+    print(f"文档超出预算: {original_tokens} tokens，删除重复后 {tokens} tokens，"
+          f"裁剪 {dropped} 个片段，拆成 {len(chunks)} 块（每块上限 {budget} tokens）")
+    return chunks
+
+
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in _EMPTY_VALUES
+    if isinstance(value, (list, dict)):
+        return not value
+    return False
+
+
+def _norm(value: Any) -> str:
+    return " ".join(str(value).lower().split()) if not _is_empty(value) else ""
+
+
+def _same_item(a: Dict[str, Any], b: Dict[str, Any], keys: Tuple[str, ...]) -> bool:
+    """第一个键必须相同；其余键在两边都有值时必须相同"""
+    if not _norm(a.get(keys[0])) or _norm(a.get(keys[0])) != _norm(b.get(keys[0])):
+        return False
+    for key in keys[1:]:
+        va, vb = _norm(a.get(key)), _norm(b.get(key))
+        if va and vb and va != vb:
+            return False
+    return True
+
+
+def _fill(target: Dict[str, Any], source: Dict[str, Any]):
+    """用source补全target中缺失或为空的字段，嵌套的字典逐层补全"""
+    for key, value in source.items():
+        if _is_empty(value):
+            target.setdefault(key, value)
+        elif _is_empty(target.get(key)):
+            target[key] = value
+        elif isinstance(target[key], dict) and isinstance(value, dict):
+            _fill(target[key], value)
+
+
+def merge_analyses(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合并各块的抽取结果（同一JSON结构）
+
+    标量字段取第一个有效值，对象逐字段补全；testScores/experiences/admissions 等列表按
+    MERGE_KEYS 识别同一条目并补全字段，其他列表去重拼接。
+
+    Args:
+        results: 按文档顺序排列的各块结果
+
+    Returns:
+        合并后的结果
+    """
+    merged: Dict[str, Any] = {}
+    for result in copy.deepcopy(results):
+        for key, value in result.items():
+            if isinstance(value, list):
+                items = merged.setdefault(key, [])
+                if not isinstance(items, list):
+                    continue
+                keys = MERGE_KEYS.get(key)
+                for item in value:
+                    if keys and isinstance(item, dict):
+                        match = next((x for x in items if isinstance(x, dict) and _same_item(x, item, keys)), None)
+                        if match is not None:
+                            _fill(match, item)
+                            continue
+                        items.append(dict(item))
+                    elif item not in items:
+                        items.append(item)
+            elif isinstance(value, dict):
+                if _is_empty(merged.get(key)):
+                    merged[key] = {}
+                if isinstance(merged[key], dict):
+                    _fill(merged[key], value)
+            elif key not in merged or (_is_empty(merged[key]) and not _is_empty(value)):
+                merged[key] = value
+    return merged
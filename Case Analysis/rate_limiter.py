@@ -0,0 +1,99 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """令牌桶限流器 - 同步和异步调用共用同一个桶，线程安全"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate_per_minute: 每分钟补充的令牌数（即允许的平均请求速率）
+            capacity: 桶容量（允许的突发请求数），默认等于每秒速率但至少为1
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预留一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # 令牌不足时记为负数，后来者排在后面等待
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """同步获取令牌，必要时阻塞等待"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """异步获取令牌，等待期间不阻塞事件循环"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# 按API密钥共享的限流器，同一密钥的所有LLMProcessor实例共用配额
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str, rate_per_minute: float) -> TokenBucket:
+    """
+    获取指定API密钥的令牌桶
+
+    Args:
+        api_key: API密钥
+        rate_per_minute: 每分钟请求数上限
+
+    Returns:
+        该密钥共享的令牌桶
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(api_key)
+        if bucket is None or bucket.rate != rate_per_minute / 60.0:
+            bucket = TokenBucket(rate_per_minute)
+            _buckets[api_key] = bucket
+        return bucket
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None,
+                base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+    """
+    计算重试等待时间：优先使用服务端的Retry-After，否则指数退避加随机抖动
+
+    Args:
+        attempt: 已重试次数（从0开始）
+        retry_after: Retry-After响应头（秒数或HTTP日期）
+        base_delay: 首次重试的基础等待秒数
+        max_delay: 最长等待秒数
+
+    Returns:
+        等待秒数
+    """
+    if retry_after:
+        try:
+            return min(max_delay, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return min(max_delay, max(0.0, retry_at.timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    delay = base_delay * (2 ** attempt)
+    return min(max_delay, delay + random.uniform(0, delay / 2))
@@ -0,0 +1,373 @@
+import re
+import ast
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import qs_usnews_school_dict
+
+# 匹配时忽略的虚词
+STOPWORDS = {"the", "of", "at", "in", "and", "for", "de"}
+
+# 通用词：模糊匹配时，学校名和查询中除这些词以外的词必须互相出现，
+# 避免 "University of California, Santa Barbara" 匹配到 "University of California, San Diego"，
+# 或 "Washington University in St. Louis" 匹配到 "University of Washington"。
+# "State"、"Technology" 等词能区分学校（University of Florida / Florida State University），不算通用词
+GENERIC_TOKENS = {"university", "universite", "universitat", "college", "institute", "institut", "school", "campus", "main"}
+
+# 录取通知中常见、但排名表括号里没有的缩写：缩写 -> 规范化后的学校名
+EXTRA_ALIASES = {
+    "uc berkeley": "university california berkeley",
+    "ucla": "university california los angeles",
+    "ucsd": "university california san diego",
+    "uc san diego": "university california san diego",
+    "upenn": "university pennsylvania",
+    "penn": "university pennsylvania",
+    "uiuc": "university illinois urbana champaign",
+    "cmu": "carnegie mellon university",
+    "usc": "university southern california",
+    "umich": "university michigan ann arbor",
+    "jhu": "johns hopkins university",
+    "hku": "university hong kong",
+    "hkust": "hong kong university science technology",
+    "polyu": "hong kong polytechnic university",
+    "cityu": "city university hong kong",
+    "ucl": "university college london",
+    "kcl": "kings college london",
+    "ut austin": "university texas austin",
+    "georgia tech": "georgia institute technology",
+    "gatech": "georgia institute technology",
+    "uw": "university washington",
+    "wustl": "washington university st louis",
+}
+
+# 常见的单词缩写
+TOKEN_EXPANSIONS = {"univ": "university", "inst": "institute"}
+
+_PAREN_RE = re.compile(r"\(([^)]*)\)")
+_NON_WORD_RE = re.compile(r"[^0-9a-z]+")
+
+# 模糊匹配的最低得分
+MIN_SCORE = 0.75
+# 每次模糊匹配最多评分的候选条目数
+MAX_CANDIDATES = 10
+# 出现在超过该比例条目中的三元组（如 "uni"、"ity"）区分度低，不用于选取候选
+COMMON_GRAM_RATIO = 0.2
+# 允许拼写错误的最短词长；更短的词（如 "york"、"bath"）必须完全一致
+MIN_TYPO_TOKEN_LENGTH = 5
+
+
+def normalize_name(name: str) -> str:
+    """
+    规范化学校名：去掉重音符号、统一小写、标点变空格、去掉虚词
+
+    Args:
+        name: 原始学校名
+
+    Returns:
+        规范化后的名称，如 "The University of Texas--Austin" -> "university texas austin"
+    """
+    text = name or ""
+    if not text.isascii():
+        # 纯ASCII的名称（绝大多数）没有重音符号，不必逐字符检查
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.lower()
+    text = text.replace("&", " and ").replace("'", "").replace("’", "")
+    tokens = [TOKEN_EXPANSIONS.get(t, t) for t in _NON_WORD_RE.split(text) if t and t not in STOPWORDS]
+    return " ".join(tokens)
+
+
+def trigrams(text: str) -> Set[str]:
+    """返回带边界填充的字符三元组集合"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """a 和 b 是否只差一处编辑（增、删、改一个字母，或交换相邻两个字母）"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and a[i] == b[i + 1] and a[i + 1] == b[i])
+
+
+def _deletions(token: str) -> Set[str]:
+    """删除一个字母后的所有写法"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _contains(tokens: List[str], sub: List[str]) -> bool:
+    """sub 是否作为连续片段出现在 tokens 中"""
+    n = len(sub)
+    if n > len(tokens) or sub[0] not in tokens:
+        return False
+    return any(tokens[i:i + n] == sub for i in range(len(tokens) - n + 1))
+
+
+def load_ranking_entries(table_name: str) -> List[Tuple[int, str]]:
+    """
+    读取排名表的全部条目
+
+    排名表是以名次为键的字典字面量，并列名次的重复键在运行时只保留最后一个学校，
+    因此直接解析源码取回所有 (名次, 学校名)；解析失败时退回字典内容。
+
+    Args:
+        table_name: qs_usnews_school_dict 中的变量名
+
+    Returns:
+        (名次, 学校名) 列表
+    """
+    try:
+        source = Path(qs_usnews_school_dict.__file__).read_text(encoding="utf-8")
+        for node in ast.parse(source).body:
+            if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict)
+                    and any(isinstance(t, ast.Name) and t.id == table_name for t in node.targets)):
+                return [(ast.literal_eval(k), ast.literal_eval(v)) for k, v in zip(node.value.keys, node.value.values)]
+    except (OSError, SyntaxError, ValueError) as e:
+        print(f"解析排名表源码失败，使用字典内容: {str(e)}")
+    return list(getattr(qs_usnews_school_dict, table_name).items())
+
+
+class SchoolResolver:
+    """学校名到排名的索引 - 精确别名表 + 三元组倒排索引"""
+
+    def __init__(self, entries: List[Tuple[int, str]], extra_aliases: Optional[Dict[str, str]] = None,
+                 memo_size: int = 4096):
+        """
+        构建索引
+
+        Args:
+            entries: (名次, 学校名) 列表
+            extra_aliases: 额外的缩写，缩写 -> 规范化后的学校名
+            memo_size: 缓存的查询结果数量（同一学校名通常会反复出现），0表示不缓存
+        """
+        self.entries = entries
+        self.memo_size = memo_size
+        self._memo: Dict[str, Optional[Tuple[int, str, float]]] = {}
+        # 规范化别名 -> 条目序号；同一别名指向多个学校时（如NTU）不作为精确匹配使用
+        alias_owners: Dict[str, Set[int]] = defaultdict(set)
+        self.keys: List[List[str]] = []
+        for idx, (_, name) in enumerate(entries):
+            keys = self._aliases(name)
+            self.keys.append(keys)
+            for key in keys:
+                alias_owners[key].add(idx)
+
+        self.exact: Dict[str, int] = {key: next(iter(owners)) for key, owners in alias_owners.items() if len(owners) == 1}
+        for alias, target in (extra_aliases or {}).items():
+            alias_key = normalize_name(alias)
+            if target in self.exact and alias_key not in alias_owners:
+                self.exact[alias_key] = self.exact[target]
+
+        # 三元组 -> 条目序号（缩写太短，不参与模糊匹配）
+        self.index: Dict[str, Set[int]] = defaultdict(set)
+        for idx, keys in enumerate(self.keys):
+            for key in keys:
+                if len(key) > 4:
+                    for gram in trigrams(key):
+                        self.index[gram].add(idx)
+        self._key_grams = [[(key, key.split(), trigrams(key)) for key in keys if len(key) > 4] for keys in self.keys]
+        # 排名表中出现过的词：这些是真实校名用词，不会被当作其他词的拼写错误
+        self.vocabulary = {token for keys in self.keys for key in keys for token in key.split()}
+        # 删除一个字母后的写法 -> 原词，用于查找只差一处编辑的词
+        self._typo_index: Dict[str, Set[str]] = defaultdict(set)
+        for token in self.vocabulary:
+            if len(token) >= MIN_TYPO_TOKEN_LENGTH:
+                for variant in _deletions(token) | {token}:
+                    self._typo_index[variant].add(token)
+        max_postings = max(1, int(len(entries) * COMMON_GRAM_RATIO))
+        self._rare_grams = {gram for gram, postings in self.index.items() if len(postings) <= max_postings}
+
+    @staticmethod
+    def _aliases(name: str) -> List[str]:
+        """学校名的所有规范化别名：全称、去掉括号的全称、括号中的缩写、" - " 之前的部分"""
+        aliases = [name, _PAREN_RE.sub(" ", name)]
+        aliases.extend(_PAREN_RE.findall(name))
+        if " - " in name:
+            aliases.append(name.split(" - ")[0])
+        keys = []
+        for alias in aliases:
+            key = normalize_name(alias)
+            if key and key not in keys:
+                keys.append(key)
+        return keys
+
+    def resolve(self, school_name: str) -> Optional[Tuple[int, str, float]]:
+        """
+        查找学校
+
+        Args:
+            school_name: 录取通知中的学校名
+
+        Returns:
+            (名次, 排名表中的学校名, 得分)，找不到返回None；得分1.0表示精确匹配
+        """
+        if school_name in self._memo:
+            return self._memo[school_name]
+        match = self._resolve(school_name)
+        if self.memo_size:
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[school_name] = match
+        return match
+
+    def _resolve(self, school_name: str) -> Optional[Tuple[int, str, float]]:
+        query = normalize_name(school_name)
+        if not query:
+            return None
+        idx = self.exact.get(query)
+        if idx is not None:
+            rank, name = self.entries[idx]
+            return rank, name, 1.0
+        return self._contained_alias(query.split()) or self._fuzzy(query)
+
+    def _contained_alias(self, query_tokens: List[str]) -> Optional[Tuple[int, str, float]]:
+        """
+        查询以某个学校的完整别名开头时直接返回（如带 "Graduate School" 后缀的写法）
+
+        只做字典查找，比三元组评分快得多。别名必须在开头：前面多出的词通常是校名的一部分，
+        "Chinese University of Hong Kong" 不能落到其中的 "University of Hong Kong"
+        """
+        for length in range(len(query_tokens) - 1, 1, -1):
+            idx = self.exact.get(" ".join(query_tokens[:length]))
+            if idx is not None:
+                rank, name = self.entries[idx]
+                return rank, name, 0.9
+        return None
+
+    def _fuzzy(self, query: str) -> Optional[Tuple[int, str, float]]:
+        query_tokens = query.split()
+        # 查询中的每个非通用词都要对应排名表中的某个词，否则不可能匹配，不必评分
+        token_matches = {token: self._vocabulary_matches(token) for token in query_tokens if token not in GENERIC_TOKENS}
+        if not all(token_matches.values()):
+            return None
+        query_grams = trigrams(query)
+
+        # 拼写错误都能唯一纠正时，纠正后的写法通常就是某个别名，直接查表
+        corrected = " ".join(next(iter(token_matches[t])) if len(token_matches.get(t, ())) == 1 else t
+                             for t in query_tokens)
+        idx = self.exact.get(corrected) if corrected != query else None
+        if idx is not None:
+            score = _dice(query_grams, trigrams(corrected))
+            if score >= MIN_SCORE:
+                rank, name = self.entries[idx]
+                return rank, name, round(score, 3)
+
+        # 按共享的低频三元组数量取候选，只对少量候选评分
+        grams = query_grams & self._rare_grams or query_grams
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.index.get(gram, ()))
+        candidates = sorted(shared, key=lambda i: (-shared[i], i))[:MAX_CANDIDATES]
+
+        scored = []
+        reverse_hits = set()
+        for idx in candidates:
+            best = 0.0
+            for key, key_tokens, key_grams in self._key_grams[idx]:
+                if len(key_tokens) >= 2 and query_tokens[:len(key_tokens)] == key_tokens:
+                    # 查询以学校全称开头，如 "Columbia University in the City of New York"
+                    score = 0.9
+                elif len(query_tokens) >= 2 and _contains(key_tokens, query_tokens):
+                    # 查询是学校全称的一部分，只有唯一时才采用（见下方）
+                    reverse_hits.add(idx)
+                    score = 0.85
+                else:
+                    # 先算代价低的三元组相似度，达不到阈值时不必再逐词比较
+                    score = _dice(query_grams, key_grams)
+                    if score < MIN_SCORE or not self._distinct_tokens_present(key_tokens, token_matches):
+                        score = 0.0
+                best = max(best, score)
+            if best >= MIN_SCORE:
+                scored.append((best, idx))
+
+        # 查询只是多个学校名的公共部分（如 "University of California"）时不作判断
+        if len(reverse_hits) > 1:
+            scored = [(score, idx) for score, idx in scored if idx not in reverse_hits]
+        if not scored:
+            return None
+        # 得分相同时取名次靠前、名称字典序靠前的，保证结果确定
+        score, idx = min(scored, key=lambda s: (-s[0], self.entries[s[1]][0], self.entries[s[1]][1]))
+        rank, name = self.entries[idx]
+        return rank, name, round(score, 3)
+
+    def _vocabulary_matches(self, token: str) -> Set[str]:
+        """
+        查询中的词可能对应的排名表用词
+
+        排名表里的词只对应自身；其他词只容忍一处编辑的拼写错误（如 "Melon" -> "mellon"），
+        因此 "Northeastern" 不会因字形相近对应到 "Northwestern"
+        """
+        if token in self.vocabulary:
+            return {token}
+        candidates = set(self._typo_index.get(token, ()))
+        for variant in _deletions(token):
+            candidates |= self._typo_index.get(variant, set())
+        return {candidate for candidate in candidates if within_one_edit(candidate, token)}
+
+    @staticmethod
+    def _distinct_tokens_present(key_tokens: List[str], token_matches: Dict[str, Set[str]]) -> bool:
+        """学校名和查询中的非通用词都必须一一对应（token_matches 为查询中非通用词的对应用词）"""
+        matched = set().union(*token_matches.values())
+        if any(token not in GENERIC_TOKENS and token not in matched for token in key_tokens):
+            return False
+        return all(not matches.isdisjoint(key_tokens) for matches in token_matches.values())
+
+
+# 排名类型 -> 排名表变量名
+RANKING_TABLES = {
+    "QS": "qs_school_ranking",
+    "US News": "usnews_school_ranking",
+}
+
+
+@lru_cache(maxsize=None)
+def get_resolver(ranking_type: str) -> Optional[SchoolResolver]:
+    """
+    获取指定排名类型的索引（首次调用时构建，之后复用）
+
+    Args:
+        ranking_type: "QS" 或 "US News"
+
+    Returns:
+        索引，未知的排名类型返回None
+    """
+    table_name = RANKING_TABLES.get(ranking_type)
+    if table_name is None:
+        return None
+    return SchoolResolver(load_ranking_entries(table_name), EXTRA_ALIASES)
+
+
+def resolve_school_rank(school_name: str, ranking_type: str) -> Optional[int]:
+    """
+    查找学校在指定排名中的名次
+
+    Args:
+        school_name: 学校名
+        ranking_type: "QS" 或 "US News"
+
+    Returns:
+        名次，找不到返回None
+    """
+    resolver = get_resolver(ranking_type)
+    if resolver is None:
+        return None
+    match = resolver.resolve(school_name)
+    return match[0] if match else None
@@ -0,0 +1,250 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# SSE 结束标记
+SSE_DONE = "[DONE]"
+
+# 两次推送部分结果之间的最小间隔（秒），避免界面频繁重绘
+PARTIAL_INTERVAL = 0.25
+
+_WHITESPACE = " \t\r\n"
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def parse_sse_line(line: Union[bytes, str]) -> Optional[str]:
+    """
+    解析一行SSE数据
+
+    Args:
+        line: 原始行（bytes或str）
+
+    Returns:
+        "data:" 后的内容；注释行（如OpenRouter的 ": OPENROUTER PROCESSING"）、空行和其他字段返回None
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    line = line.rstrip("\r\n")
+    if not line.startswith("data:"):
+        return None
+    return line[5:].lstrip(" ")
+
+
+def delta_content(event: Dict[str, Any]) -> str:
+    """从流式响应的一个事件中取出新增文本"""
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    choice = choices[0]
+    delta = choice.get("delta") or {}
+    return delta.get("content") or choice.get("text") or ""
+
+
+class IncrementalJSONParser:
+    """
+    增量JSON解析器 - 边接收LLM输出边解析，随时给出已完整生成部分组成的对象
+
+    每个字符只扫描一次，记录最近一个"安全位置"（某个成员/元素的值刚好完整结束的位置）
+    以及当时尚未闭合的容器；取快照时截到安全位置并补上对应的右括号即可解析。
+    还在生成中的字符串、数字和对象成员不会出现在快照中。
+    JSON开始前的说明文字或 ```json 标记会被跳过。
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start = -1  # 根对象起始位置
+        self._stack: List[str] = []  # 未闭合的容器："{" 或 "["
+        self._expect: List[str] = []  # 每层容器接下来期待的内容："key"/"colon"/"value"/"comma"
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._in_scalar = False  # 正在读取数字或 true/false/null
+        self._safe_end = -1
+        self._safe_stack: Tuple[str, ...] = ()
+        self._snapshot_end = -1
+        self._snapshot: Optional[Any] = None
+        self.done = False
+
+    @property
+    def json_text(self) -> Optional[str]:
+        """根对象已完整生成时返回其文本（不含前后的说明文字和代码块标记），否则返回None"""
+        return self.text[self._start:self._safe_end] if self.done else None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        追加一段文本
+
+        Args:
+            chunk: 新生成的文本
+
+        Returns:
+            是否有新的成员/元素完整生成（快照发生了变化）
+        """
+        self.text += chunk
+        before = self._safe_end
+        text = self.text
+        for pos in range(self._pos, len(text)):
+            if self.done:
+                break
+            self._scan(text[pos], pos)
+        self._pos = len(text)
+        return self._safe_end != before
+
+    def _mark_safe(self, end: int):
+        self._safe_end = end
+        self._safe_stack = tuple(self._stack)
+
+    def _value_done(self, end: int):
+        """当前容器中的一个值完整结束（end为值之后的位置）"""
+        if not self._stack:
+            self.done = True
+            self._mark_safe(end)
+            return
+        self._expect[-1] = "comma"
+        self._mark_safe(end)
+
+    def _scan(self, ch: str, pos: int):
+        if self._start < 0:
+            if ch == "{":
+                self._start = pos
+                self._stack.append("{")
+                self._expect.append("key")
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._string_is_key:
+                    self._expect[-1] = "colon"
+                else:
+                    self._value_done(pos + 1)
+            return
+
+        if self._in_scalar:
+            if ch in _WHITESPACE or ch in ",]}":
+                self._in_scalar = False
+                self._value_done(pos)
+            else:
+                return
+
+        if ch in _WHITESPACE:
+            return
+        expect = self._expect[-1] if self._expect else None
+        if ch == '"':
+            self._in_string = True
+            self._string_is_key = expect == "key"
+        elif ch in "{[":
+            self._stack.append(ch)
+            self._expect.append("key" if ch == "{" else "value")
+        elif ch in "}]":
+            if self._stack:
+                self._stack.pop()
+                self._expect.pop()
+                self._value_done(pos + 1)
+        elif ch == ":":
+            if self._expect:
+                self._expect[-1] = "value"
+        elif ch == ",":
+            if self._expect:
+                self._expect[-1] = "key" if self._stack[-1] == "{" else "value"
+        else:
+            # 数字或 true/false/null 的开头
+            self._in_scalar = True
+
+    def snapshot(self) -> Optional[Any]:
+        """
+        返回当前已完整生成部分组成的对象
+
+        Returns:
+            解析出的对象；根对象尚未开始时返回None
+        """
+        if self._safe_end < 0:
+            return {} if self._start >= 0 else None
+        if self._safe_end != self._snapshot_end:
+            closers = "".join(_CLOSERS[c] for c in reversed(self._safe_stack))
+            try:
+                self._snapshot = json.loads(self.text[self._start:self._safe_end] + closers)
+            except json.JSONDecodeError:
+                # 输出本身不是合法JSON时保留上一次的快照，最终结果由完整解析决定
+                pass
+            self._snapshot_end = self._safe_end
+        return self._snapshot
+
+
+class SSEJSONStream:
+    """
+    处理chat/completions流式响应：逐行解析SSE事件、增量解析JSON，并按间隔推送部分结果
+    """
+
+    def __init__(self, on_partial: Optional[Callable[[Any], None]] = None, interval: float = PARTIAL_INTERVAL):
+        """
+        Args:
+            on_partial: 有新的成员/元素完整生成时的回调，参数为当前的部分结果
+            interval: 两次回调之间的最小间隔（秒）
+        """
+        self.parser = IncrementalJSONParser()
+        self.on_partial = on_partial
+        self.interval = interval
+        self.error: Optional[Dict[str, Any]] = None
+        self._last_emit = 0.0
+
+    def feed_line(self, line: Union[bytes, str]) -> bool:
+        """
+        处理一行SSE数据
+
+        Returns:
+            流是否应继续读取（收到 [DONE] 或出错事件时返回False）
+        """
+        payload = parse_sse_line(line)
+        if not payload:
+            return True
+        if payload == SSE_DONE:
+            return False
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            return True
+        if "error" in event:
+            # 流已开始后服务端以事件形式返回错误（如上游模型超时）
+            self.error = {"error": "流式响应中断", "details": event["error"]}
+            return False
+        if self.parser.feed(delta_content(event)) and self.on_partial is not None:
+            now = time.monotonic()
+            if now - self._last_emit >= self.interval:
+                self._last_emit = now
+                self.on_partial(self.parser.snapshot())
+        return True
+
+
+def validate_analysis(kind: str, result: Any) -> List[str]:
+    """
+    检查LLM解析结果的结构
+
+    Args:
+        kind: "resume" 或 "offer"
+        result: 解析出的对象
+
+    Returns:
+        问题列表，结构正确时为空
+    """
+    if not isinstance(result, dict):
+        return [f"结果应为JSON对象，实际为 {type(result).__name__}"]
+    problems = []
+    if kind == "resume":
+        expected = {"education": dict, "testScores": list, "experiences": list}
+    else:
+        expected = {"admissions": list}
+        if "admissions" not in result:
+            problems.append("缺少 admissions")
+    for field, field_type in expected.items():
+        if field in result and not isinstance(result[field], field_type):
+            problems.append(f"{field} 应为 {'对象' if field_type is dict else '数组'}")
+    for field in ("testScores", "experiences", "admissions"):
+        if isinstance(result.get(field), list) and not all(isinstance(item, dict) for item in result[field]):
+            problems.append(f"{field} 的元素应为对象")
+    return problems
@@ -1,4 +1,5 @@
 import os
+import re
 import sys
 import json
 import asyncio
@@ -6,7 +7,38 @@ from pathlib import Path
 from processor import SimpleProcessor
 from llm_processor import LLMProcessor
 from config_loader import load_api_config
-from qs_usnews_school_dict import qs_school_ranking, usnews_school_ranking
+from school_resolver import resolve_school_rank
+
+# K12相关的关键词列表，用于识别K12学校
+K12_KEYWORDS = ["K12", "k12", "High School", "high school", "Middle School",
+                "middle school", "小学", "中学", "高中", "Elementary", "Secondary",
+                "Preparatory", "Prep", "Academy", "Day School", "Grammar School",
+                "Primary", "Junior"]
+
+# 关键词统一小写后合并为一个正则，学校名和项目名各扫描一遍即可
+K12_KEYWORD_RE = re.compile("|".join(re.escape(k) for k in sorted({k.lower() for k in K12_KEYWORDS})))
+
+
+def _parse_number(value, split_colon=False):
+    """
+    按标签规则解析GPA、考试分数或排名
+
+    Args:
+        value: 原始值
+        split_colon: 是否取冒号后的部分（处理"总分: 88"格式的分数）
+
+    Returns:
+        float: 解析出的数值，空值、非数字类型或无法解析时返回NaN
+    """
+    if not value or not isinstance(value, (int, float, str)):
+        return float("nan")
+    try:
+        if split_colon:
+            value = str(value)
+            value = value.split(":")[-1].strip() if ":" in value else value
+        return float(value)
+    except (ValueError, TypeError):
+        return float("nan")
 
 def calculate_student_tags(student_data):
     """
@@ -61,49 +93,28 @@ def calculate_student_tags(student_data):
     low_score = False  # 标记成绩是否较低
     good_ranking = False  # 标记是否有排名好的学校录取
     
-    # 2.1 检查GPA是否低于3.2
-    if gpa_value and isinstance(gpa_value, (int, float, str)):
-        try:
-            # 尝试将GPA转换为浮点数进行比较
-            gpa = float(gpa_value)
-            if gpa < 3.2:  # GPA低于3.2被视为"低分"
-                low_score = True
-        except (ValueError, TypeError):
-            pass  # 忽略无法转换为数字的GPA
+    # 2.1 检查GPA是否低于3.2（无法转换为数字的GPA解析为NaN，比较结果为False）
+    if _parse_number(gpa_value) < 3.2:
+        low_score = True
     
     # 2.2 检查语言成绩是否低
     for test in test_scores:
-        test_name = test.get("testName", "").lower()  # 获取考试名称并转小写
-        test_score = test.get("testScore")  # 获取考试分数
+        test_name = str(test.get("testName") or "").lower()  # 获取考试名称并转小写
+        # 处理可能的格式: "总分: 88"或直接数字
+        score_val = _parse_number(test.get("testScore"), split_colon=True)
         
-        if test_score and isinstance(test_score, (int, float, str)):
-            try:
-                # 处理可能的格式: "总分: 88"或直接数字
-                score_str = str(test_score)
-                # 如果包含冒号，提取冒号后的数字部分
-                score_val = float(score_str.split(":")[-1].strip() if ":" in score_str else score_str)
-                
-                # 检查托福分数是否低于90
-                if ("托福" in test_name or "toefl" in test_name) and score_val < 90:
-                    low_score = True
-                # 检查雅思分数是否低于6.5
-                elif ("雅思" in test_name or "ielts" in test_name) and score_val < 6.5:
-                    low_score = True
-            except (ValueError, TypeError):
-                pass  # 忽略无法解析的分数
-    
-    # 2.3 检查是否有排名前100的学校录取
+        # 检查托福分数是否低于90
+        if ("托福" in test_name or "toefl" in test_name) and score_val < 90:
+            low_score = True
+        # 检查雅思分数是否低于6.5
+        elif ("雅思" in test_name or "ielts" in test_name) and score_val < 6.5:
+            low_score = True
+    
+    # 2.3 检查是否有排名前100的学校录取（排名小于100被视为"好学校"）
     for adm in admissions:
-        ranking = adm.get("rankingValue")  # 获取学校排名
-        if ranking and isinstance(ranking, (int, float, str)):
-            try:
-                # 尝试将排名转换为浮点数
-                rank_val = float(ranking)
-                if rank_val < 100:  # 排名小于100被视为"好学校"
-                    good_ranking = True
-                    break
-            except (ValueError, TypeError):
-                pass  # 忽略无法转换为数字的排名
+        if _parse_number(adm.get("rankingValue")) < 100:
+            good_ranking = True
+            break
     
     # 如果同时满足"成绩较低"和"学校排名好"两个条件，添加"低分逆袭"标签
     if low_score and good_ranking:
@@ -112,15 +123,6 @@ def calculate_student_tags(student_data):
     #--------------------------------------------------
     # 3. 判断'低龄留学'标签
     #--------------------------------------------------
-    # K12相关的关键词列表，用于识别K12学校
-    k12_keywords = ["K12", "k12", "High School", "high school", "Middle School", 
-                   "middle school", "小学", "中学", "高中", "Elementary", "Secondary",
-                   "Preparatory", "Prep", "Academy", "Day School", "Grammar School", 
-                   "Primary", "Junior"]
-    
-    # "The X School"模式的正则表达式
-    the_x_school_pattern = r"^the\s+[\w\s\-']+\s+school$"
-    
     has_k12_school = False
     
     # 遍历所有录取学校
@@ -132,10 +134,8 @@ def calculate_student_tags(student_data):
             program = str(adm.get("program", "")).lower()
             
             # 方法1: 检查学校名称或项目名称中是否包含K12相关关键词
-            for keyword in k12_keywords:
-                if keyword.lower() in school or keyword.lower() in program:
-                    has_k12_school = True
-                    break
+            if K12_KEYWORD_RE.search(school) or K12_KEYWORD_RE.search(program):
+                has_k12_school = True
             
             # 如果关键词检查没有找到匹配，尝试其他模式匹配
             if not has_k12_school:
@@ -184,22 +184,9 @@ def enrich_school_rankings(analysis_data):
                 school_name = admission.get("school", "")
                 ranking_type = admission.get("rankingType", "")
                 
-                # 根据rankingType选择对应的排名字典
-                if ranking_type == "QS":
-                    ranking_dict = qs_school_ranking
-                elif ranking_type == "US News":
-                    ranking_dict = usnews_school_ranking
-                else:
-                    # 如果没有明确的排名类型，跳过处理
-                    continue
-                
-                # 在排名字典中查找学校
-                ranking = None
-                for rank, name in ranking_dict.items():
-                    # 使用部分匹配，因为学校名称可能不完全一致
-                    if school_name.lower() in name.lower() or name.lower() in school_name.lower():
-                        ranking = rank
-                        break
+                # 在对应排名表的索引中查找学校（规范化名称、缩写和模糊匹配）；
+                # 没有明确的排名类型时返回None，跳过处理
+                ranking = resolve_school_rank(school_name, ranking_type)
                 
                 # 如果找到排名，则更新rankingValue和rankingTier
                 if ranking:
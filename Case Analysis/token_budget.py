@@ -0,0 +1,47 @@
+import re
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+# 中日韩文字和全角符号：大多数分词器中约1个字符1个token
+WIDE_CHAR_PATTERN = r"[⺀-鿿가-힯豈-﫿＀-￯]"
+_WIDE_CHAR_RE = re.compile(WIDE_CHAR_PATTERN)
+
+# 其他字符（英文、数字、标点）平均约4个字符1个token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数（不依赖具体模型的分词器）
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHAR_RE.findall(text))
+    return wide + -(-(len(text) - wide) // CHARS_PER_TOKEN)
+
+
+def estimate_tokens_array(texts: Union[pd.Series, np.ndarray], ascii_only: bool = False) -> np.ndarray:
+    """
+    对一列文本逐个估算token数（不向上取整，便于按行累加）
+
+    Args:
+        texts: 文本列，None表示空
+        ascii_only: 已知全部为ASCII（如数字列）时跳过中日韩字符统计
+
+    Returns:
+        浮点数组
+    """
+    series = pd.Series(texts, dtype=object).fillna("")
+    lengths = series.str.len().to_numpy(dtype=float)
+    if ascii_only:
+        return lengths / CHARS_PER_TOKEN
+    wide = series.str.count(WIDE_CHAR_PATTERN).to_numpy(dtype=float)
+    return wide + (lengths - wide) / CHARS_PER_TOKEN
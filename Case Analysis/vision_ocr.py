@@ -0,0 +1,92 @@
+import os
+import base64
+import requests
+from typing import Optional
+from config_loader import load_api_config
+from pdf_backends import PDFSource, open_pymupdf
+
+# 扫描件识别提示词
+OCR_PROMPT = (
+    "Transcribe all text on this scanned document page exactly as it appears. "
+    "Keep the original reading order and line breaks. Return only the text."
+)
+
+
+class VisionOCR:
+    """扫描件识别 - 将PDF页面渲染为图片后交给视觉语言模型转写文本"""
+
+    def __init__(self, api_key: Optional[str] = None, api_base: Optional[str] = None,
+                 model_name: Optional[str] = None, dpi: int = 150, max_pages: int = 10):
+        """
+        初始化扫描件识别
+
+        Args:
+            api_key: API密钥，默认取环境变量OPENAI_API_KEY或api_config.json
+            api_base: API基础URL，默认取api_config.json的OPENAI_API_BASE
+            model_name: 视觉模型名称，默认取api_config.json的VISION_MODEL_NAME
+            dpi: 页面渲染分辨率
+            max_pages: 最多识别的页数（控制耗时和费用）
+        """
+        config = load_api_config()
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY") or config.get("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("未提供API密钥，无法识别扫描件")
+        self.api_base = api_base or config.get("OPENAI_API_BASE") or "https://api.openai.com/v1"
+        self.model_name = model_name or config.get("VISION_MODEL_NAME") or "qwen/qwen2.5-vl-72b-instruct"
+        self.dpi = dpi
+        self.max_pages = max_pages
+        self._http = requests.Session()
+
+    def extract_text(self, pdf_path: PDFSource) -> Optional[str]:
+        """
+        识别扫描版PDF的文本
+
+        Args:
+            pdf_path: PDF文件路径或内存中的PDF内容
+
+        Returns:
+            识别出的文本，失败返回None
+        """
+        import fitz
+
+        try:
+            texts = []
+            with open_pymupdf(fitz, pdf_path) as doc:
+                for i in range(min(doc.page_count, self.max_pages)):
+                    image = doc[i].get_pixmap(dpi=self.dpi).tobytes("png")
+                    page_text = self._transcribe(image)
+                    if page_text:
+                        texts.append(page_text)
+            text = "\n".join(texts)
+            print(f"扫描件识别完成，长度: {len(text)}")
+            return text or None
+        except Exception as e:
+            print(f"扫描件识别失败: {str(e)}")
+            return None
+
+    def _transcribe(self, image: bytes) -> Optional[str]:
+        """调用视觉模型转写一页图片"""
+        data = {
+            "model": self.model_name,
+            "messages": [{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": OCR_PROMPT},
+                    {"type": "image_url", "image_url": {
+                        "url": f"data:image/png;base64,{base64.b64encode(image).decode('utf-8')}"
+                    }}
+                ]
+            }],
+            "temperature": 0
+        }
+        response = self._http.post(
+            f"{self.api_base}/chat/completions",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json=data,
+            timeout=120
+        )
+        if response.status_code != 200:
+            print(f"视觉模型请求失败: HTTP {response.status_code}")
+            return None
+        choices = response.json().get("choices") or []
+        return choices[0]["message"].get("content") if choices else None
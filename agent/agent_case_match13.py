@@ -38,6 +38,8 @@ import json
 import os
 import requests
 import traceback
+from perf_tracing import span, llm_token_counter, record_usage_metrics
+from sheet_cache import load_sheet
 
 class CustomSerperDevTool(SerperDevTool):
     n_results: int = 3  # 添加类型注解
@@ -556,6 +558,10 @@ class PromptTemplates:
             return True
         return False
 
+    def get_all_templates(self):
+        """返回全部模板的副本，用于提交后台任务"""
+        return dict(self._templates)
+
 
 
 
@@ -729,7 +735,11 @@ def clean_json_string(json_str):
         return '{"recommended_tags": {"countries": [], "majors": [], "businessCapabilities": [], "serviceQualities": [], "stability": [], "schoolLevel": [], "businessLocation": []}}'
 
 
-def process_student_case2(student_case, callback=None):
+def process_student_case2(student_case, callback=None, prompt_templates=None):
+    # 后台任务线程中无法访问 st.session_state，需要显式传入提示词模板
+    if prompt_templates is None:
+        prompt_templates = st.session_state.prompt_templates
+
     try:
         if callback:
 
@@ -739,7 +749,7 @@ def process_student_case2(student_case, callback=None):
         expert = Agent(
             role='留学顾问匹配助手',
             goal='分析学生背景并输出标准化标签',
-            backstory=st.session_state.prompt_templates.get_template('tag_specialist'),
+            backstory=prompt_templates.get_template('tag_specialist'),
             allow_delegation=False,
             llm=default_llm
         )
@@ -754,12 +764,12 @@ def process_student_case2(student_case, callback=None):
             {student_case}
 
             标签体系：
-            {st.session_state.prompt_templates.get_template('tag_system')}
+            {prompt_templates.get_template('tag_system')}
 
-            {st.session_state.prompt_templates.get_template('tag_task')}
+            {prompt_templates.get_template('tag_task')}
 
             """,
-            expected_output=st.session_state.prompt_templates.get_template('tag_recommendation_structure'),
+            expected_output=prompt_templates.get_template('tag_recommendation_structure'),
             agent=expert
         )
         
@@ -767,7 +777,8 @@ def process_student_case2(student_case, callback=None):
             callback("4️⃣ 生成标签建议...")
         
         # 执行任务并直接返回结果
-        result = task.execute()
+        with span("tag_llm"), llm_token_counter():
+            result = task.execute()
         
 
         
@@ -1185,7 +1196,7 @@ class ExcelQueryTool(BaseTool):
         
         # 存储DataFrame作为实例变量，但不作为Pydantic字段
         try:
-            self._df = pd.read_excel(file_path)
+            self._df = load_sheet(file_path)
             logger.info(f"成功加载Excel文件: {file_path}")
         except Exception as e:
             logger.error(f"加载Excel文件出错: {str(e)}")
@@ -1240,19 +1251,20 @@ class ExcelQueryTool(BaseTool):
             matched_rows = []
             
             # 遍历DataFrame的每一行
-            for idx, row in self._df.iterrows():
-                match_country = self._is_match(row['国家标签'], country_tag)
-                match_study_level = self._is_match(row['留学类别标签'], study_level_tag)
-                match_major = self._is_match(row['专业标签'], major_tag)
+            with span("excel_query_scan", rows=len(self._df)):
+                for idx, row in self._df.iterrows():
+                    match_country = self._is_match(row['国家标签'], country_tag)
+                    match_study_level = self._is_match(row['留学类别标签'], study_level_tag)
+                    match_major = self._is_match(row['专业标签'], major_tag)
                 
-                # 记录每行的匹配结果
-                logger.debug(f"行 {idx}: 国家匹配={match_country}, 留学类别匹配={match_study_level}, 专业匹配={match_major}")
-                logger.debug(f"行 {idx} 数据: 国家={row.get('国家标签', 'N/A')}, 留学类别={row.get('留学类别标签', 'N/A')}, 专业={row.get('专业标签', 'N/A')}")
+                    # 记录每行的匹配结果
+                    logger.debug(f"行 {idx}: 国家匹配={match_country}, 留学类别匹配={match_study_level}, 专业匹配={match_major}")
+                    logger.debug(f"行 {idx} 数据: 国家={row.get('国家标签', 'N/A')}, 留学类别={row.get('留学类别标签', 'N/A')}, 专业={row.get('专业标签', 'N/A')}")
                 
-                # 如果三个标签都匹配，则添加到结果中
-                if match_country and match_study_level and match_major:
-                    matched_rows.append(row)
-                    logger.info(f"找到匹配行: {idx}, 内容类型: {row.get('输出内容类型', 'N/A')}")
+                    # 如果三个标签都匹配，则添加到结果中
+                    if match_country and match_study_level and match_major:
+                        matched_rows.append(row)
+                        logger.info(f"找到匹配行: {idx}, 内容类型: {row.get('输出内容类型', 'N/A')}")
             
             # 记录匹配结果
             logger.info(f"匹配到 {len(matched_rows)} 条记录")
@@ -1441,7 +1453,9 @@ def process_student_case_with_guide(student_info, guide_prompt=None, excel_path=
         )
         
         # 执行任务
-        guide_result = guide_crew.kickoff()
+        with span("service_guide"):
+            guide_result = guide_crew.kickoff()
+            record_usage_metrics(getattr(guide_result, 'token_usage', None))
         
         return {"service_guide": guide_result}
         
@@ -1451,6 +1465,133 @@ def process_student_case_with_guide(student_info, guide_prompt=None, excel_path=
         print(f"生成服务指南时出错: {error_trace}")
         return {"service_guide": f"生成服务指南时出错: {str(e)}"}
 
+# 组装学生案例文本（页面与批量处理共用）
+def build_student_case(background, country, major, study_type, year, season, other_info=""):
+    """按标签匹配页面的格式组装学生案例文本"""
+    return f"""
+学生基本信息：
+{str(background).strip()}
+
+申请意向：
+- 申请国家：{country}
+- 申请专业：{major}
+- 留学类别：{study_type}
+- 时间规划：{year}年{season}季
+
+其他信息或需求：
+{str(other_info or "").strip()}
+"""
+
+# 健壮的标签提取函数
+def safe_extract_recommended_tags(raw_output):
+    try:
+        start_idx = raw_output.find('{')
+        end_idx = raw_output.rfind('}')
+        if start_idx != -1 and end_idx != -1:
+            json_part = raw_output[start_idx:end_idx + 1]
+            json_part = json_part.replace('```json', '').replace('```', '').strip()
+            output_dict = json.loads(json_part)
+            # 兼容 recommended_tag / recommended_tags
+            tags = None
+            if "recommended_tag" in output_dict:
+                tags = output_dict["recommended_tag"]
+            elif "recommended_tags" in output_dict:
+                tags = output_dict["recommended_tags"]
+            else:
+                tags = output_dict
+            # 兼容单复数字段名
+            def get_tag(keys, default=[]):
+                for k in keys:
+                    if k in tags:
+                        return tags[k]
+                return default
+            norm_tags = {
+                "countries": get_tag(["countries", "country"]),
+                "majors": get_tag(["majors", "major"]),
+                "schoolLevel": get_tag(["schoolLevel"]),
+                "SpecialProjects": get_tag(["SpecialProjects", "SpecialProject"]),
+                "Industryexperience": get_tag(["Industryexperience"]),
+                "Consultantbackground": get_tag(["Consultantbackground"]),
+                "businessLocation": get_tag(["businessLocation"])
+            }
+            # 类型强制
+            for key in norm_tags:
+                val = norm_tags[key]
+                if not isinstance(val, list):
+                    if val is None:
+                        norm_tags[key] = []
+                    else:
+                        norm_tags[key] = [str(val)]
+            return {"recommended_tags": norm_tags}
+    except Exception as e:
+        pass
+    # 返回空结构
+    return {"recommended_tags": {
+        "countries": [],
+        "majors": [],
+        "schoolLevel": [],
+        "SpecialProjects": [],
+        "Industryexperience": [],
+        "Consultantbackground": [],
+        "businessLocation": []
+    }}
+
+def tags_to_dataframe(output_dict, business_unit):
+    """将标准化标签转换为顾问匹配使用的单行表格"""
+    tags = output_dict["recommended_tags"]
+    return pd.DataFrame({
+        "文案顾问业务单位": [business_unit],
+        "国家标签": [', '.join(tags["countries"])],
+        "专业标签": [', '.join(tags["majors"])],
+        "名校专家": [', '.join(tags["schoolLevel"])],
+        "特殊项目标签": [', '.join(tags["SpecialProjects"])],
+        "行业经验": [', '.join(tags["Industryexperience"])],
+        "文案背景": [', '.join(tags["Consultantbackground"])],
+        "业务单位所在地": [', '.join(tags["businessLocation"])],
+    })
+
+# 后台任务：标签提取 + 个性服务指南
+def run_tag_guide_pipeline(payload):
+    """
+    后台任务处理函数，依次执行标签提取和个性服务指南生成
+
+    Args:
+        payload: 任务参数，包含 student_case、templates、generate_service_guide、
+                 guide_prompt、excel_path
+
+    Returns:
+        与页面同步执行时相同结构的结果字典
+    """
+    prompt_templates = PromptTemplates()
+    for key, value in payload.get('templates', {}).items():
+        prompt_templates.update_template(key, value)
+
+    student_case = payload['student_case']
+    tag_result = process_student_case2(student_case, prompt_templates=prompt_templates)
+    result = dict(tag_result)
+    if result.get("raw_output") is not None:
+        result["raw_output"] = str(result["raw_output"])
+
+    if payload.get('generate_service_guide') and result["status"] == "success" and payload.get('other_info', '').strip():
+        excel_path = payload.get('excel_path')
+        if not excel_path or not os.path.exists(excel_path):
+            result['service_guide'] = "⚠️ 服务指南Excel文件不存在，只生成标签"
+        else:
+            try:
+                guide_result = process_student_case_with_guide(
+                    student_case,
+                    payload.get('guide_prompt'),
+                    excel_path
+                )
+                if isinstance(guide_result, dict) and 'service_guide' in guide_result:
+                    result['service_guide'] = str(guide_result['service_guide'])
+                else:
+                    result['service_guide'] = "无法生成服务指南"
+            except Exception as e:
+                result['service_guide'] = f"生成服务指南出错: {str(e)}"
+
+    return result
+
 if __name__ == "__main__":
     # 初始化配置
     #initialize_config()
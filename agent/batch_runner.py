@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+批量案例处理（无界面）：标签提取 → 个性服务指南 → 顾问匹配
+
+每行处理完成后写入SQLite检查点，中断后使用相同的批次ID重新运行即可跳过已完成的行。
+
+用法示例:
+    python batch_runner.py 历史案例.xlsx --consultant-file 顾问标签汇总.xlsx --concurrency 4 --output 结果.xlsx
+    python batch_runner.py 历史案例.xlsx --consultant-file 顾问标签汇总.xlsx --compensation-file 补偿数据.xlsx
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from agent_case_match13 import (
+    PromptTemplates,
+    build_student_case,
+    process_student_case2,
+    process_student_case_with_guide,
+    safe_extract_recommended_tags,
+    tags_to_dataframe,
+)
+from match7 import label_merge, Consultant_matching
+import perf_tracing
+from perf_tracing import span, trace
+from result_exporter import export_dataframe
+from sheet_cache import load_sheet, preload
+
+logger = logging.getLogger('batch_runner')
+
+DEFAULT_DB_PATH = './.streamlit/data.db'
+DEFAULT_GUIDE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '服务指南.xlsx')
+
+# 输入表格的列名（没有 student_case 列时按页面表单字段组装案例）
+CASE_COLUMNS = {
+    "background": "客户背景信息",
+    "country": "申请国家",
+    "major": "申请专业",
+    "study_type": "留学类别",
+    "year": "入学年份",
+    "season": "入学季节",
+    "other_info": "其他信息",
+    "business_unit": "业务单位",
+}
+
+# 补偿机制表格的列（与页面"顾问匹配系统"中的补偿数据表格一致）
+COMPENSATION_NAME_COLUMN = "文案顾问"
+COMPENSATION_COUNT_COLUMNS = ["名校专家使用次数", "博士成功案例使用次数", "低龄留学成功案例使用次数"]
+
+
+class BatchCheckpoint:
+    """批量处理检查点，保存在 batch_rows 表中"""
+
+    def __init__(self, db_path: str, batch_id: str):
+        self.db_path = db_path
+        self.batch_id = batch_id
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS batch_rows
+                (batch_id TEXT,
+                 row_index INTEGER,
+                 status TEXT,
+                 result TEXT,
+                 error TEXT,
+                 duration_ms REAL,
+                 finished_at DATETIME,
+                 PRIMARY KEY (batch_id, row_index))
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def completed_rows(self) -> set:
+        """已成功处理的行号"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            rows = conn.execute(
+                'SELECT row_index FROM batch_rows WHERE batch_id = ? AND status = ?',
+                (self.batch_id, 'success')
+            ).fetchall()
+        finally:
+            conn.close()
+        return {r[0] for r in rows}
+
+    def save(self, row_index: int, status: str, result: Any, error: Optional[str], duration_ms: float):
+        with self._lock:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO batch_rows
+                    (batch_id, row_index, status, result, error, duration_ms, finished_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (self.batch_id, row_index, status,
+                      json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                      error, duration_ms, datetime.utcnow().isoformat()))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def load_results(self) -> Dict[int, Dict[str, Any]]:
+        """读取本批次所有行的处理结果"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            rows = conn.execute(
+                'SELECT row_index, status, result, error FROM batch_rows WHERE batch_id = ? ORDER BY row_index',
+                (self.batch_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            row_index: {"status": status, "result": json.loads(result) if result else None, "error": error}
+            for row_index, status, result, error in rows
+        }
+
+
+def read_input(path: str, sheet_name=0) -> pd.DataFrame:
+    """读取输入的CSV或Excel"""
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_excel(path, sheet_name=sheet_name)
+
+
+def load_compensation_data(path: str, sheet_name=0) -> list:
+    """
+    读取补偿机制数据，格式与页面中编辑的补偿数据表格相同
+
+    Args:
+        path: CSV或Excel文件，包含文案顾问列和各标签使用次数列（缺少的次数列按0处理）
+        sheet_name: Excel工作表名称或序号
+
+    Returns:
+        Consultant_matching 所需的补偿数据列表
+    """
+    df = read_input(path, sheet_name=sheet_name)
+    if COMPENSATION_NAME_COLUMN not in df.columns:
+        raise ValueError(f"补偿数据文件缺少列: {COMPENSATION_NAME_COLUMN}")
+    df = df[df[COMPENSATION_NAME_COLUMN].notna()].copy()
+    for column in COMPENSATION_COUNT_COLUMNS:
+        if column not in df.columns:
+            df[column] = 0
+        df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(int)
+    return df[[COMPENSATION_NAME_COLUMN] + COMPENSATION_COUNT_COLUMNS].to_dict('records')
+
+
+def row_to_student_case(row: pd.Series, case_column: str) -> str:
+    """从输入行得到学生案例文本"""
+    if case_column in row.index and pd.notna(row[case_column]):
+        return str(row[case_column])
+
+    def value(key):
+        v = row.get(CASE_COLUMNS[key], "")
+        return "" if pd.isna(v) else v
+
+    return build_student_case(
+        value("background"), value("country"), value("major"), value("study_type"),
+        value("year"), value("season"), value("other_info")
+    )
+
+
+def process_row(row: pd.Series, args, prompt_templates: PromptTemplates, consultant_df: Optional[pd.DataFrame],
+                compensation_data: Optional[list] = None) -> Dict[str, Any]:
+    """对单行依次执行标签、服务指南和顾问匹配"""
+    student_case = row_to_student_case(row, args.case_column)
+    business_unit = row.get(CASE_COLUMNS["business_unit"], args.business_unit)
+    if pd.isna(business_unit) or not str(business_unit).strip():
+        business_unit = args.business_unit
+
+    tag_result = process_student_case2(student_case, prompt_templates=prompt_templates)
+    if tag_result["status"] != "success":
+        raise RuntimeError(tag_result.get("error_message", "标签提取失败"))
+
+    output_dict = safe_extract_recommended_tags(str(tag_result["raw_output"]))
+    result = {
+        "student_case": student_case,
+        "business_unit": business_unit,
+        "recommended_tags": output_dict["recommended_tags"],
+    }
+
+    other_info = row.get(CASE_COLUMNS["other_info"], "")
+    has_other_info = (args.case_column in row.index) or (pd.notna(other_info) and str(other_info).strip())
+    if args.guide and has_other_info and os.path.exists(args.guide_excel):
+        backstory = prompt_templates.get_template('service_guide_backstory')
+        task = prompt_templates.get_template('service_guide_task')
+        output = prompt_templates.get_template('service_guide_output')
+        guide_prompt = f"{backstory}\n\n{task.format(student_info=student_case)}\n\n{output}"
+        guide_result = process_student_case_with_guide(student_case, guide_prompt, args.guide_excel)
+        result["service_guide"] = str(guide_result.get("service_guide", ""))
+
+    if consultant_df is not None:
+        with span("label_merge"):
+            merged_df = label_merge(tags_to_dataframe(output_dict, business_unit))
+        with span("consultant_matching", consultants=len(consultant_df)):
+            matching_results, area = Consultant_matching(consultant_df, merged_df, compensation_data)
+        result["matching_results"] = matching_results
+        result["local_match"] = bool(area)
+
+    return result
+
+
+def results_to_dataframe(df: pd.DataFrame, results: Dict[int, Dict[str, Any]], top_n: int = 3) -> pd.DataFrame:
+    """将检查点中的结果整理为导出表格，每个输入行一行"""
+    tag_labels = {
+        "countries": "国家标签", "majors": "专业标签", "schoolLevel": "名校专家",
+        "SpecialProjects": "特殊项目标签", "Industryexperience": "行业经验",
+        "Consultantbackground": "文案背景", "businessLocation": "业务单位所在地",
+    }
+    rows = []
+    for row_index in range(len(df)):
+        entry = results.get(row_index, {"status": "pending", "result": None, "error": None})
+        result = entry["result"] or {}
+        out = {"行号": row_index + 1, "状态": entry["status"], "错误": entry["error"] or ""}
+        tags = result.get("recommended_tags", {})
+        for key, label in tag_labels.items():
+            out[label] = ', '.join(tags.get(key, []))
+        out["个性服务指南"] = result.get("service_guide", "")
+        consultants = []
+        for case_consultants in (result.get("matching_results") or {}).values():
+            consultants.extend(case_consultants)
+        for rank, consultant in enumerate(consultants[:top_n], 1):
+            out[f"推荐顾问{rank}"] = f"{consultant.get('name', '')} ({float(consultant.get('score', 0)):.1f}分)"
+        rows.append(out)
+    return pd.DataFrame(rows)
+
+
+def default_batch_id(input_path: str, args) -> str:
+    """输入文件内容与处理阶段相同则批次ID相同，便于断点续跑"""
+    digest = hashlib.sha256()
+    with open(input_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(f"{args.guide}|{args.consultant_file}|{args.compensation_file}|{args.case_column}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def run_batch(args) -> Dict[str, Any]:
+    """执行批量处理并返回吞吐统计"""
+    df = read_input(args.input, sheet_name=args.sheet)
+    if args.limit:
+        df = df.head(args.limit)
+    df = df.reset_index(drop=True)
+
+    batch_id = args.batch_id or default_batch_id(args.input, args)
+    perf_tracing.configure(args.db)
+    checkpoint = BatchCheckpoint(args.db, batch_id)
+    done = checkpoint.completed_rows()
+    todo = [i for i in range(len(df)) if i not in done]
+    logger.info(f"批次 {batch_id}: 共 {len(df)} 行，已完成 {len(done)} 行，本次处理 {len(todo)} 行")
+
+    preload()
+    consultant_df = load_sheet(args.consultant_file) if args.consultant_file else None
+    compensation_data = load_compensation_data(args.compensation_file) if args.compensation_file else None
+    prompt_templates = PromptTemplates()
+
+    stats = {"batch_id": batch_id, "total": len(df), "skipped": len(done), "success": 0, "error": 0}
+    durations = []
+    started = time.perf_counter()
+
+    def work(row_index):
+        row_start = time.perf_counter()
+        with trace(f"{batch_id}:{row_index}"):
+            try:
+                result = process_row(df.iloc[row_index], args, prompt_templates, consultant_df, compensation_data)
+                status, error = "success", None
+            except Exception as e:
+                logger.error(f"第 {row_index + 1} 行处理失败: {str(e)}\n{traceback.format_exc()}")
+                result, status, error = None, "error", str(e)
+        duration_ms = (time.perf_counter() - row_start) * 1000
+        checkpoint.save(row_index, status, result, error, duration_ms)
+        return status, duration_ms
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(work, i) for i in todo]
+        for finished, future in enumerate(as_completed(futures), 1):
+            status, duration_ms = future.result()
+            stats[status] += 1
+            durations.append(duration_ms)
+            if finished % args.report_every == 0 or finished == len(futures):
+                elapsed = time.perf_counter() - started
+                logger.info(f"进度 {finished}/{len(futures)}，成功 {stats['success']}，失败 {stats['error']}，"
+                            f"吞吐 {finished / elapsed * 60:.1f} 行/分钟")
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 1)
+    stats["rows_per_minute"] = round(len(durations) / elapsed * 60, 2) if elapsed > 0 and durations else 0.0
+    if durations:
+        series = pd.Series(durations)
+        stats["p50_row_ms"] = round(series.quantile(0.5), 1)
+        stats["p95_row_ms"] = round(series.quantile(0.95), 1)
+
+    if args.output:
+        fmt = os.path.splitext(args.output)[1].lstrip('.').lower() or 'xlsx'
+        export_df = results_to_dataframe(df, checkpoint.load_results())
+        with open(args.output, 'wb') as f:
+            f.write(export_dataframe(export_df, fmt, sheet_name='批量处理结果'))
+        logger.info(f"结果已导出: {args.output}")
+
+    return stats
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='批量标签提取与顾问匹配（支持断点续跑）')
+    parser.add_argument('input', help='输入的CSV或Excel文件')
+    parser.add_argument('--sheet', default=0, help='Excel工作表名称或序号')
+    parser.add_argument('--case-column', default='student_case', help='包含完整案例文本的列名')
+    parser.add_argument('--business-unit', default='新通国际', help='输入中没有业务单位列时使用的默认值')
+    parser.add_argument('--consultant-file', help='文案顾问标签汇总Excel，提供时执行顾问匹配')
+    parser.add_argument('--compensation-file', help='补偿机制数据（CSV或Excel，列同页面中的补偿数据表格），用于顾问匹配')
+    parser.add_argument('--guide', action='store_true', help='生成个性服务指南')
+    parser.add_argument('--guide-excel', default=DEFAULT_GUIDE_PATH, help='服务指南Excel路径')
+    parser.add_argument('--concurrency', type=int, default=4, help='同时处理的行数')
+    parser.add_argument('--batch-id', help='批次ID，默认由输入文件内容生成')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='检查点数据库路径')
+    parser.add_argument('--output', help='导出结果文件（.xlsx/.csv/.parquet）')
+    parser.add_argument('--limit', type=int, help='只处理前N行')
+    parser.add_argument('--report-every', type=int, default=10, help='每处理N行输出一次进度')
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if isinstance(args.sheet, str) and args.sheet.isdigit():
+        args.sheet = int(args.sheet)
+    stats = run_batch(args)
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 0 if stats["error"] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import sqlite3
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from perf_tracing import trace
+
+logger = logging.getLogger('job_queue')
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCESS = "success"
+JOB_ERROR = "error"
+
+JOB_STATUS_LABELS = {
+    JOB_PENDING: "排队中",
+    JOB_RUNNING: "运行中",
+    JOB_SUCCESS: "已完成",
+    JOB_ERROR: "失败",
+}
+
+DEFAULT_DB_PATH = './.streamlit/data.db'
+
+
+class JobQueue:
+    """
+    本地后台任务队列：任务记录保存在SQLite中，由线程池执行
+
+    Streamlit每次控件交互都会重新运行脚本，耗时的LLM流水线放到这里执行后，
+    页面只需提交任务并轮询状态，重跑不会中断任务，多个任务也可以并发执行。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_workers: int = 4):
+        """
+        初始化任务队列
+
+        Args:
+            db_path: SQLite数据库路径（与交互记录共用）
+            max_workers: 线程池大小，即同时运行的任务数
+        """
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._init_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_table(self):
+        """创建任务表"""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS jobs
+                    (id TEXT PRIMARY KEY,
+                     job_type TEXT,
+                     status TEXT,
+                     payload TEXT,
+                     owner TEXT,
+                     result TEXT,
+                     error TEXT,
+                     created_at DATETIME,
+                     started_at DATETIME,
+                     finished_at DATETIME)
+                ''')
+                # 旧版本创建的任务表没有owner列
+                columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+                if 'owner' not in columns:
+                    conn.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs (owner, created_at)')
+                conn.commit()
+            finally:
+                conn.close()
+
+    def register(self, job_type: str, handler: Callable[[Dict[str, Any]], Any]):
+        """
+        注册任务处理函数
+
+        Args:
+            job_type: 任务类型
+            handler: 接收payload字典、返回可JSON序列化结果的函数
+        """
+        self._handlers[job_type] = handler
+
+    def submit(self, job_type: str, payload: Dict[str, Any], owner: Optional[str] = None) -> str:
+        """
+        提交任务
+
+        Args:
+            job_type: 已注册的任务类型
+            payload: 任务参数，必须可JSON序列化，以便服务重启后恢复
+            owner: 提交者标识（如页面会话ID），用于只列出自己的任务
+
+        Returns:
+            任务ID
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"未注册的任务类型: {job_type}")
+
+        job_id = uuid.uuid4().hex
+        self._execute('''
+            INSERT INTO jobs (id, job_type, status, payload, owner, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (job_id, job_type, JOB_PENDING, json.dumps(payload, ensure_ascii=False), owner,
+              datetime.utcnow().isoformat()))
+        self._executor.submit(self._run_job, job_id, job_type, payload)
+        logger.info(f"任务已提交: {job_id} ({job_type})")
+        return job_id
+
+    def recover(self) -> int:
+        """
+        重新调度上次进程退出时未完成的任务
+
+        Returns:
+            重新调度的任务数
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT id, job_type, payload FROM jobs WHERE status IN (?, ?) ORDER BY created_at',
+                (JOB_PENDING, JOB_RUNNING)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        recovered = 0
+        for job_id, job_type, payload in rows:
+            if job_type not in self._handlers:
+                self._finish(job_id, JOB_ERROR, error=f"未注册的任务类型: {job_type}")
+                continue
+            self._execute('UPDATE jobs SET status = ?, started_at = NULL WHERE id = ?', (JOB_PENDING, job_id))
+            self._executor.submit(self._run_job, job_id, job_type, json.loads(payload))
+            recovered += 1
+
+        if recovered:
+            logger.info(f"已恢复 {recovered} 个未完成任务")
+        return recovered
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        查询任务状态与结果
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            任务信息字典，不存在时返回None
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute('''
+                SELECT id, job_type, status, payload, owner, result, error, created_at, started_at, finished_at
+                FROM jobs WHERE id = ?
+            ''', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._row_to_dict(row) if row else None
+
+    def list_jobs(self, limit: int = 20, job_type: Optional[str] = None,
+                  owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        获取最近的任务列表（不含payload和结果）
+
+        Args:
+            limit: 返回的最大条数
+            job_type: 只返回指定类型的任务
+            owner: 只返回该提交者的任务；为None时返回所有人的任务
+
+        Returns:
+            任务信息列表，按创建时间倒序
+        """
+        query = 'SELECT id, job_type, status, owner, error, created_at, started_at, finished_at FROM jobs'
+        conditions, params = [], []
+        if job_type:
+            conditions.append('job_type = ?')
+            params.append(job_type)
+        if owner is not None:
+            conditions.append('owner = ?')
+            params.append(owner)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY created_at DESC LIMIT ?'
+        params.append(limit)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+        keys = ['id', 'job_type', 'status', 'owner', 'error', 'created_at', 'started_at', 'finished_at']
+        return [dict(zip(keys, row)) for row in rows]
+
+    def shutdown(self, wait: bool = False):
+        """关闭线程池"""
+        self._executor.shutdown(wait=wait)
+
+    def _run_job(self, job_id: str, job_type: str, payload: Dict[str, Any]):
+        """在工作线程中执行任务"""
+        self._execute('UPDATE jobs SET status = ?, started_at = ? WHERE id = ?',
+                      (JOB_RUNNING, datetime.utcnow().isoformat(), job_id))
+        try:
+            # 任务ID作为追踪ID，任务内各阶段的耗时记录可以关联到同一次分析
+            with trace(job_id):
+                result = self._handlers[job_type](payload)
+            self._finish(job_id, JOB_SUCCESS, result=result)
+            logger.info(f"任务完成: {job_id}")
+        except Exception as e:
+            logger.error(f"任务执行失败: {job_id}\n{traceback.format_exc()}")
+            self._finish(job_id, JOB_ERROR, error=str(e))
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None):
+        self._execute('''
+            UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?
+        ''', (status,
+              json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+              error,
+              datetime.utcnow().isoformat(),
+              job_id))
+
+    def _execute(self, sql: str, params: tuple):
+        # SQLite同一时间只允许一个写入者，用锁串行化各工作线程的写操作
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(sql, params)
+                conn.commit()
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        job_id, job_type, status, payload, owner, result, error, created_at, started_at, finished_at = row
+        return {
+            'id': job_id,
+            'job_type': job_type,
+            'status': status,
+            'payload': json.loads(payload) if payload else None,
+            'owner': owner,
+            'result': json.loads(result) if result else None,
+            'error': error,
+            'created_at': created_at,
+            'started_at': started_at,
+            'finished_at': finished_at,
+        }
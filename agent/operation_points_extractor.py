@@ -5,6 +5,8 @@ import logging
 import os
 from typing import List, Dict, Tuple, Any, Optional
 import traceback
+from perf_tracing import span
+from sheet_cache import load_sheet
 
 # 配置日志
 logging.basicConfig(
@@ -32,7 +34,7 @@ class OperationPointsExtractor:
     def _load_excel(self):
         """加载Excel表格数据"""
         try:
-            self._df = pd.read_excel(self.excel_file_path)
+            self._df = load_sheet(self.excel_file_path)
             logger.info(f"成功加载Excel文件: {self.excel_file_path}")
         except Exception as e:
             logger.error(f"加载Excel文件出错: {str(e)}")
@@ -119,23 +121,24 @@ class OperationPointsExtractor:
             matched_rows = []
             
             # 遍历DataFrame的每一行
-            for idx, row in self._df.iterrows():
-                # 检查是否有任何一个国家标签匹配
-                match_country = any(self._is_match(row['国家标签'], country_tag) for country_tag in country_tags) if country_tags else self._is_match(row['国家标签'], None)
+            with span("operation_points_scan", rows=len(self._df)):
+                for idx, row in self._df.iterrows():
+                    # 检查是否有任何一个国家标签匹配
+                    match_country = any(self._is_match(row['国家标签'], country_tag) for country_tag in country_tags) if country_tags else self._is_match(row['国家标签'], None)
                 
-                # 检查是否有任何一个专业标签匹配
-                match_major = any(self._is_match(row['专业标签'], major_tag) for major_tag in major_tags) if major_tags else self._is_match(row['专业标签'], None)
+                    # 检查是否有任何一个专业标签匹配
+                    match_major = any(self._is_match(row['专业标签'], major_tag) for major_tag in major_tags) if major_tags else self._is_match(row['专业标签'], None)
                 
-                # 留学类别匹配
-                match_study_level = self._is_match(row['留学类别标签'], study_level_tag)
+                    # 留学类别匹配
+                    match_study_level = self._is_match(row['留学类别标签'], study_level_tag)
                 
-                # 记录每行的匹配结果
-                logger.debug(f"行 {idx}: 国家匹配={match_country}, 留学类别匹配={match_study_level}, 专业匹配={match_major}")
+                    # 记录每行的匹配结果
+                    logger.debug(f"行 {idx}: 国家匹配={match_country}, 留学类别匹配={match_study_level}, 专业匹配={match_major}")
                 
-                # 如果三个标签都匹配，则添加到结果中
-                if match_country and match_study_level and match_major:
-                    matched_rows.append(row)
-                    logger.info(f"找到匹配行: {idx}, 内容类型: {row.get('输出内容类型', 'N/A')}")
+                    # 如果三个标签都匹配，则添加到结果中
+                    if match_country and match_study_level and match_major:
+                        matched_rows.append(row)
+                        logger.info(f"找到匹配行: {idx}, 内容类型: {row.get('输出内容类型', 'N/A')}")
             
             # 记录匹配结果
             logger.info(f"匹配到 {len(matched_rows)} 条记录")
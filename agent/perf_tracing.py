@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger('perf_tracing')
+
+DEFAULT_DB_PATH = './.streamlit/data.db'
+
+# 当前追踪ID和当前span，线程/协程内各自独立
+_current_trace_id = contextvars.ContextVar('perf_trace_id', default=None)
+_current_span = contextvars.ContextVar('perf_span', default=None)
+
+_db_path = DEFAULT_DB_PATH
+_write_lock = threading.Lock()
+_table_ready = False
+
+
+def configure(db_path: str = DEFAULT_DB_PATH):
+    """
+    设置span写入的数据库（默认与交互记录共用 data.db）
+
+    Args:
+        db_path: SQLite数据库路径
+    """
+    global _db_path, _table_ready
+    _db_path = db_path
+    _table_ready = False
+
+
+def _connect():
+    return sqlite3.connect(_db_path, timeout=30)
+
+
+def _ensure_table():
+    global _table_ready
+    if _table_ready:
+        return
+    os.makedirs(os.path.dirname(_db_path) or '.', exist_ok=True)
+    conn = _connect()
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS perf_spans
+            (id TEXT PRIMARY KEY,
+             trace_id TEXT,
+             parent_id TEXT,
+             stage TEXT,
+             started_at DATETIME,
+             duration_ms REAL,
+             prompt_tokens INTEGER,
+             completion_tokens INTEGER,
+             cache_hit INTEGER,
+             status TEXT,
+             error TEXT,
+             attributes TEXT)
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_perf_spans_started_at ON perf_spans (started_at)')
+        conn.commit()
+    finally:
+        conn.close()
+    _table_ready = True
+
+
+class Span:
+    """一个阶段的耗时记录"""
+
+    def __init__(self, stage: str, trace_id: Optional[str], parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.stage = stage
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.cache_hit: Optional[bool] = None
+        self.started_at = datetime.utcnow()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def add_tokens(self, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """累加LLM token用量"""
+        self.prompt_tokens = (self.prompt_tokens or 0) + int(prompt_tokens or 0)
+        self.completion_tokens = (self.completion_tokens or 0) + int(completion_tokens or 0)
+
+    def set_cache_hit(self, hit: bool):
+        self.cache_hit = bool(hit)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+@contextmanager
+def trace(trace_id: Optional[str] = None):
+    """
+    开启一次追踪，期间产生的span共享同一个trace_id
+
+    Args:
+        trace_id: 追踪ID，不传则自动生成（后台任务使用任务ID）
+    """
+    token = _current_trace_id.set(trace_id or uuid.uuid4().hex)
+    try:
+        yield _current_trace_id.get()
+    finally:
+        _current_trace_id.reset(token)
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """
+    记录一个阶段的耗时，结束时写入 perf_spans 表
+
+    Args:
+        stage: 阶段名称，如 tag_llm、service_guide、excel_query_scan
+        **attributes: 附加信息，以JSON保存
+    """
+    parent = _current_span.get()
+    current = Span(stage, _current_trace_id.get(), parent.id if parent else None, attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.status = "error"
+        current.error = str(e)
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+        _save_span(current)
+
+
+def current_span() -> Optional[Span]:
+    """返回当前正在记录的span，没有时返回None"""
+    return _current_span.get()
+
+
+@contextmanager
+def llm_token_counter(target: Optional[Span] = None):
+    """
+    统计代码块内 langchain OpenAI 调用的token用量，并累加到span上
+
+    Args:
+        target: 累加到的span，默认当前span
+    """
+    target = target or current_span()
+    try:
+        from langchain_community.callbacks import get_openai_callback
+    except ImportError:
+        yield None
+        return
+
+    with get_openai_callback() as cb:
+        try:
+            yield cb
+        finally:
+            if target is not None and (cb.prompt_tokens or cb.completion_tokens):
+                target.add_tokens(cb.prompt_tokens, cb.completion_tokens)
+
+
+def record_usage_metrics(token_usage: Any, target: Optional[Span] = None):
+    """
+    从 CrewAI 的 UsageMetrics（或同结构字典）中读取token用量并累加到span
+
+    Args:
+        token_usage: CrewOutput.token_usage 等对象
+        target: 累加到的span，默认当前span
+    """
+    target = target or current_span()
+    if target is None or token_usage is None:
+        return
+    if isinstance(token_usage, dict):
+        prompt_tokens = token_usage.get('prompt_tokens', 0)
+        completion_tokens = token_usage.get('completion_tokens', 0)
+    else:
+        prompt_tokens = getattr(token_usage, 'prompt_tokens', 0)
+        completion_tokens = getattr(token_usage, 'completion_tokens', 0)
+    target.add_tokens(prompt_tokens, completion_tokens)
+
+
+def _save_span(s: Span):
+    try:
+        with _write_lock:
+            _ensure_table()
+            conn = _connect()
+            try:
+                conn.execute('''
+                    INSERT INTO perf_spans
+                    (id, trace_id, parent_id, stage, started_at, duration_ms, prompt_tokens,
+                     completion_tokens, cache_hit, status, error, attributes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    s.id, s.trace_id, s.parent_id, s.stage, s.started_at.isoformat(), s.duration_ms,
+                    s.prompt_tokens, s.completion_tokens,
+                    None if s.cache_hit is None else int(s.cache_hit),
+                    s.status, s.error,
+                    json.dumps(s.attributes, ensure_ascii=False, default=str)
+                ))
+                conn.commit()
+            finally:
+                conn.close()
+    except Exception as e:
+        # 性能记录失败不能影响业务流程
+        logger.warning(f"保存性能记录失败: {str(e)}")
+
+
+def load_spans(hours: Optional[float] = 24, limit: int = 5000) -> pd.DataFrame:
+    """
+    读取最近的span记录
+
+    Args:
+        hours: 只读取最近若干小时，None表示不限
+        limit: 最大条数
+
+    Returns:
+        span表格
+    """
+    with _write_lock:
+        _ensure_table()
+    query = 'SELECT * FROM perf_spans'
+    params: List[Any] = []
+    if hours is not None:
+        query += ' WHERE started_at >= ?'
+        params.append((datetime.utcnow() - timedelta(hours=hours)).isoformat())
+    query += ' ORDER BY started_at DESC LIMIT ?'
+    params.append(limit)
+
+    conn = _connect()
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+def summarize_spans(spans: pd.DataFrame) -> pd.DataFrame:
+    """
+    按阶段汇总耗时分位数、token用量和缓存命中率
+
+    记录了缓存命中情况的阶段按命中和未命中分成两行统计，避免近乎为零的命中耗时拉低实际执行的分位数。
+
+    Args:
+        spans: load_spans 返回的表格
+
+    Returns:
+        每个阶段一行的汇总表
+    """
+    columns = ['阶段', '次数', '错误数', 'p50(ms)', 'p95(ms)', '平均(ms)', '最大(ms)',
+               '平均输入token', '平均输出token', '缓存命中率']
+    if spans.empty:
+        return pd.DataFrame(columns=columns)
+
+    # 列可能全为空（如从未记录token的阶段），先统一转为数值
+    spans = spans.copy()
+    for column in ['duration_ms', 'prompt_tokens', 'completion_tokens', 'cache_hit']:
+        spans[column] = pd.to_numeric(spans[column], errors='coerce')
+    spans['stage'] = spans['stage'] + spans['cache_hit'].map({1: '（缓存命中）', 0: '（未命中）'}).fillna('')
+
+    grouped = spans.groupby('stage')
+    durations = grouped['duration_ms']
+    summary = pd.DataFrame({
+        '次数': durations.count(),
+        '错误数': grouped['status'].apply(lambda s: int((s == 'error').sum())),
+        'p50(ms)': durations.quantile(0.5),
+        'p95(ms)': durations.quantile(0.95),
+        '平均(ms)': durations.mean(),
+        '最大(ms)': durations.max(),
+        '平均输入token': grouped['prompt_tokens'].mean(),
+        '平均输出token': grouped['completion_tokens'].mean(),
+        # cache_hit 为空表示该阶段不涉及缓存
+        '缓存命中率': grouped['cache_hit'].mean(),
+    }).reset_index().rename(columns={'stage': '阶段'})
+    return summary[columns].sort_values('p95(ms)', ascending=False).round(1)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import logging
+from typing import Any, Dict, Iterable, List
+
+import pandas as pd
+
+logger = logging.getLogger('result_exporter')
+
+EXPORT_FORMATS = {
+    "xlsx": {
+        "label": "Excel (xlsx)",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+    "csv": {
+        "label": "CSV",
+        "mime": "text/csv",
+    },
+    "parquet": {
+        "label": "Parquet",
+        "mime": "application/octet-stream",
+    },
+}
+
+
+def available_formats() -> List[str]:
+    """返回当前环境可用的导出格式（Parquet 需要安装 pyarrow）"""
+    formats = ["xlsx", "csv"]
+    try:
+        import pyarrow  # noqa: F401
+        formats.append("parquet")
+    except ImportError:
+        pass
+    return formats
+
+
+def export_dataframe(df: pd.DataFrame, fmt: str = "xlsx", sheet_name: str = "Sheet1") -> bytes:
+    """
+    将 DataFrame 导出为指定格式的文件内容
+
+    Args:
+        df: 待导出的数据
+        fmt: 导出格式，xlsx / csv / parquet
+        sheet_name: Excel 工作表名称
+
+    Returns:
+        文件的二进制内容
+    """
+    if fmt == "xlsx":
+        return _write_xlsx(df.columns, df.itertuples(index=False, name=None), sheet_name)
+    if fmt == "csv":
+        return _write_csv(df.columns, df.itertuples(index=False, name=None))
+    if fmt == "parquet":
+        return _write_parquet(df)
+    raise ValueError(f"不支持的导出格式: {fmt}")
+
+
+def matching_results_to_dataframe(matching_results: Dict[str, List[Dict[str, Any]]]) -> pd.DataFrame:
+    """
+    将顾问匹配结果展开为表格，每个案例的每位顾问一行
+
+    Args:
+        matching_results: Consultant_matching 返回的 {案例: [顾问匹配信息]} 字典
+
+    Returns:
+        匹配结果表格
+    """
+    rows = []
+    for case, consultants in matching_results.items():
+        for rank, consultant in enumerate(consultants, 1):
+            tag_scores = consultant.get('tag_score_dict', {})
+            row = {
+                "案例": case,
+                "排名": rank,
+                "文案顾问": consultant.get('name', ''),
+                "总得分": round(float(consultant.get('score', 0)), 1),
+                "业务单位": consultant.get('businessunits', '未知'),
+                "文案方向": consultant.get('文案方向', '未知'),
+                "匹配范围": "本地匹配" if consultant.get('area', False) else "全国匹配",
+            }
+            for tag, score in tag_scores.items():
+                row[tag] = score
+            row.update({
+                "匹配率": consultant.get('special_match_ratio', 0),
+                "覆盖率": consultant.get('special_coverage_ratio', 0),
+                "国家标签得分": consultant.get('country_tags_score', 0),
+                "特殊标签得分": consultant.get('special_tags_score', 0),
+                "工作量评分": consultant.get('workload_score', 0),
+                "个人意愿评分": consultant.get('personal_score', 0),
+            })
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _write_xlsx(columns: Iterable[Any], rows: Iterable[tuple], sheet_name: str) -> bytes:
+    # constant_memory 模式下 xlsxwriter 逐行写出并释放已完成的行，内存占用与行数无关
+    import xlsxwriter
+
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {'constant_memory': True, 'nan_inf_to_errors': True})
+    worksheet = workbook.add_worksheet(sheet_name[:31])
+    header_format = workbook.add_format({'bold': True})
+
+    worksheet.write_row(0, 0, [str(c) for c in columns], header_format)
+    for row_idx, row in enumerate(rows, 1):
+        worksheet.write_row(row_idx, 0, [_to_cell(v) for v in row])
+
+    workbook.close()
+    return buffer.getvalue()
+
+
+def _write_csv(columns: Iterable[Any], rows: Iterable[tuple]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([str(c) for c in columns])
+    for row in rows:
+        writer.writerow(["" if _is_missing(v) else v for v in row])
+    # 带 BOM，Excel 直接打开时中文不乱码
+    return buffer.getvalue().encode('utf-8-sig')
+
+
+def _write_parquet(df: pd.DataFrame) -> bytes:
+    if "parquet" not in available_formats():
+        raise ValueError("导出 Parquet 需要安装 pyarrow")
+    # object 列可能混有数字和字符串，统一转为字符串以便列式存储
+    object_columns = df.select_dtypes(include='object').columns
+    df = df.astype({c: 'string' for c in object_columns})
+    df.columns = [str(c) for c in df.columns]
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False, engine='pyarrow')
+    return buffer.getvalue()
+
+
+def _is_missing(value: Any) -> bool:
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _to_cell(value: Any) -> Any:
+    if _is_missing(value):
+        return None
+    if isinstance(value, (list, tuple, set, dict)):
+        return str(value)
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, 'item'):
+        # numpy 标量转为 Python 原生类型
+        return value.item()
+    return value
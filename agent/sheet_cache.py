@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from perf_tracing import span
+
+logger = logging.getLogger('sheet_cache')
+
+# 编译后文件的扩展名，与xlsx放在同一目录
+COMPILED_SUFFIX = '.pkl'
+
+# 服务启动时预加载的表格；可通过环境变量 AGENT_PRELOAD_SHEETS 追加（多个路径用系统路径分隔符分隔）
+KNOWN_SHEETS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '服务指南.xlsx'),
+]
+
+# 进程内缓存：(绝对路径, xlsx修改时间) -> DataFrame
+_memory_cache: Dict[Tuple[str, float], pd.DataFrame] = {}
+_lock = threading.Lock()
+
+
+def compiled_path(xlsx_path: str) -> str:
+    """返回xlsx对应的编译文件路径"""
+    return xlsx_path + COMPILED_SUFFIX
+
+
+def load_sheet(xlsx_path: str) -> pd.DataFrame:
+    """
+    读取Excel第一个工作表，优先使用进程内缓存和编译后的pickle文件
+
+    只有xlsx比编译文件新（或编译文件不存在）时才重新用openpyxl解析，并同时刷新编译文件。
+    返回的DataFrame在调用方之间共享，请勿原地修改。
+
+    Args:
+        xlsx_path: Excel文件路径
+
+    Returns:
+        表格数据
+    """
+    path = os.path.abspath(xlsx_path)
+    xlsx_mtime = os.path.getmtime(path)
+    key = (path, xlsx_mtime)
+
+    with _lock:
+        df = _memory_cache.get(key)
+        if df is not None:
+            # 进程内缓存命中只是一次字典查找，不记录span（每次调用都写数据库反而拖慢界面）
+            return df
+
+        with span("sheet_load", file=os.path.basename(path)) as load_span:
+            df = _read_compiled(path, xlsx_mtime)
+            if df is not None:
+                load_span.set_cache_hit(True)
+                load_span.set_attribute("source", "compiled")
+            else:
+                load_span.set_cache_hit(False)
+                load_span.set_attribute("source", "xlsx")
+                df = pd.read_excel(path)
+                _write_compiled(path, df)
+
+            # 同一文件只保留最新版本
+            for stale in [k for k in _memory_cache if k[0] == path]:
+                del _memory_cache[stale]
+            _memory_cache[key] = df
+            return df
+
+
+def preload(paths: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    预加载并编译表格，供服务启动时调用
+
+    Args:
+        paths: 要预加载的Excel路径，默认使用 KNOWN_SHEETS 和环境变量 AGENT_PRELOAD_SHEETS
+
+    Returns:
+        成功加载的文件路径列表
+    """
+    if paths is None:
+        paths = list(KNOWN_SHEETS)
+        extra = os.environ.get('AGENT_PRELOAD_SHEETS', '')
+        paths.extend(p for p in extra.split(os.pathsep) if p.strip())
+
+    loaded = []
+    for path in paths:
+        if not os.path.exists(path):
+            logger.warning(f"预加载跳过不存在的文件: {path}")
+            continue
+        try:
+            load_sheet(path)
+            loaded.append(path)
+            logger.info(f"预加载完成: {path}")
+        except Exception as e:
+            logger.error(f"预加载文件出错: {path}: {str(e)}")
+    return loaded
+
+
+def _read_compiled(path: str, xlsx_mtime: float) -> Optional[pd.DataFrame]:
+    pkl_path = compiled_path(path)
+    if not os.path.exists(pkl_path) or os.path.getmtime(pkl_path) < xlsx_mtime:
+        return None
+    try:
+        return pd.read_pickle(pkl_path)
+    except Exception as e:
+        # 编译文件损坏或pandas版本不兼容时回退到xlsx
+        logger.warning(f"读取编译文件失败，回退到Excel: {pkl_path}: {str(e)}")
+        return None
+
+
+def _write_compiled(path: str, df: pd.DataFrame):
+    pkl_path = compiled_path(path)
+    tmp_path = f"{pkl_path}.{os.getpid()}.tmp"
+    try:
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, pkl_path)
+    except Exception as e:
+        # 目录只读等情况下仍可使用内存缓存
+        logger.warning(f"写入编译文件失败: {pkl_path}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
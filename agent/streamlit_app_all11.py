@@ -6,6 +6,7 @@ import re
 import sqlite3
 from datetime import datetime
 import json
+import uuid
 
 # 配置日志记录
 logging.basicConfig(
@@ -58,12 +59,17 @@ import pandas as pd
 from agent_case_match13 import (
     TAG_SYSTEM,
     process_student_case,
-    process_student_case2,
-    process_student_case_with_guide,
+    run_tag_guide_pipeline,
+    safe_extract_recommended_tags,
+    tags_to_dataframe,
+    build_student_case,
     PromptTemplates
 )
-import io
 from operation_points_extractor import OperationPointsExtractor
+from result_exporter import EXPORT_FORMATS, available_formats, export_dataframe, matching_results_to_dataframe
+from perf_tracing import span, trace, load_spans, summarize_spans
+from sheet_cache import preload
+from job_queue import JobQueue, JOB_PENDING, JOB_RUNNING, JOB_ERROR, JOB_STATUS_LABELS
 import traceback
 st.set_page_config(
     layout="wide",  # 使用宽布局
@@ -404,59 +410,148 @@ def get_interactions(limit=100):
         logger.error(f"获取历史记录失败: {str(e)}")
         return []
 
-# 在主流程前添加健壮的标签提取函数
-def safe_extract_recommended_tags(raw_output):
-    try:
-        start_idx = raw_output.find('{')
-        end_idx = raw_output.rfind('}')
-        if start_idx != -1 and end_idx != -1:
-            json_part = raw_output[start_idx:end_idx + 1]
-            json_part = json_part.replace('```json', '').replace('```', '').strip()
-            output_dict = json.loads(json_part)
-            # 兼容 recommended_tag / recommended_tags
-            tags = None
-            if "recommended_tag" in output_dict:
-                tags = output_dict["recommended_tag"]
-            elif "recommended_tags" in output_dict:
+TAG_GUIDE_JOB = "tag_guide"
+
+@st.cache_resource
+def preload_sheets():
+    """服务进程启动后只执行一次：预加载服务指南等表格，首个用户无需等待Excel解析"""
+    return preload()
+
+@st.cache_resource
+def get_job_queue():
+    """获取进程级的后台任务队列（所有会话共享）"""
+    job_queue = JobQueue(db_path='./.streamlit/data.db', max_workers=4)
+    job_queue.register(TAG_GUIDE_JOB, run_tag_guide_pipeline)
+    job_queue.recover()
+    return job_queue
+
+@st.fragment(run_every=2)
+def tag_job_status_panel(job_id):
+    """轮询后台分析任务状态，任务结束后刷新整个页面以显示结果"""
+    job = get_job_queue().get_job(job_id)
+    if job is None or job['status'] not in (JOB_PENDING, JOB_RUNNING):
+        st.rerun()
+    
+    started_at = job['started_at'] or job['created_at']
+    elapsed = (datetime.utcnow() - datetime.fromisoformat(started_at)).total_seconds()
+    st.info(f"⏳ 分析任务 `{job_id[:8]}` {JOB_STATUS_LABELS[job['status']]}，已用时 {elapsed:.0f} 秒。可以继续操作页面，任务不会中断。")
+
+def render_tag_result(job_id, result, student_case, selected_unit):
+    """显示标签分析结果，并在首次显示时保存标签数据和交互记录"""
+    if 'saved_tag_jobs' not in st.session_state:
+        st.session_state.saved_tag_jobs = set()
+    first_render = job_id not in st.session_state.saved_tag_jobs
+
+    if result["status"] == "success":
+        with st.expander("查看原始输出（调试用）", expanded=False):
+            st.subheader("模型输出结果")
+            st.code(result["raw_output"], language="json")
+        json_str = result["raw_output"]
+        output_dict = safe_extract_recommended_tags(json_str)
+        st.subheader("📊 分析结果")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("🎯 **匹配标签**")
+            if "recommended_tags" in output_dict:
                 tags = output_dict["recommended_tags"]
-            else:
-                tags = output_dict
-            # 兼容单复数字段名
-            def get_tag(keys, default=[]):
-                for k in keys:
-                    if k in tags:
-                        return tags[k]
-                return default
-            norm_tags = {
-                "countries": get_tag(["countries", "country"]),
-                "majors": get_tag(["majors", "major"]),
-                "schoolLevel": get_tag(["schoolLevel"]),
-                "SpecialProjects": get_tag(["SpecialProjects", "SpecialProject"]),
-                "Industryexperience": get_tag(["Industryexperience"]),
-                "Consultantbackground": get_tag(["Consultantbackground"]),
-                "businessLocation": get_tag(["businessLocation"])
-            }
-            # 类型强制
-            for key in norm_tags:
-                val = norm_tags[key]
-                if not isinstance(val, list):
-                    if val is None:
-                        norm_tags[key] = []
-                    else:
-                        norm_tags[key] = [str(val)]
-            return {"recommended_tags": norm_tags}
-    except Exception as e:
-        pass
-    # 返回空结构
-    return {"recommended_tags": {
-        "countries": [],
-        "majors": [],
-        "schoolLevel": [],
-        "SpecialProjects": [],
-        "Industryexperience": [],
-        "Consultantbackground": [],
-        "businessLocation": []
-    }}
+                if tags.get("countries"):
+                    st.write("**国家标签：**", ", ".join(tags["countries"]))
+                if tags.get("majors"):
+                    st.write("**专业标签：**", ", ".join(tags["majors"]))
+                if tags.get("schoolLevel"):
+                    st.write("**院校层次：**", ", ".join(tags["schoolLevel"]))
+                if tags.get("SpecialProjects"):
+                    st.write("**特殊项目：**", ", ".join(tags["SpecialProjects"]))
+        with col2:
+            if "recommended_tags" in output_dict:
+                tags = output_dict["recommended_tags"]
+                if tags.get("Industryexperience"):
+                    st.write("**行业经验：**", ", ".join(tags["Industryexperience"]))
+                if tags.get("Consultantbackground"):
+                    st.write("**顾问背景：**", ", ".join(tags["Consultantbackground"]))
+                if tags.get("businessLocation"):
+                    st.write("**业务单位所在地：**", ", ".join(tags["businessLocation"]))
+        if 'service_guide' in result:
+            st.subheader("📝 个性服务指南")
+            st.markdown(result['service_guide'])
+        df = tags_to_dataframe(output_dict, selected_unit)
+        if first_render:
+            st.session_state.tagged_data = df
+        # 任务结果每次重新运行都从数据库读出，操作要点按任务ID缓存在会话中，只提取一次
+        if 'operation_points_by_job' not in st.session_state:
+            st.session_state.operation_points_by_job = {}
+        points_by_job = st.session_state.operation_points_by_job
+        if job_id not in points_by_job:
+            try:
+                ai_country_tag = df["国家标签"]
+                ai_major_tag = df["专业标签"]
+                logger.info(f"ai_country_tag: {ai_country_tag}")
+                logger.info(f"ai_major_tag: {ai_major_tag}")
+                if st.session_state.get('points_extractor') is not None:
+                    with trace(job_id):
+                        points_by_job[job_id] = st.session_state.points_extractor.get_operation_points(
+                            student_case,
+                            ai_country_tag,
+                            ai_major_tag
+                        )
+            except Exception as e:
+                points_by_job[job_id] = f"⚠️ 算法提取操作要点出错: {str(e)}"
+        if job_id in points_by_job:
+            result['operation_points'] = points_by_job[job_id]
+            st.subheader("📝 操作要点")
+            st.markdown(result['operation_points'])
+        with st.expander("查看标签数据表格", expanded=False):
+            st.dataframe(df)
+        if first_render:
+            save_interaction(
+                input_text=student_case,
+                output_result=result,
+                business_unit=selected_unit,
+                interaction_type="tag_matching"
+            )
+            st.session_state.saved_tag_jobs.add(job_id)
+        st.success("✅ 数据已处理并保存到内存中，可用于后续匹配")
+    else:
+        st.error("处理模型输出时出错: 未返回成功状态")
+
+def export_panel(key, get_df, file_stem, sheet_name):
+    """
+    按需导出结果：点击"生成导出文件"时才序列化，结果缓存在 session_state 中
+
+    Args:
+        key: 导出缓存键，数据变化时由调用方清除
+        get_df: 返回待导出 DataFrame 的函数
+        file_stem: 下载文件名（不含扩展名）
+        sheet_name: Excel 工作表名称
+    """
+    formats = available_formats()
+    col_fmt, col_gen, col_dl = st.columns([2, 1, 1])
+    with col_fmt:
+        fmt = st.selectbox(
+            "导出格式",
+            options=formats,
+            format_func=lambda f: EXPORT_FORMATS[f]["label"],
+            key=f"export_fmt_{key}"
+        )
+    with col_gen:
+        if st.button("生成导出文件", key=f"export_gen_{key}"):
+            try:
+                st.session_state.exports[key] = {
+                    "fmt": fmt,
+                    "data": export_dataframe(get_df(), fmt, sheet_name=sheet_name)
+                }
+            except Exception as e:
+                st.error(f"生成导出文件出错: {str(e)}")
+    export = st.session_state.exports.get(key)
+    with col_dl:
+        if export and export["fmt"] == fmt:
+            st.download_button(
+                label=f"下载{file_stem}",
+                data=export["data"],
+                file_name=f"{file_stem}.{fmt}",
+                mime=EXPORT_FORMATS[fmt]["mime"],
+                key=f"export_dl_{key}"
+            )
 
 def main():
     """主函数"""
@@ -464,6 +559,7 @@ def main():
     
     # 初始化数据库
     init_db()
+    preload_sheets()
     
     add_custom_css()
 
@@ -472,6 +568,8 @@ def main():
         st.session_state.tagged_data = None
     if 'merged_df' not in st.session_state:
         st.session_state.merged_df = None
+    if 'exports' not in st.session_state:
+        st.session_state.exports = {}
     if 'prompt_templates' not in st.session_state:
         st.session_state.prompt_templates = PromptTemplates()
     
@@ -491,12 +589,13 @@ def main():
         "天津", "温州", "武汉", "西安", "新通温哥华", "长春", "郑州", "重庆", "舟山"
     ]
 
-    # 创建四个标签页
-    system_tab1, system_tab2, system_tab3, system_tab4 = st.tabs([
+    # 创建标签页
+    system_tab1, system_tab2, system_tab3, system_tab4, system_tab5 = st.tabs([
         "标签匹配系统", 
         "标签匹配AI提示词设置", 
         "顾问匹配系统",
-        "历史记录查询"
+        "历史记录查询",
+        "性能监控"
     ])
     
     with system_tab1:
@@ -524,9 +623,16 @@ def main():
                 # 确认Excel文件路径
                 excel_path = os.path.join(os.path.dirname(__file__), '服务指南.xlsx')
                 if os.path.exists(excel_path):
-                    logger.info(f"找到Excel文件: {excel_path}")
-                    st.session_state.points_extractor = OperationPointsExtractor(excel_path)
-                    logger.info("操作要点提取器初始化成功")
+                    # 同一会话内复用提取器，Excel有更新时才重新加载
+                    excel_mtime = os.path.getmtime(excel_path)
+                    cached = st.session_state.get('points_extractor')
+                    if cached is None or st.session_state.get('points_extractor_mtime') != excel_mtime:
+                        # 只记录实际加载的耗时；命中会话缓存的重新运行不写性能记录
+                        with span("operation_points_load"):
+                            logger.info(f"找到Excel文件: {excel_path}")
+                            st.session_state.points_extractor = OperationPointsExtractor(excel_path)
+                            st.session_state.points_extractor_mtime = excel_mtime
+                            logger.info("操作要点提取器初始化成功")
                 else:
                     logger.warning(f"Excel文件不存在: {excel_path}")
                     st.session_state.points_extractor = None
@@ -586,128 +692,78 @@ def main():
             # 在分析按钮逻辑前
             if 'analysis_done' not in st.session_state:
                 st.session_state.analysis_done = False
+            if 'active_tag_job' not in st.session_state:
+                st.session_state.active_tag_job = None
+            # 任务队列由所有会话共享，用会话标识区分各自提交的任务
+            if 'job_owner' not in st.session_state:
+                st.session_state.job_owner = uuid.uuid4().hex
+
+            job_queue = get_job_queue()
 
-            # 在点击"开始分析"按钮时，重置为False
+            # 点击"开始分析"后提交后台任务，页面重跑不会中断分析
             if st.button("开始分析", key="start_analysis"):
                 st.session_state.analysis_done = False
                 if not (year and season and country and major and study_type and background.strip()):
                     st.warning("请填写所有必填项！")
                 else:
                     # 组装 student_case 字符串，传递给后续处理逻辑
-                    student_case = f"""
-学生基本信息：
-{background.strip()}
+                    student_case = build_student_case(background, country, major, study_type, year, season, other_info)
+                    backstory = st.session_state.get('service_guide_backstory', prompt_templates.get_template('service_guide_backstory'))
+                    task = st.session_state.get('service_guide_task', prompt_templates.get_template('service_guide_task'))
+                    output = st.session_state.get('service_guide_output', prompt_templates.get_template('service_guide_output'))
+                    formatted_task = task.format(student_info=student_case)
+                    guide_prompt = f"{backstory}\n\n{formatted_task}\n\n{output}"
 
-申请意向：
-- 申请国家：{country}
-- 申请专业：{major}
-- 留学类别：{study_type}
-- 时间规划：{year}年{season}季
+                    try:
+                        job_id = job_queue.submit(TAG_GUIDE_JOB, {
+                            "student_case": student_case,
+                            "other_info": other_info,
+                            "templates": prompt_templates.get_all_templates(),
+                            "generate_service_guide": generate_service_guide,
+                            "guide_prompt": guide_prompt,
+                            "excel_path": os.path.join(os.path.dirname(__file__), '服务指南.xlsx'),
+                            "selected_unit": selected_unit
+                        }, owner=st.session_state.job_owner)
+                        st.session_state.active_tag_job = job_id
+                    except Exception as e:
+                        st.error(f"提交分析任务失败: {str(e)}")
 
-其他信息或需求：
-{other_info.strip()}
-"""
-                    # 在分析按钮下方、st.spinner前显示小号猫 emoji，不居中
-                    with st.spinner("正在分析..."):
-                        try:
-                            tag_result = process_student_case2(student_case)
-                            result = tag_result
-                            if generate_service_guide and tag_result["status"] == "success" and other_info.strip():
-                                excel_path = os.path.join(os.path.dirname(__file__), '服务指南.xlsx')
-                                if not os.path.exists(excel_path):
-                                    result['service_guide'] = "⚠️ 服务指南Excel文件不存在，只生成标签"
-                                else:
-                                    backstory = st.session_state.get('service_guide_backstory', prompt_templates.get_template('service_guide_backstory'))
-                                    task = st.session_state.get('service_guide_task', prompt_templates.get_template('service_guide_task'))
-                                    output = st.session_state.get('service_guide_output', prompt_templates.get_template('service_guide_output'))
-                                    formatted_task = task.format(student_info=student_case)
-                                    guide_prompt = f"{backstory}\n\n{formatted_task}\n\n{output}"
-                                    try:
-                                        guide_result = process_student_case_with_guide(
-                                            student_case,
-                                            guide_prompt,
-                                            excel_path
-                                        )
-                                        if isinstance(guide_result, dict) and 'service_guide' in guide_result:
-                                            result['service_guide'] = guide_result['service_guide']
-                                        else:
-                                            result['service_guide'] = "无法生成服务指南"
-                                    except Exception as e:
-                                        result['service_guide'] = f"生成服务指南出错: {str(e)}"
-                            if result["status"] == "success":
-                                with st.expander("查看原始输出（调试用）", expanded=False):
-                                    st.subheader("模型输出结果")
-                                    st.code(result["raw_output"], language="json")
-                                json_str = result["raw_output"]
-                                output_dict = safe_extract_recommended_tags(json_str)
-                                st.subheader("📊 分析结果")
-                                col1, col2 = st.columns(2)
-                                with col1:
-                                    st.write("🎯 **匹配标签**")
-                                    if "recommended_tags" in output_dict:
-                                        tags = output_dict["recommended_tags"]
-                                        if tags.get("countries"):
-                                            st.write("**国家标签：**", ", ".join(tags["countries"]))
-                                        if tags.get("majors"):
-                                            st.write("**专业标签：**", ", ".join(tags["majors"]))
-                                        if tags.get("schoolLevel"):
-                                            st.write("**院校层次：**", ", ".join(tags["schoolLevel"]))
-                                        if tags.get("SpecialProjects"):
-                                            st.write("**特殊项目：**", ", ".join(tags["SpecialProjects"]))
-                                with col2:
-                                    if "recommended_tags" in output_dict:
-                                        tags = output_dict["recommended_tags"]
-                                        if tags.get("Industryexperience"):
-                                            st.write("**行业经验：**", ", ".join(tags["Industryexperience"]))
-                                        if tags.get("Consultantbackground"):
-                                            st.write("**顾问背景：**", ", ".join(tags["Consultantbackground"]))
-                                        if tags.get("businessLocation"):
-                                            st.write("**业务单位所在地：**", ", ".join(tags["businessLocation"]))
-                                if 'service_guide' in result:
-                                    st.subheader("📝 个性服务指南")
-                                    st.markdown(result['service_guide'])
-                                df = pd.DataFrame({
-                                    "文案顾问业务单位": [selected_unit],
-                                    "国家标签": [', '.join(output_dict["recommended_tags"]["countries"])],
-                                    "专业标签": [', '.join(output_dict["recommended_tags"]["majors"])],
-                                    "名校专家": [', '.join(output_dict["recommended_tags"]["schoolLevel"])],
-                                    "特殊项目标签": [', '.join(output_dict["recommended_tags"]["SpecialProjects"])],
-                                    "行业经验": [', '.join(output_dict["recommended_tags"]["Industryexperience"])],
-                                    "文案背景": [', '.join(output_dict["recommended_tags"]["Consultantbackground"])],
-                                    "业务单位所在地": [', '.join(output_dict["recommended_tags"]["businessLocation"])],
-                                })
-                                st.session_state.tagged_data = df
-                                try:
-                                    ai_country_tag = df["国家标签"]
-                                    ai_major_tag = df["专业标签"]
-                                    logger.info(f"ai_country_tag: {ai_country_tag}")
-                                    logger.info(f"ai_major_tag: {ai_major_tag}")
-                                    if st.session_state.points_extractor is not None:
-                                        operation_points = st.session_state.points_extractor.get_operation_points(
-                                            student_case,
-                                            ai_country_tag,
-                                            ai_major_tag
-                                        )
-                                        result['operation_points'] = operation_points
-                                except Exception as e:
-                                    result['operation_points'] = f"⚠️ 算法提取操作要点出错: {str(e)}"
-                                if 'operation_points' in result:
-                                    st.subheader("📝 操作要点")
-                                    st.markdown(result['operation_points'])
-                                with st.expander("查看标签数据表格", expanded=False):
-                                    st.dataframe(df)
-                                save_interaction(
-                                    input_text=student_case,
-                                    output_result=result,
-                                    business_unit=selected_unit,
-                                    interaction_type="tag_matching"
-                                )
-                                st.success("✅ 数据已处理并保存到内存中，可用于后续匹配")
-                            else:
-                                st.error("处理模型输出时出错: 未返回成功状态")
-                        except Exception as e:
-                            st.error(f"处理过程中出错: {str(e)}")
-                        st.session_state.analysis_done = True
+            # 最近的后台任务，可切换查看
+            recent_jobs = job_queue.list_jobs(limit=10, job_type=TAG_GUIDE_JOB,
+                                              owner=st.session_state.job_owner)
+            if recent_jobs:
+                with st.expander("后台分析任务", expanded=False):
+                    for job in recent_jobs:
+                        job_col1, job_col2 = st.columns([5, 1])
+                        with job_col1:
+                            st.markdown(
+                                f"`{job['id'][:8]}` · {JOB_STATUS_LABELS.get(job['status'], job['status'])} · "
+                                f"提交于 {job['created_at'][:19].replace('T', ' ')}"
+                            )
+                        with job_col2:
+                            if st.button("查看", key=f"view_job_{job['id']}"):
+                                st.session_state.active_tag_job = job['id']
+
+            active_job_id = st.session_state.active_tag_job
+            if active_job_id:
+                job = job_queue.get_job(active_job_id)
+                if job is None:
+                    st.warning("未找到分析任务记录")
+                    st.session_state.active_tag_job = None
+                elif job['status'] in (JOB_PENDING, JOB_RUNNING):
+                    tag_job_status_panel(active_job_id)
+                elif job['status'] == JOB_ERROR:
+                    st.error(f"处理过程中出错: {job['error']}")
+                    st.session_state.analysis_done = True
+                else:
+                    payload = job['payload']
+                    render_tag_result(
+                        job_id=active_job_id,
+                        result=job['result'],
+                        student_case=payload['student_case'],
+                        selected_unit=payload.get('selected_unit', selected_unit)
+                    )
+                    st.session_state.analysis_done = True
                 
         except Exception as e:
             logger.error(f"配置初始化失败: {str(e)}")
@@ -848,26 +904,27 @@ def main():
             if st.button("开始标签转换处理"):
                 if st.session_state.tagged_data is not None:
                     try:
-                        st.session_state.merged_df = label_merge(st.session_state.tagged_data)
+                        with span("label_merge"):
+                            st.session_state.merged_df = label_merge(st.session_state.tagged_data)
+                        # 数据已变化，之前生成的导出文件作废
+                        st.session_state.exports.pop('merged', None)
                         st.success("标签转换处理完成！")
                         # 显示合并后的数据预览
                         st.write("转换后数据预览：")
                         st.dataframe(st.session_state.merged_df.head())
-                            
-                        # 添加下载按钮
-                        buffer = io.BytesIO()
-                        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                            st.session_state.merged_df.to_excel(writer, index=False, sheet_name='标签转换结果')
-                        st.download_button(
-                            label="下载标签转换结果",
-                            data=buffer.getvalue(),
-                            file_name="标签转换结果.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
                     except Exception as e:
                         st.error(f"标签转换处理出错: {str(e)}")
                 else:
                     st.warning("请先完成标签处理")
+
+            # 导出仅在点击时生成，控件交互不会重复序列化
+            if st.session_state.merged_df is not None:
+                export_panel(
+                    'merged',
+                    lambda: st.session_state.merged_df,
+                    file_stem="标签转换结果",
+                    sheet_name='标签转换结果'
+                )
             
             st.markdown("---")  # 添加分隔线
             
@@ -956,11 +1013,12 @@ def main():
                         compensation_data = st.session_state.compensation_data.to_dict('records')
                         
                         # 调用匹配函数
-                        matching_results, area = Consultant_matching(
-                            consultant_tags_file,
-                            merge_df,
-                            compensation_data
-                        )
+                        with span("consultant_matching", consultants=len(consultant_tags_file)):
+                            matching_results, area = Consultant_matching(
+                                consultant_tags_file,
+                                merge_df,
+                                compensation_data
+                            )
                         st.success("顾问匹配完成！")
 
                         
@@ -1197,12 +1255,21 @@ def main():
                         st.markdown("</div>", unsafe_allow_html=True)
                         # 保存匹配结果到 session_state
                         st.session_state.matching_results = matching_results
+                        st.session_state.exports.pop('matching', None)
                         
                     except Exception as e:
                         st.error(f"顾问匹配出错2: {str(e)}")
                 else:
                     st.warning("请先上传顾问标签汇总并完成标签处理")
 
+            if st.session_state.get('matching_results'):
+                export_panel(
+                    'matching',
+                    lambda: matching_results_to_dataframe(st.session_state.matching_results),
+                    file_stem="顾问匹配结果",
+                    sheet_name='顾问匹配结果'
+                )
+
             # 显示处理状态
             st.markdown("<div class='card-container'>", unsafe_allow_html=True)
             st.subheader("处理状态")
@@ -1380,6 +1447,32 @@ def main():
         else:
             st.info("暂无历史记录")
 
+    # 性能监控：各阶段耗时分位数
+    with system_tab5:
+        st.title("性能监控")
+
+        perf_col1, perf_col2 = st.columns(2)
+        with perf_col1:
+            window_label = st.selectbox("统计时间范围", options=["最近1小时", "最近24小时", "最近7天", "全部"], index=1)
+        with perf_col2:
+            stage_filter = st.text_input("阶段筛选（留空显示全部）", key="perf_stage_filter")
+
+        window_hours = {"最近1小时": 1, "最近24小时": 24, "最近7天": 24 * 7, "全部": None}[window_label]
+        spans_df = load_spans(hours=window_hours)
+        if stage_filter.strip():
+            spans_df = spans_df[spans_df['stage'].str.contains(stage_filter.strip(), case=False, na=False)]
+
+        if spans_df.empty:
+            st.info("暂无性能记录")
+        else:
+            st.subheader("各阶段耗时")
+            st.dataframe(summarize_spans(spans_df), hide_index=True, use_container_width=True)
+
+            st.subheader("最近记录")
+            recent_spans = spans_df[['started_at', 'trace_id', 'stage', 'duration_ms', 'prompt_tokens',
+                                     'completion_tokens', 'cache_hit', 'status', 'error']].head(200)
+            st.dataframe(recent_spans, hide_index=True, use_container_width=True)
+
 if __name__ == "__main__":
     logger.info("开始运行应用")
     main()